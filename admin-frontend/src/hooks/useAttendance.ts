@@ -8,6 +8,25 @@ import {
   AttendanceStats
 } from '../services/attendanceService'
 
+export interface AttendanceDateRange {
+  from: string
+  to: string
+}
+
+// 預設只查過去 30 天，避免一次載入全部歷史記錄
+const DEFAULT_RANGE_DAYS = 30
+
+const defaultDateRange = (): AttendanceDateRange => {
+  const from = new Date()
+  from.setDate(from.getDate() - DEFAULT_RANGE_DAYS)
+  return {
+    from: from.toISOString().split('T')[0],
+    to: new Date().toISOString().split('T')[0]
+  }
+}
+
+type AttendanceUser = { id: string; name: string; username: string }
+
 export const useAttendance = () => {
   const [attendanceRecords, setAttendanceRecords] = useState<AttendanceRecord[]>([])
   const [filteredRecords, setFilteredRecords] = useState<AttendanceRecord[]>([])
@@ -21,6 +40,10 @@ export const useAttendance = () => {
     average_working_hours: 0
   })
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [dateRange, setDateRange] = useState<AttendanceDateRange>(defaultDateRange)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [users, setUsers] = useState<AttendanceUser[]>([])
   const [error, setError] = useState<string | null>(null)
   const [searchParams, setSearchParams] = useState<AttendanceSearchParams>({
     search: '',
@@ -30,26 +53,30 @@ export const useAttendance = () => {
     sortOrder: 'desc'
   })
 
-  // 載入出勤記錄（管理員查看所有記錄）
-  const fetchAttendanceRecords = async () => {
+  // 關聯用戶名稱
+  const withUserNames = (records: AttendanceRecord[], userList: AttendanceUser[]) =>
+    records.map(record => ({
+      ...record,
+      user_name: userList.find(u => u.id === record.user_id)?.name || `用戶${record.user_id}`
+    }))
+
+  // 載入日期範圍內的第一頁出勤記錄（管理員查看所有記錄）
+  const fetchAttendanceRecords = async (range: AttendanceDateRange = dateRange) => {
     try {
       setLoading(true)
       setError(null)
       
-      // 獲取所有出勤記錄和用戶列表來關聯用戶名稱
-      const [records, users] = await Promise.all([
-        attendanceService.getAllAttendance(),
+      // 獲取第一頁出勤記錄和用戶列表來關聯用戶名稱
+      const [page, userList] = await Promise.all([
+        attendanceService.getAllAttendance(range),
         attendanceService.getUsersForAttendance()
       ])
 
-      // 關聯用戶名稱
-      const recordsWithUserNames = records.map(record => ({
-        ...record,
-        user_name: users.find(u => u.id === record.user_id)?.name || `用戶${record.user_id}`
-      }))
-
+      const recordsWithUserNames = withUserNames(page.records, userList)
+      setUsers(userList)
       setAttendanceRecords(recordsWithUserNames)
-      console.log('📋 出勤記錄載入完成:', recordsWithUserNames)
+      setNextCursor(page.nextCursor)
+      console.log('📋 出勤記錄載入完成:', recordsWithUserNames.length, '筆')
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : '載入出勤記錄失敗'
       setError(errorMessage)
@@ -59,6 +86,30 @@ export const useAttendance = () => {
     }
   }
 
+  // 依游標載入下一頁並接在目前的記錄後面
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return
+    try {
+      setLoadingMore(true)
+      const page = await attendanceService.getAllAttendance({ ...dateRange, cursor: nextCursor })
+      setAttendanceRecords(prev => [...prev, ...withUserNames(page.records, users)])
+      setNextCursor(page.nextCursor)
+    } catch (err) {
+      const errorMessage = err instanceof Error ? err.message : '載入更多出勤記錄失敗'
+      setError(errorMessage)
+      console.error('❌ 載入更多出勤記錄失敗:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  // 變更日期範圍後從第一頁重新載入
+  const updateDateRange = (newRange: Partial<AttendanceDateRange>) => {
+    const updatedRange = { ...dateRange, ...newRange }
+    setDateRange(updatedRange)
+    fetchAttendanceRecords(updatedRange)
+  }
+
   // 載入統計數據
   const fetchStats = async () => {
     try {
@@ -175,13 +226,18 @@ export const useAttendance = () => {
     stats,
     todayStats,
     loading,
+    loadingMore,
     error,
     searchParams,
     updateSearch,
+    dateRange,
+    updateDateRange,
+    hasMore: nextCursor !== null,
+    loadMore,
     clockIn,
     clockOut,
     exportReport,
-    refreshRecords: fetchAttendanceRecords,
+    refreshRecords: () => fetchAttendanceRecords(),
     refreshStats: fetchStats,
     clearError
   }
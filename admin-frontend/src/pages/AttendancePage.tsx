@@ -28,9 +28,14 @@ export const AttendancePage: React.FC = () => {
         stats,
         todayStats,
         loading,
+        loadingMore,
         error,
         searchParams,
         updateSearch,
+        dateRange,
+        updateDateRange,
+        hasMore,
+        loadMore,
         exportReport,
         refreshRecords,
         clearError
@@ -80,6 +85,24 @@ export const AttendancePage: React.FC = () => {
                     <p className="text-gray-600 mt-1">監控和管理員工出勤狀況</p>
                 </div>
                 <div className="flex gap-3">
+                    <div className="flex items-center gap-2 px-3 py-2 bg-white border border-gray-200 rounded-xl text-sm text-gray-600">
+                        <Calendar className="w-4 h-4" />
+                        <input
+                            type="date"
+                            value={dateRange.from}
+                            max={dateRange.to}
+                            onChange={(e) => e.target.value && updateDateRange({ from: e.target.value })}
+                            className="bg-transparent focus:outline-none"
+                        />
+                        <span>至</span>
+                        <input
+                            type="date"
+                            value={dateRange.to}
+                            min={dateRange.from}
+                            onChange={(e) => e.target.value && updateDateRange({ to: e.target.value })}
+                            className="bg-transparent focus:outline-none"
+                        />
+                    </div>
                     <button
                         onClick={refreshRecords}
                         disabled={loading}
@@ -164,7 +187,7 @@ export const AttendancePage: React.FC = () => {
                             <div className="flex items-center gap-4">
                                 <div className="flex items-center gap-2 text-sm text-gray-500">
                                     <Clock className="w-4 h-4" />
-                                    <span>共 {attendanceRecords.length} 筆記錄</span>
+                                    <span>已載入 {attendanceRecords.length} 筆記錄{hasMore ? '（尚有更多）' : ''}</span>
                                 </div>
                                 {attendanceRecords.length > 0 && (
                                     <button
@@ -214,6 +237,19 @@ export const AttendancePage: React.FC = () => {
                                 )}
                             </div>
                         )}
+
+                        {/* 後端分頁：每次只載入一頁 */}
+                        {!loading && hasMore && (
+                            <div className="text-center pt-4 mt-4 border-t border-gray-100">
+                                <button
+                                    onClick={loadMore}
+                                    disabled={loadingMore}
+                                    className="text-blue-600 hover:text-blue-700 disabled:opacity-50 text-sm font-medium"
+                                >
+                                    {loadingMore ? '載入中...' : '載入更多'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 </div>
             </div>
@@ -14,6 +14,14 @@ class ApiClient {
     endpoint: string,
     options: RequestInit = {}
   ): Promise<T> {
+    const { data } = await this.requestWithHeaders<T>(endpoint, options)
+    return data
+  }
+
+  private async requestWithHeaders<T>(
+    endpoint: string,
+    options: RequestInit = {}
+  ): Promise<{ data: T; headers: Headers }> {
     const url = `${this.baseURL}${endpoint}`
     const token = localStorage.getItem('token')
 
@@ -38,7 +46,7 @@ class ApiClient {
         )
       }
 
-      return data as T
+      return { data: data as T, headers: response.headers }
     } catch (error) {
       if (error instanceof ApiError) {
         throw error
@@ -51,6 +59,11 @@ class ApiClient {
     return this.request<T>(endpoint, { method: 'GET' })
   }
 
+  // 需要讀取回應 header（例如分頁游標 X-Next-Cursor）時使用
+  async getWithHeaders<T>(endpoint: string): Promise<{ data: T; headers: Headers }> {
+    return this.requestWithHeaders<T>(endpoint, { method: 'GET' })
+  }
+
   async post<T>(endpoint: string, data?: any): Promise<T> {
     return this.request<T>(endpoint, {
       method: 'POST',
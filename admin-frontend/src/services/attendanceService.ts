@@ -1,5 +1,9 @@
 // src/services/attendanceService.ts
 import { apiClient } from './apiClient'
+import { API_ENDPOINTS } from '../utils/constants'
+
+// 列表每頁筆數（後端上限 1000）
+const PAGE_SIZE = 100
 
 // 後端返回的原始數據結構（根據 attendance_schema.py）
 interface RawAttendanceRecord {
@@ -47,11 +51,40 @@ export interface AttendanceStats {
   average_working_hours: number
 }
 
+// 後端 /attendance/stats 回傳格式
+export interface RawAttendanceStats {
+  date: string
+  total_employees: number
+  present_today: number
+  late_today: number
+  early_leave_today: number
+  not_clocked_in_today: number
+  leave_today: number
+  pending_leaves: number
+  pending_overtimes: number
+  attendance_rate: number
+  average_working_hours: number
+  generated_at: string
+}
+
 export interface ClockInRequest {
   device_id?: string
   location?: string
 }
 
+// 列表查詢條件，日期為台灣時間的 YYYY-MM-DD（皆包含當天）
+export interface AttendancePageParams {
+  from?: string
+  to?: string
+  cursor?: string | null
+  limit?: number
+}
+
+export interface AttendancePage {
+  records: AttendanceRecord[]
+  nextCursor: string | null
+}
+
 export interface AttendanceSearchParams {
   search?: string
   status?: string
@@ -77,17 +110,31 @@ class AttendanceService {
     }
   }
 
-  // 獲取所有出勤記錄（管理員專用）
-  async getAllAttendance(): Promise<AttendanceRecord[]> {
+  // 後端列表以 X-Next-Cursor 分頁，每次只取一頁，下一頁的游標交給呼叫端
+  private async getPage(endpoint: string, params: AttendancePageParams): Promise<AttendancePage> {
+    const query = new URLSearchParams({ limit: String(params.limit || PAGE_SIZE) })
+    if (params.cursor) query.set('cursor', params.cursor)
+    if (params.from) query.set('from', params.from)
+    if (params.to) {
+      // 後端的 to 不包含該時間點，送出隔天零時才會包含當天
+      const end = new Date(`${params.to}T00:00:00Z`)
+      end.setUTCDate(end.getUTCDate() + 1)
+      query.set('to', end.toISOString().split('T')[0])
+    }
+    const { data, headers } = await apiClient.getWithHeaders<RawAttendanceRecord[]>(`${endpoint}?${query}`)
+    return {
+      records: data.map(record => this.processRawRecord(record)),
+      nextCursor: headers.get('X-Next-Cursor')
+    }
+  }
+
+  // 獲取出勤記錄的一頁（管理員專用）
+  async getAllAttendance(params: AttendancePageParams = {}): Promise<AttendancePage> {
     try {
-      console.log('📋 獲取所有出勤記錄...')
-      const rawRecords = await apiClient.get<RawAttendanceRecord[]>('/attendance/all')
-      
-      // 處理數據格式，添加前端需要的字段
-      const processedRecords = rawRecords.map(record => this.processRawRecord(record))
-      
-      console.log('✅ 出勤記錄獲取成功:', processedRecords)
-      return processedRecords
+      console.log('📋 獲取出勤記錄...', params)
+      const page = await this.getPage('/attendance/all', params)
+      console.log('✅ 出勤記錄獲取成功:', page.records.length, '筆')
+      return page
     } catch (error) {
       console.error('❌ 獲取出勤記錄失敗:', error)
       throw error
@@ -113,16 +160,13 @@ class AttendanceService {
     }
   }
 
-  // 獲取特定用戶的出勤記錄（管理員專用）
-  async getUserAttendance(userId: string): Promise<AttendanceRecord[]> {
+  // 獲取特定用戶出勤記錄的一頁（管理員專用）
+  async getUserAttendance(userId: string, params: AttendancePageParams = {}): Promise<AttendancePage> {
     try {
-      console.log('🔍 獲取用戶出勤記錄:', userId)
-      const rawRecords = await apiClient.get<RawAttendanceRecord[]>(`/attendance/user/${userId}`)
-      
-      const processedRecords = rawRecords.map(record => this.processRawRecord(record))
-      
-      console.log('✅ 用戶出勤記錄獲取成功:', processedRecords)
-      return processedRecords
+      console.log('🔍 獲取用戶出勤記錄:', userId, params)
+      const page = await this.getPage(`/attendance/user/${userId}`, params)
+      console.log('✅ 用戶出勤記錄獲取成功:', page.records.length, '筆')
+      return page
     } catch (error) {
       console.error('❌ 獲取用戶出勤記錄失敗:', error)
       throw error
@@ -170,34 +214,21 @@ class AttendanceService {
     }
   }
 
-  // 獲取統計數據（需要自行計算，因為後端沒有專門的統計 API）
+  // 獲取今日統計（後端單一聚合並快取數秒）
   async getAttendanceStats(): Promise<AttendanceStats> {
     try {
-      console.log('📊 計算出勤統計...')
-      
-      // 需要獲取用戶列表和出勤記錄來計算統計
-      const [users, attendanceRecords] = await Promise.all([
-        apiClient.get<any[]>('/users/'),
-        this.getAllAttendance()
-      ])
-
-      const today = new Date().toISOString().split('T')[0]
-      const todayRecords = attendanceRecords.filter(record => record.date === today)
-      
-      const stats: AttendanceStats = {
-        total_employees: users.length,
-        present_today: todayRecords.filter(r => r.status === 'present').length,
-        absent_today: todayRecords.filter(r => r.status === 'absent').length,
-        late_today: todayRecords.filter(r => r.status === 'late').length,
-        leave_today: todayRecords.filter(r => r.status === 'leave').length,
-        attendance_rate: users.length > 0 ? Math.round((todayRecords.length / users.length) * 100) : 0,
-        average_working_hours: this.calculateAverageWorkingHours(todayRecords)
+      const stats = await apiClient.get<RawAttendanceStats>(API_ENDPOINTS.ATTENDANCE.STATS)
+      return {
+        total_employees: stats.total_employees,
+        present_today: stats.present_today,
+        absent_today: stats.not_clocked_in_today,
+        late_today: stats.late_today,
+        leave_today: stats.leave_today,
+        attendance_rate: Math.round(stats.attendance_rate),
+        average_working_hours: stats.average_working_hours
       }
-
-      console.log('✅ 出勤統計計算完成:', stats)
-      return stats
     } catch (error) {
-      console.error('❌ 計算出勤統計失敗:', error)
+      console.error('❌ 獲取出勤統計失敗:', error)
       // 返回預設值
       return {
         total_employees: 0,
@@ -233,14 +264,6 @@ class AttendanceService {
     return Math.round(diffHours * 100) / 100 // 保留兩位小數
   }
 
-  // 計算平均工作時間
-  private calculateAverageWorkingHours(records: AttendanceRecord[]): number {
-    if (records.length === 0) return 0
-    
-    const totalHours = records.reduce((sum, record) => sum + (record.working_hours || 0), 0)
-    return Math.round((totalHours / records.length) * 100) / 100
-  }
-
   // 前端搜尋和排序功能
   searchAndSortAttendance(
     records: AttendanceRecord[],
@@ -1,6 +1,7 @@
 // src/services/dashboardService.ts
 import { apiClient } from './apiClient'
-import { User, Leave, Overtime, AttendanceRecord } from '../types'
+import type { RawAttendanceStats } from './attendanceService'
+import { User, Leave, Overtime } from '../types'
 
 export interface DashboardStats {
   totalEmployees: number
@@ -21,49 +22,14 @@ export interface ActivityItem {
 class DashboardService {
   async getStats(): Promise<DashboardStats> {
     try {
-      console.log('🔄 開始獲取統計數據...')
-      
-      const [users, attendances] = await Promise.all([
-        apiClient.get<User[]>('/users/'),
-        apiClient.get<AttendanceRecord[]>('/attendance/all')
-      ])
-
-      console.log('📊 基本 API 響應:', { users, attendances })
-
-      // 嘗試獲取請假和加班數據，失敗時使用預設值
-      let leaves: Leave[] = []
-      let overtimes: Overtime[] = []
-      
-      try {
-        leaves = await apiClient.get<Leave[]>('/leave/all')
-        console.log('✅ 請假數據獲取成功:', leaves)
-      } catch (error) {
-        console.warn('⚠️ 無法獲取請假數據，使用預設值:', error)
+      // 後端以單一聚合計算並快取數秒，不再下載全部出勤／請假／加班紀錄
+      const stats = await apiClient.get<RawAttendanceStats>('/admin/dashboard')
+      return {
+        totalEmployees: stats.total_employees,
+        todayAttendance: stats.present_today,
+        pendingLeaves: stats.pending_leaves,
+        pendingOvertime: stats.pending_overtimes
       }
-      
-      try {
-        overtimes = await apiClient.get<Overtime[]>('/overtime/all')
-        console.log('✅ 加班數據獲取成功:', overtimes)
-      } catch (error) {
-        console.warn('⚠️ 無法獲取加班數據，使用預設值:', error)
-      }
-
-      // 計算今日出勤
-      const today = new Date().toISOString().split('T')[0]
-      const todayAttendance = attendances.filter(a => 
-        a.clock_in && new Date(a.clock_in).toISOString().split('T')[0] === today
-      ).length
-
-      const stats = {
-        totalEmployees: users.length,
-        todayAttendance,
-        pendingLeaves: leaves.filter(l => l.status === '待批准').length,
-        pendingOvertime: overtimes.filter(o => o.status === '待批准').length
-      }
-
-      console.log('📈 計算出的統計數據:', stats)
-      return stats
-
     } catch (error) {
       console.error('❌ 取得統計數據失敗:', error)
       throw error
@@ -4,4 +4,64 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME", "phchuang")
\ No newline at end of file
+DB_NAME = os.getenv("DB_NAME", "phchuang")
+
+# get_current_user 的使用者快取
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# 打卡設定快取多久向資料庫確認一次版本
+ATTENDANCE_SETTING_REFRESH_SECONDS = float(os.getenv("ATTENDANCE_SETTING_REFRESH_SECONDS", "30"))
+
+# 密碼雜湊：bcrypt cost factor 與專用 process pool
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "64"))
+
+# /attendance/stats 與管理儀表板的統計快取秒數
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+
+# 請假行事曆：本季請假的記憶體區間樹多久重新載入一次
+LEAVE_CALENDAR_REFRESH_SECONDS = float(os.getenv("LEAVE_CALENDAR_REFRESH_SECONDS", "60"))
+
+# 打卡裝置離線補登：單批上限、可接受的最舊時間、時鐘誤差與冪等鍵保存天數
+DEVICE_PUNCH_BATCH_LIMIT = int(os.getenv("DEVICE_PUNCH_BATCH_LIMIT", "500"))
+DEVICE_PUNCH_MAX_AGE_DAYS = int(os.getenv("DEVICE_PUNCH_MAX_AGE_DAYS", "31"))
+DEVICE_PUNCH_CLOCK_SKEW_SECONDS = int(os.getenv("DEVICE_PUNCH_CLOCK_SKEW_SECONDS", "300"))
+DEVICE_PUNCH_RECEIPT_DAYS = int(os.getenv("DEVICE_PUNCH_RECEIPT_DAYS", "60"))
+
+# 慢查詢紀錄：超過門檻（毫秒）的指令寫成 JSON log，並抽樣執行 explain("executionStats")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH")  # 未設定時輸出到 stderr
+
+# MongoDB 連線池、逾時、壓縮與讀取偏好
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # 例如 "zstd,snappy,zlib"，空字串為不壓縮
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# 報表、匯出等大量讀取使用的讀取偏好，可導向 secondary 以免與打卡寫入搶資源
+MONGO_ANALYTICS_READ_PREFERENCE = os.getenv("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "-1"))  # -1 為不限制
+
+# 多 worker 啟動（python -m app.server / gunicorn.conf.py）
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+# 啟動時先載入打卡設定、請假行事曆並啟動密碼 process pool，再開始接受請求
+WARM_CACHES = os.getenv("WARM_CACHES", "true").lower() in ("1", "true", "yes")
+
+# 背景工作（app/jobs.py）
+JOB_RUNNER_ENABLED = os.getenv("JOB_RUNNER_ENABLED", "true").lower() in ("1", "true", "yes")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 每個程序同時執行的工作數
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))  # 超過租約未續約視為 worker 已中止，可由其他程序接手
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_SHUTDOWN_SECONDS = float(os.getenv("JOB_SHUTDOWN_SECONDS", "10"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))  # 完成的工作與匯出檔保留天數
@@ -1,5 +1,140 @@
-from pymongo import MongoClient
-from .config import MONGO_URI, DB_NAME
+import asyncio
+import os
+import weakref
+from typing import Optional
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from .config import (
+    DB_NAME,
+    MONGO_ANALYTICS_READ_PREFERENCE,
+    MONGO_COMPRESSORS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MAX_STALENESS_SECONDS,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_READ_PREFERENCE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_URI,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
+from .metrics import command_metrics
+from .slow_query import slow_query_listener
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
\ No newline at end of file
+# 所有 client 共用的 command listener：/metrics 的每請求指令統計、慢查詢紀錄
+EVENT_LISTENERS = [command_metrics, slow_query_listener]
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def read_preference(name: str):
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"未知的讀取偏好: {name}")
+    if name == "primary":
+        return Primary()
+    return READ_PREFERENCES[name](max_staleness=MONGO_MAX_STALENESS_SECONDS)
+
+ANALYTICS_READ_PREFERENCE = read_preference(MONGO_ANALYTICS_READ_PREFERENCE)
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "read_preference": read_preference(MONGO_READ_PREFERENCE),
+        "event_listeners": EVENT_LISTENERS,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+# 同步 client：保留給 scripts、測試與啟動時的索引檢查，第一次使用時才建立
+_sync_client = {"client": None}
+
+def get_client() -> MongoClient:
+    if _sync_client["client"] is None:
+        _sync_client["client"] = MongoClient(MONGO_URI, **client_options())
+    return _sync_client["client"]
+
+def close_client():
+    sync_client, _sync_client["client"] = _sync_client["client"], None
+    if sync_client is not None:
+        sync_client.close()
+
+class SyncDatabaseProxy:
+    """維持 `from app.db import db` 的用法，但延後到實際使用時才建立 client"""
+
+    def __getitem__(self, name: str):
+        return get_client()[DB_NAME][name]
+
+    def __getattr__(self, attr):
+        return getattr(get_client()[DB_NAME], attr)
+
+db = SyncDatabaseProxy()
+
+# AsyncMongoClient 會綁定第一次使用它的 event loop，
+# 因此每個 event loop 各自持有一個 client（正式環境每個 worker 只有一個 loop）
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient]" = weakref.WeakKeyDictionary()
+
+def get_async_client() -> AsyncMongoClient:
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = AsyncMongoClient(MONGO_URI, **client_options())
+        _async_clients[loop] = async_client
+    return async_client
+
+async def open_async_client() -> AsyncMongoClient:
+    """由 lifespan 呼叫：建立目前 loop 的 client 並先連線，啟動失敗可以及早發現"""
+    async_client = get_async_client()
+    await async_client.aconnect()
+    return async_client
+
+async def close_async_client():
+    async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.close()
+
+def reset_after_fork():
+    """
+    fork 後的子程序不可沿用父程序的 client（連線與監控執行緒不會跟著複製），
+    直接丟棄參照，由子程序第一次使用時重新建立。
+    """
+    _sync_client["client"] = None
+    _async_clients.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+def get_async_db():
+    return get_async_client()[DB_NAME]
+
+class AsyncCollectionProxy:
+    """在 repository 模組層級宣告集合，實際呼叫時才取得目前 loop 的 AsyncCollection"""
+
+    def __init__(self, name: str, read_preference=None):
+        self.name = name
+        self.read_preference = read_preference
+
+    def __getattr__(self, attr):
+        database = get_async_db()
+        if self.read_preference is None:
+            return getattr(database[self.name], attr)
+        return getattr(database.get_collection(self.name, read_preference=self.read_preference), attr)
+
+class AsyncDatabaseProxy:
+    def __init__(self, read_preference=None):
+        self.read_preference = read_preference
+
+    def __getitem__(self, name: str) -> AsyncCollectionProxy:
+        return AsyncCollectionProxy(name, self.read_preference)
+
+async_db = AsyncDatabaseProxy()
+# 報表、匯出、統計等大量讀取：依 MONGO_ANALYTICS_READ_PREFERENCE 可讀 secondary
+analytics_db = AsyncDatabaseProxy(ANALYTICS_READ_PREFERENCE)
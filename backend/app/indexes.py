@@ -0,0 +1,250 @@
+"""
+索引管理：彙整各 repository 宣告的 INDEXES，於啟動時補齊缺少的索引，並提供 CLI 檢查。
+
+    cd backend
+    python -m app.indexes status           # 列出缺少、選項不一致、多餘與未被使用的索引
+    python -m app.indexes sync             # 建立缺少的索引（--drop-extra 移除多餘索引，--rebuild-conflicting 重建選項不一致的索引）
+    python -m app.indexes explain          # 以 explain() 檢查熱門查詢的執行計畫
+"""
+import argparse
+import logging
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+from app.repositories import (
+    attendance_daily_repository,
+    attendance_report_repository,
+    attendance_repository,
+    device_punch_repository,
+    device_repository,
+    job_repository,
+    leave_repository,
+    overtime_repository,
+    refresh_token_repository,
+    settings_repository,
+    user_repository,
+)
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+for _module in (
+    attendance_daily_repository,
+    attendance_repository,
+    attendance_report_repository,
+    device_punch_repository,
+    device_repository,
+    job_repository,
+    leave_repository,
+    overtime_repository,
+    refresh_token_repository,
+    settings_repository,
+    user_repository,
+):
+    for _collection, _models in _module.INDEXES.items():
+        REGISTRY.setdefault(_collection, []).extend(_models)
+
+# 會影響資料正確性或行為、必須與宣告一致的索引選項
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def _normalize_key(key) -> tuple:
+    # mongo shell 建立的索引方向可能是 1.0 / -1.0
+    items = key.items() if hasattr(key, "items") else key
+    return tuple((field, int(d) if isinstance(d, float) else d) for field, d in items)
+
+def _normalize_value(value):
+    if hasattr(value, "items"):
+        return {k: _normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _index_options(info: dict) -> dict:
+    """取出需比對的選項；unique/sparse 為 False 視同未設定"""
+    return {
+        option: _normalize_value(info[option])
+        for option in INDEX_OPTIONS
+        if option in info and info[option] is not False
+    }
+
+def diff_indexes(database) -> dict:
+    """
+    比對宣告與實際存在的索引，回傳 {collection: {"missing": [IndexModel], "conflicting": [dict], "extra": [name]}}。
+    key 相同但 unique / partialFilterExpression 等選項不同的索引列為 conflicting，不視為已存在。
+    """
+    report = {}
+    for collection, models in REGISTRY.items():
+        existing = {}
+        for name, info in database[collection].index_information().items():
+            existing.setdefault(_normalize_key(info["key"]), []).append((name, _index_options(info)))
+
+        missing, conflicting = [], []
+        for model in models:
+            key = _normalize_key(model.document["key"])
+            options = _index_options(model.document)
+            candidates = existing.get(key, [])
+            if any(existing_options == options for _, existing_options in candidates):
+                continue
+            if candidates:
+                name, existing_options = candidates[0]
+                conflicting.append({"model": model, "name": name, "declared": options, "existing": existing_options})
+            else:
+                missing.append(model)
+
+        declared = {_normalize_key(m.document["key"]) for m in models}
+        report[collection] = {
+            "missing": missing,
+            "conflicting": conflicting,
+            "extra": [
+                name for key, entries in existing.items() if key not in declared
+                for name, _ in entries if name != "_id_"
+            ],
+        }
+    return report
+
+def unused_indexes(database) -> dict:
+    """以 $indexStats 找出自 mongod 啟動以來從未被使用的索引"""
+    result = {}
+    for collection in REGISTRY:
+        stats = database[collection].aggregate([{"$indexStats": {}}])
+        result[collection] = [
+            s["name"] for s in stats
+            if s["name"] != "_id_" and s["accesses"]["ops"] == 0
+        ]
+    return result
+
+def ensure_indexes(database, drop_extra: bool = False, rebuild_conflicting: bool = False) -> dict:
+    """
+    逐一建立缺少的索引，單一索引失敗（例如既有資料違反 unique 限制）不影響其他索引，也不阻擋啟動。
+    選項不一致的索引只在 rebuild_conflicting 時刪除重建（python -m app.indexes sync --rebuild-conflicting），
+    啟動時不自動處理；宣告為 unique 的索引最後仍不存在時以 error 記錄。
+
+    回傳 {"created": {collection: [索引名稱]}, "failed": [(collection, 索引名稱, 錯誤)],
+    "conflicting": [(collection, conflict)], "missing_unique": [(collection, 索引名稱)]}
+    """
+    created, failed, conflicting, missing_unique = {}, [], [], []
+    for collection, diff in diff_indexes(database).items():
+        to_create = [(model, None) for model in diff["missing"]]
+        for conflict in diff["conflicting"]:
+            if rebuild_conflicting:
+                to_create.append((conflict["model"], conflict["name"]))
+                continue
+            conflicting.append((collection, conflict))
+            logger.warning(
+                "%s 的索引 %s 選項與宣告不一致: 實際 %s，宣告 %s",
+                collection, conflict["name"], conflict["existing"], conflict["declared"],
+            )
+            if conflict["model"].document.get("unique"):
+                missing_unique.append((collection, conflict["model"].document["name"]))
+
+        for model, drop_name in to_create:
+            name = model.document["name"]
+            try:
+                if drop_name:
+                    database[collection].drop_index(drop_name)
+                database[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.warning("無法建立 %s 的索引 %s: %s", collection, name, e)
+                failed.append((collection, name, str(e)))
+                if model.document.get("unique"):
+                    missing_unique.append((collection, name))
+            else:
+                created.setdefault(collection, []).append(name)
+
+        if drop_extra:
+            for name in diff["extra"]:
+                database[collection].drop_index(name)
+
+    for collection, name in missing_unique:
+        logger.error("%s 缺少 unique 索引 %s，唯一性限制目前不會生效", collection, name)
+    return {"created": created, "failed": failed, "conflicting": conflicting, "missing_unique": missing_unique}
+
+def hot_queries() -> list:
+    """repository 中最常執行的查詢形狀，用於 explain 檢查"""
+    now = datetime.now(timezone.utc)
+    user_id = ObjectId()
+    return [
+        ("attendances", {"user_id": user_id, "clock_in": {"$gte": now, "$lte": now}}, None),
+        ("attendances", {"user_id": user_id}, [("clock_in", -1)]),
+        ("attendances", {}, [("clock_in", -1)]),
+        ("attendance_reports", {"user_id": user_id, "month": now.strftime("%Y-%m")}, None),
+        ("leaves", {"user_id": user_id, "start_date": {"$lte": now}, "end_date": {"$gte": now}}, None),
+        ("overtimes", {"user_id": user_id}, None),
+        ("users", {"username": ""}, None),
+        ("settings", {"setting_name": ""}, None),
+    ]
+
+def _plan_stages(plan: dict) -> list:
+    plan = plan.get("queryPlan", plan)
+    stage = plan.get("stage", "?")
+    if plan.get("indexName"):
+        stage = f"{stage}({plan['indexName']})"
+    stages = [stage]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+def explain_hot_queries(database) -> list:
+    result = []
+    for collection, query, sort in hot_queries():
+        cursor = database[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = _plan_stages(plan)
+        result.append({
+            "collection": collection,
+            "filter": sorted(query.keys()),
+            "sort": sort,
+            "plan": " <- ".join(stages),
+            "collscan": any(s.startswith("COLLSCAN") for s in stages),
+        })
+    return result
+
+def main():
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "sync", "explain"])
+    parser.add_argument("--drop-extra", action="store_true", help="sync 時一併移除未宣告的索引")
+    parser.add_argument("--rebuild-conflicting", action="store_true", help="sync 時刪除並重建選項與宣告不一致的索引")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        unused = unused_indexes(db)
+        for collection, diff in diff_indexes(db).items():
+            print(f"[{collection}]")
+            print("  missing:", [m.document["name"] for m in diff["missing"]] or "-")
+            print("  conflicting:", [
+                f"{c['name']} (實際 {c['existing']}，宣告 {c['declared']})" for c in diff["conflicting"]
+            ] or "-")
+            print("  extra:  ", diff["extra"] or "-")
+            print("  unused: ", unused[collection] or "-")
+    elif args.command == "sync":
+        result = ensure_indexes(db, drop_extra=args.drop_extra, rebuild_conflicting=args.rebuild_conflicting)
+        for collection, names in result["created"].items():
+            print(f"✅ {collection}: {', '.join(names)}")
+        for collection, conflict in result["conflicting"]:
+            print(f"⚠️ {collection}: {conflict['name']} 選項不一致（實際 {conflict['existing']}，宣告 {conflict['declared']}），"
+                  "可加上 --rebuild-conflicting 重建")
+        for collection, name, error in result["failed"]:
+            print(f"❌ {collection}: 無法建立索引 {name}: {error}")
+        for collection, name in result["missing_unique"]:
+            print(f"❌ {collection}: 缺少 unique 索引 {name}")
+        if not result["created"]:
+            print("沒有新建立的索引")
+    else:
+        for row in explain_hot_queries(db):
+            flag = "⚠️ COLLSCAN" if row["collscan"] else "✅"
+            print(f"{flag} {row['collection']} filter={row['filter']} sort={row['sort']}")
+            print(f"    {row['plan']}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except PyMongoError as e:
+        raise SystemExit(f"MongoDB 錯誤: {e}")
@@ -0,0 +1,327 @@
+"""
+背景工作：報表產生、匯出與重算以工作送出，HTTP 請求立即回傳工作，之後以 /jobs/{id} 查詢進度。
+
+- 工作存在 jobs collection（app/repositories/job_repository.py），以租約原子性地領取，
+  多個 worker 程序同時執行也只會有一個拿到；程序中止後租約過期，由其他程序接手
+- 每個程序的 JobRunner 以 JOB_WORKERS 個 asyncio task 執行工作，隨 app lifespan 啟動與停止
+- 執行中定期續約並檢查 cancel_requested；失敗時依 JOB_MAX_ATTEMPTS 以指數退避重試
+
+    cd backend
+    # 只執行背景工作、不接受 HTTP 請求（此時 web 程序可設 JOB_RUNNER_ENABLED=false）
+    python -m app.jobs --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from uuid import uuid4
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from app.config import (
+    JOB_HEARTBEAT_SECONDS,
+    JOB_POLL_SECONDS,
+    JOB_RETENTION_DAYS,
+    JOB_SHUTDOWN_SECONDS,
+    JOB_WORKERS,
+)
+from app.repositories import (
+    attendance_daily_repository,
+    attendance_report_repository,
+    attendance_repository,
+    job_repository,
+)
+from app.utils.exports import EXPORT_MEDIA_TYPES, export_rows
+from app.utils.time_utils import to_utc
+
+logger = logging.getLogger(__name__)
+
+# 進度最多每秒寫入一次
+PROGRESS_MIN_INTERVAL_SECONDS = 1.0
+PURGE_INTERVAL_SECONDS = 3600
+EXPORT_PROGRESS_EVERY = 1000
+
+# 工作中止的原因
+CANCEL = "cancel"
+LEASE_LOST = "lease_lost"
+SHUTDOWN = "shutdown"
+
+HANDLERS = {}
+
+def handler(job_type: str):
+    """註冊工作類型，handler 接收 JobContext，回傳值存為工作的 result"""
+    def register(func):
+        HANDLERS[job_type] = func
+        return func
+    return register
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    def __init__(self, job: dict, worker_id: str):
+        self.job = job
+        self.id = job["_id"]
+        self.params = job["params"]
+        self.worker_id = worker_id
+        self.stop_reason = None
+        self._task = None
+        self._last_progress = 0.0
+
+    def stop(self, reason: str):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        if self._task is not None:
+            self._task.cancel()
+
+    async def progress(self, processed: int, total: Optional[int] = None):
+        """回報進度；工作已被要求取消或失去租約時丟出 JobCancelled"""
+        now = time.monotonic()
+        if now - self._last_progress < PROGRESS_MIN_INTERVAL_SECONDS and total is None:
+            return
+        self._last_progress = now
+        cancel_requested = await job_repository.update_progress(self.id, self.worker_id, processed, total)
+        if cancel_requested is None:
+            self.stop_reason = self.stop_reason or LEASE_LOST
+            raise JobCancelled()
+        if cancel_requested:
+            self.stop_reason = self.stop_reason or CANCEL
+            raise JobCancelled()
+
+class JobRunner:
+    def __init__(self):
+        self.worker_id = None
+        self._tasks = []
+        self._running = {}
+        self._wakeup = None
+        self._stopping = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, workers: int = JOB_WORKERS):
+        if self.started:
+            return
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+        logger.info("背景工作已啟動: %s（%d 個 worker）", self.worker_id, workers)
+
+    async def stop(self, timeout: float = JOB_SHUTDOWN_SECONDS):
+        """不再領取新工作，等待執行中的工作最多 timeout 秒，其餘中止並歸還給其他程序"""
+        if not self.started:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        if pending:
+            for ctx in list(self._running.values()):
+                ctx.stop(SHUTDOWN)
+            _, pending = await asyncio.wait(pending, timeout=5)
+            for task in pending:
+                task.cancel()
+        self._tasks = []
+
+    def notify(self):
+        """有新工作時叫醒閒置的 worker，不必等到下一次輪詢"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel_local(self, job_id: ObjectId) -> bool:
+        """工作正在這個程序執行時立即中止；其他程序由續約時發現 cancel_requested"""
+        ctx = self._running.get(job_id)
+        if ctx is None:
+            return False
+        ctx.stop(CANCEL)
+        return True
+
+    async def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job = await job_repository.claim_job(self.worker_id, list(HANDLERS))
+                if job is None:
+                    await self._idle()
+                elif job["attempts"] > job["max_attempts"]:
+                    # 執行它的程序反覆中止（租約過期），不再接手
+                    await job_repository.fail_job(job, self.worker_id, "執行中的程序多次中止")
+                else:
+                    await self._execute(job)
+            except PyMongoError as e:
+                logger.warning("背景工作無法存取資料庫: %s", e)
+                await self._idle()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        if not self._stopping.is_set():
+            self._wakeup.clear()
+
+    async def _execute(self, job: dict):
+        ctx = JobContext(job, self.worker_id)
+        ctx._task = asyncio.create_task(HANDLERS[job["type"]](ctx))
+        self._running[ctx.id] = ctx
+        heartbeat = asyncio.create_task(self._heartbeat(ctx))
+        try:
+            result = await ctx._task
+        except (asyncio.CancelledError, JobCancelled):
+            if ctx.stop_reason == CANCEL:
+                await job_repository.cancel_running_job(ctx.id, self.worker_id)
+            elif ctx.stop_reason == SHUTDOWN:
+                await job_repository.release_job(ctx.id, self.worker_id)
+            # LEASE_LOST：工作已由其他程序接手或已結束，不再寫入
+        except Exception as e:
+            logger.exception("背景工作 %s (%s) 失敗", ctx.id, job["type"])
+            await job_repository.fail_job(job, self.worker_id, f"{type(e).__name__}: {e}")
+        else:
+            await job_repository.complete_job(ctx.id, self.worker_id, result)
+        finally:
+            heartbeat.cancel()
+            self._running.pop(ctx.id, None)
+
+    async def _heartbeat(self, ctx: JobContext):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                cancel_requested = await job_repository.renew_lease(ctx.id, self.worker_id)
+            except PyMongoError as e:
+                logger.warning("背景工作 %s 續約失敗: %s", ctx.id, e)
+                continue
+            if cancel_requested is None:
+                ctx.stop(LEASE_LOST)
+            elif cancel_requested:
+                ctx.stop(CANCEL)
+
+    async def _purge_loop(self):
+        while not self._stopping.is_set():
+            try:
+                before = datetime.now(timezone.utc) - timedelta(days=JOB_RETENTION_DAYS)
+                purged = await job_repository.purge_finished_jobs(before)
+                if purged:
+                    logger.info("已清除 %d 筆過期的背景工作", purged)
+            except PyMongoError as e:
+                logger.warning("清除過期背景工作失敗: %s", e)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), PURGE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+runner = JobRunner()
+
+async def submit(job_type: str, params: dict, created_by: Optional[str] = None) -> dict:
+    if job_type not in HANDLERS:
+        raise ValueError(f"未知的工作類型: {job_type}")
+    job = await job_repository.create_job(job_type, params, created_by)
+    runner.notify()
+    return job
+
+def _object_ids(user_ids: Optional[list]):
+    return [ObjectId(u) for u in user_ids] if user_ids is not None else None
+
+def _parse_date(value: Optional[str], days: int = 0):
+    return to_utc(datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)) if value else None
+
+def _parse_datetime(value: Optional[str]):
+    return to_utc(datetime.fromisoformat(value)) if value else None
+
+@handler("report_generate")
+async def generate_report_job(ctx: JobContext) -> dict:
+    report_id = await attendance_report_repository.generate_report(ctx.params["user_id"], ctx.params["month"])
+    return {"report_id": report_id}
+
+@handler("report_batch")
+async def generate_report_batch_job(ctx: JobContext) -> dict:
+    return await attendance_report_repository.generate_month_reports(
+        ctx.params["month"], _object_ids(ctx.params.get("user_ids")), ctx.progress
+    )
+
+@handler("report_reconcile")
+async def reconcile_report_job(ctx: JobContext) -> dict:
+    written = await attendance_report_repository.reconcile_month(ctx.params["month"], _object_ids(ctx.params.get("user_ids")))
+    return {"written": written}
+
+@handler("daily_backfill")
+async def backfill_daily_job(ctx: JobContext) -> dict:
+    # to 為包含當天的台灣日期
+    start = _parse_date(ctx.params.get("from"))
+    end = _parse_date(ctx.params.get("to"), days=1)
+    await attendance_daily_repository.backfill_daily(start, end)
+    return {"from": ctx.params.get("from"), "to": ctx.params.get("to")}
+
+@handler("attendance_export")
+async def export_attendance_job(ctx: JobContext) -> dict:
+    """匯出結果寫入 GridFS（job_files），以 /jobs/{id}/download 下載"""
+    fmt = ctx.params["format"]
+    user_id = ctx.params.get("user_id")
+    query = attendance_repository.build_attendance_filter(
+        ObjectId(user_id) if user_id else None,
+        _parse_datetime(ctx.params.get("from")),
+        _parse_datetime(ctx.params.get("to")),
+        ctx.params.get("device_id"),
+    )
+    rows = 0
+
+    async def counted(records):
+        nonlocal rows
+        async for record in records:
+            rows += 1
+            if rows % EXPORT_PROGRESS_EVERY == 0:
+                await ctx.progress(rows)
+            yield record
+
+    filename = f"attendance-{ctx.id}.{fmt}"
+    stream = job_repository.file_bucket().open_upload_stream(
+        filename, metadata={"job_id": ctx.id, "content_type": EXPORT_MEDIA_TYPES[fmt]}
+    )
+    try:
+        async for chunk in export_rows(counted(attendance_repository.iter_attendance(query)), fmt):
+            await stream.write(chunk.encode("utf-8"))
+        await stream.close()
+    except (Exception, asyncio.CancelledError):
+        # 失敗或取消時刪掉寫到一半的檔案，重試時重新產生
+        await stream.abort()
+        raise
+    await ctx.progress(rows, rows)
+    return {
+        "file_id": stream._id,
+        "filename": filename,
+        "content_type": EXPORT_MEDIA_TYPES[fmt],
+        "rows": rows,
+        "size": stream.length,
+    }
+
+async def run_worker(workers: int):
+    from app.db import close_async_client, open_async_client
+
+    await open_async_client()
+    await runner.start(workers)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows：以 Ctrl+C 結束
+    try:
+        await stop.wait()
+    finally:
+        await runner.stop()
+        await close_async_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,56 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import user_route, auth_route, admin_route, leave_route, overtime_route, attendance_route, report_route, device_router, attendance_setting_router, role_router, settings_router
+from pymongo.errors import PyMongoError
+from app import indexes
+from app.jobs import runner as job_runner
+from app.metrics import MetricsMiddleware, render_metrics
+from app.config import JOB_RUNNER_ENABLED, WARM_CACHES
+from app.db import close_async_client, close_client, db, get_async_db, open_async_client
+from app.repositories import attendance_setting_repository, leave_repository
+from app.utils.security import shutdown_password_pool, warm_password_pool
+from app.utils.time_utils import today_range_in_utc
+from app.routes import user_route, auth_route, admin_route, leave_route, overtime_route, attendance_route, report_route, device_router, attendance_setting_router, role_router, settings_router, job_route
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+async def warm_up():
+    """
+    每個 worker 在開始接受請求前先建立連線池、載入熱門快取並啟動密碼 process pool，
+    避免剛啟動（或 gunicorn 重啟 worker）時第一批請求一起等待。
+    """
+    await warm_password_pool()
+    try:
+        await get_async_db().command("ping")
+        await attendance_setting_repository.get_punch_setting()
+        await leave_repository.get_leave_calendar(*today_range_in_utc())
+    except PyMongoError as e:
+        logger.warning("啟動時無法預熱快取: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mongo client 在這裡建立並於關閉時釋放，而不是在 import 時
+    await open_async_client()
+    try:
+        result = await run_in_threadpool(indexes.ensure_indexes, db)
+        if result["created"]:
+            logger.info("已建立索引: %s", result["created"])
+    except PyMongoError as e:
+        logger.warning("啟動時無法檢查索引: %s", e)
+    if WARM_CACHES:
+        await warm_up()
+    if JOB_RUNNER_ENABLED:
+        await job_runner.start()
+    yield
+    # uvicorn / gunicorn 收到 SIGTERM 後會先停止接受連線並等待進行中的請求，才執行以下清理
+    await job_runner.stop()
+    shutdown_password_pool()
+    await close_async_client()
+    close_client()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -10,7 +58,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # 註冊路由
 app.include_router(user_route.router)
@@ -24,7 +74,13 @@ app.include_router(device_router.router)
 app.include_router(attendance_setting_router.router)
 app.include_router(role_router.router)
 app.include_router(settings_router.router)
+app.include_router(job_route.router)
 
 @app.get("/")
 def root():
     return {"message": "Hello from Attendance System"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
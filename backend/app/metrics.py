@@ -0,0 +1,122 @@
+"""
+Prometheus 指標：每個路由樣板的延遲，以及每個請求實際送出的 Mongo 指令數與耗時。
+
+- MetricsMiddleware 以 ASGI middleware 量測整個回應（含串流本體）的時間
+- CommandMetricsListener 掛在 app/db.py 的 client 上，透過 contextvar 把指令歸到目前的請求
+- 多 worker 部署由 app/server.py / gunicorn.conf.py 設定 PROMETHEUS_MULTIPROC_DIR
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from pymongo import monitoring
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 請求延遲（依路由樣板）",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands",
+    "每個 HTTP 請求送出的 Mongo 指令數",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 20, 50, 100),
+)
+REQUEST_MONGO_DURATION = Histogram(
+    "http_request_mongo_duration_seconds",
+    "每個 HTTP 請求花在 Mongo 指令上的總時間",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MONGO_COMMANDS = Counter(
+    "mongo_commands_total",
+    "Mongo 指令數（依來源路由與指令）",
+    ["route", "command", "status"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "單一 Mongo 指令耗時",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# 非請求期間（啟動、背景工作、scripts）送出的指令
+NO_ROUTE = "-"
+# 找不到對應路由（404）時統一標籤，避免任意路徑造成標籤爆量
+UNMATCHED_ROUTE = "unmatched"
+
+# 目前請求的統計；內容為可變 dict，threadpool 與子 task 複製 context 後仍指向同一份
+_current_request: ContextVar[Optional[dict]] = ContextVar("current_request", default=None)
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+def current_route() -> str:
+    request = _current_request.get()
+    return route_label(request["scope"]) if request else NO_ROUTE
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+    def _record(self, event, status: str):
+        seconds = event.duration_micros / 1_000_000
+        request = _current_request.get()
+        route = NO_ROUTE
+        if request is not None:
+            request["commands"] += 1
+            request["mongo_seconds"] += seconds
+            route = route_label(request["scope"])
+        MONGO_COMMANDS.labels(route, event.command_name, status).inc()
+        MONGO_COMMAND_DURATION.labels(event.command_name).observe(seconds)
+
+command_metrics = CommandMetricsListener()
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = {"scope": scope, "commands": 0, "mongo_seconds": 0.0}
+        token = _current_request.set(request)
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            method, route = scope["method"], route_label(scope)
+            REQUEST_LATENCY.labels(method, route, str(status["code"])).observe(time.perf_counter() - started)
+            REQUEST_MONGO_COMMANDS.labels(method, route).observe(request["commands"])
+            REQUEST_MONGO_DURATION.labels(method, route).observe(request["mongo_seconds"])
+
+def render_metrics() -> tuple:
+    """
+    回傳 (內容, content type)。
+    多 worker 時（設定 PROMETHEUS_MULTIPROC_DIR）彙整所有 worker 寫入的檔案，
+    否則每次抓取只會看到剛好處理這個請求的 worker。
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
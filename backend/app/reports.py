@@ -0,0 +1,58 @@
+"""
+月報維護：由原始打卡資料重建指定月份的 attendance_reports。
+
+    cd backend
+    python -m app.reports reconcile 2025-07
+    python -m app.reports reconcile 2025-07 --user-id 686a6ce62be32901a8ad46f9
+    python -m app.reports backfill-daily --from 2025-01-01 --to 2025-07-31
+    python -m app.reports backfill-local-date   # 升級後執行一次，為舊打卡紀錄補上 local_date
+"""
+import argparse
+import asyncio
+from bson import ObjectId
+from datetime import datetime, timedelta
+from app import indexes
+from app.db import db
+from app.repositories import attendance_daily_repository, attendance_report_repository, attendance_repository
+from app.utils.time_utils import to_utc
+
+async def reconcile(month: str, user_ids: list = None):
+    count = await attendance_report_repository.reconcile_month(month, user_ids)
+    print(f"✅ {month}：已重建 {count} 筆報表")
+
+async def backfill_daily(start_date: str = None, end_date: str = None):
+    # $merge 需要 (user_id, local_date) 唯一索引
+    indexes.ensure_indexes(db)
+    start = to_utc(datetime.strptime(start_date, "%Y-%m-%d")) if start_date else None
+    end = to_utc(datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)) if end_date else None
+    await attendance_daily_repository.backfill_daily(start, end)
+    print(f"✅ attendance_daily 已回填（{start_date or '最早'} ~ {end_date or '最新'}）")
+
+async def backfill_local_date():
+    updated, conflicts = await attendance_repository.backfill_local_date()
+    print(f"✅ 已為 {updated} 筆舊打卡紀錄補上 local_date")
+    if conflicts:
+        print(f"⚠️ {conflicts} 筆與同一人同一天的其他紀錄衝突，未更新，請人工確認")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = subparsers.add_parser("reconcile", help="由原始打卡資料重建整月報表")
+    reconcile_parser.add_argument("month", help="YYYY-MM（台灣時間）")
+    reconcile_parser.add_argument("--user-id", action="append", dest="user_ids", help="只重建指定使用者，可重複指定")
+    backfill_parser = subparsers.add_parser("backfill-daily", help="由原始打卡資料回填 attendance_daily")
+    backfill_parser.add_argument("--from", dest="start_date", help="YYYY-MM-DD（台灣時間，含）")
+    backfill_parser.add_argument("--to", dest="end_date", help="YYYY-MM-DD（台灣時間，含）")
+    subparsers.add_parser("backfill-local-date", help="為沒有 local_date 的舊打卡紀錄補上台灣日期")
+    args = parser.parse_args()
+
+    if args.command == "reconcile":
+        user_ids = [ObjectId(u) for u in args.user_ids] if args.user_ids else None
+        asyncio.run(reconcile(args.month, user_ids))
+    elif args.command == "backfill-local-date":
+        asyncio.run(backfill_local_date())
+    else:
+        asyncio.run(backfill_daily(args.start_date, args.end_date))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from app.db import analytics_db, async_db
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from app.repositories.attendance_report_repository import HAS_CLOCK_OUT_EXPR, WORK_MINUTES_EXPR
+
+daily = async_db["attendance_daily"]
+daily_reads = analytics_db["attendance_daily"]
+attendances = async_db["attendances"]
+
+INDEXES = {
+    # 每人每個台灣日期一筆，已完成（有下班打卡）的出勤彙總
+    "attendance_daily": [
+        IndexModel([("user_id", ASCENDING), ("local_date", ASCENDING)], name="user_id_local_date", unique=True),
+        IndexModel([("local_date", ASCENDING)], name="local_date"),
+    ],
+}
+
+async def upsert_daily(user_id: ObjectId, local_date: str, record: dict):
+    """下班打卡完成後寫入當日彙總"""
+    await daily.update_one(
+        {"user_id": user_id, "local_date": local_date},
+        {"$set": {
+            "attendance_id": record["_id"],
+            "clock_in": record["clock_in"],
+            "clock_out": record["clock_out"],
+            "worked_minutes": record["worked_minutes"],
+            "overtime_minutes": record["overtime_minutes"],
+            "is_late": bool(record.get("is_late")),
+            "is_early_leave": bool(record.get("is_early_leave")),
+            "device_id": record.get("device_id"),
+            "updated_at": datetime.now(timezone.utc),
+        }},
+        upsert=True
+    )
+
+def backfill_pipeline(start: Optional[datetime] = None, end: Optional[datetime] = None) -> list:
+    match = {"$expr": HAS_CLOCK_OUT_EXPR}
+    if start or end:
+        match["clock_in"] = {}
+        if start:
+            match["clock_in"]["$gte"] = start
+        if end:
+            match["clock_in"]["$lt"] = end
+    late_or_early = {"$or": ["$is_late", "$is_early_leave"]}
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "user_id": 1,
+            "local_date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$clock_in", "timezone": "Asia/Taipei"}},
+            "attendance_id": "$_id",
+            "clock_in": 1,
+            "clock_out": 1,
+            "worked_minutes": WORK_MINUTES_EXPR,
+            "is_late": {"$toBool": {"$ifNull": ["$is_late", False]}},
+            "is_early_leave": {"$toBool": {"$ifNull": ["$is_early_leave", False]}},
+            "late_or_early": late_or_early,
+            "device_id": 1,
+        }},
+        {"$set": {
+            # 超過480分鐘（8小時）才算加班，並排除早退/遲到
+            "overtime_minutes": {"$cond": [
+                "$late_or_early", 0, {"$max": [0, {"$subtract": ["$worked_minutes", 480]}]},
+            ]},
+            "updated_at": "$$NOW",
+        }},
+        {"$unset": "late_or_early"},
+        {"$merge": {
+            "into": "attendance_daily",
+            "on": ["user_id", "local_date"],
+            "whenMatched": "merge",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+async def backfill_daily(start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """由原始打卡資料回填 attendance_daily，整段在資料庫端以 $merge 完成"""
+    async for _ in await attendances.aggregate(backfill_pipeline(start, end)):
+        pass
+
+async def get_daily_summary(start_date: str, end_date: str, user_id: Optional[ObjectId] = None) -> list:
+    """依使用者加總 [start_date, end_date]（台灣日期，含頭尾）的每日彙總"""
+    match = {"local_date": {"$gte": start_date, "$lte": end_date}}
+    if user_id is not None:
+        match["user_id"] = user_id
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$user_id",
+            "days": {"$sum": 1},
+            "worked_minutes": {"$sum": "$worked_minutes"},
+            "overtime_minutes": {"$sum": "$overtime_minutes"},
+            "late_days": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+            "early_leave_days": {"$sum": {"$cond": ["$is_early_leave", 1, 0]}},
+        }},
+    ]
+    return [
+        {
+            "user_id": str(row["_id"]),
+            "days": row["days"],
+            "worked_minutes": row["worked_minutes"],
+            "overtime_minutes": row["overtime_minutes"],
+            "late_days": row["late_days"],
+            "early_leave_days": row["early_leave_days"],
+        }
+        async for row in await daily_reads.aggregate(pipeline)
+    ]
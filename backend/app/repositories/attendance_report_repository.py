@@ -1,13 +1,74 @@
-from app.db import db
+from app.db import async_db
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone
-from app.utils.time_utils import to_taipei
-from app.repositories import attendance_repository
+from typing import Optional
+from app.utils.time_utils import month_range_in_utc
+from app.repositories import user_repository
 
-reports = db["attendance_reports"]
+reports = async_db["attendance_reports"]
+# 月統計的結果會寫回報表並與打卡的累加合併，必須讀 primary；
+# secondary 的延遲會讓重算覆寫掉剛累加的數字
+attendances = async_db["attendances"]
 
-def get_report_by_user(user_id: str):
-    result = reports.find({"user_id": ObjectId(user_id)})
+PROGRESS_EVERY = 500
+
+# 對應 AttendanceReportOut
+REPORT_PROJECTION = {
+    "user_id": 1,
+    "month": 1,
+    "total_work_time": 1,
+    "total_overtime": 1,
+    "total_absences": 1,
+    "created_at": 1,
+}
+
+INDEXES = {
+    "attendance_reports": [
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_id_month", unique=True),
+    ],
+}
+
+# 以分鐘計並捨去小數，與逐筆 int(duration) 的結果一致
+WORK_MINUTES_EXPR = {"$toInt": {"$trunc": {"$divide": [{"$subtract": ["$clock_out", "$clock_in"]}, 60000]}}}
+HAS_CLOCK_OUT_EXPR = {"$ne": [{"$ifNull": ["$clock_out", None]}, None]}
+
+def work_minutes(clock_in: datetime, clock_out: datetime) -> int:
+    return int((clock_out - clock_in).total_seconds() / 60)
+
+def overtime_minutes(minutes: int, late_or_early: bool) -> int:
+    # 超過480分鐘（8小時）才算加班，並排除早退/遲到
+    return 0 if late_or_early else max(0, minutes - 480)
+
+def monthly_totals_pipeline(start: datetime, end: datetime, user_ids: list):
+    """在資料庫端依使用者加總 [start, end) 內的工時、加班與缺勤"""
+    minutes = WORK_MINUTES_EXPR
+    has_clock_out = HAS_CLOCK_OUT_EXPR
+    return [
+        {"$match": {"user_id": {"$in": user_ids}, "clock_in": {"$gte": start, "$lt": end}}},
+        {"$project": {
+            "user_id": 1,
+            "has_clock_out": has_clock_out,
+            "minutes": {"$cond": [has_clock_out, minutes, 0]},
+            # 超過480分鐘（8小時）才算加班，並排除早退/遲到
+            "late_or_early": {"$or": ["$is_late", "$is_early_leave"]},
+        }},
+        {"$group": {
+            "_id": "$user_id",
+            "total_work_time": {"$sum": "$minutes"},
+            "total_overtime": {"$sum": {"$cond": [
+                {"$or": ["$late_or_early", {"$not": ["$has_clock_out"]}]},
+                0,
+                {"$max": [0, {"$subtract": ["$minutes", 480]}]},
+            ]}},
+            "total_absences": {"$sum": {"$cond": ["$has_clock_out", 0, 1]}},
+        }},
+    ]
+
+async def get_report_by_user(user_id: str):
+    # 報表隨打卡即時累加，這裡只需一次索引查詢
+    result = reports.find({"user_id": ObjectId(user_id)}, REPORT_PROJECTION).sort("month", -1)
     return [
         {
             "_id": str(r["_id"]),
@@ -18,51 +79,154 @@ def get_report_by_user(user_id: str):
             "total_absences": r["total_absences"],
             "created_at": r["created_at"],
         }
-        for r in result
+        async for r in result
     ]
 
-def generate_report(user_id: str, month: str):
+async def generate_report(user_id: str, month: str):
     try:
         user_obj_id = ObjectId(user_id)
     except Exception as e:
         raise ValueError(f"無效的 user_id 格式: {e}")
 
-    exists = reports.find_one({"user_id": user_obj_id, "month": month})
+    exists = await reports.find_one({"user_id": user_obj_id, "month": month}, {"_id": 1})
     if exists:
         return str(exists["_id"])
 
-    attendances = attendance_repository.get_attendance_by_user(user_obj_id)
-    total_work = 0
-    total_ot = 0
-    total_absent = 0
-
-    for record in attendances:
-        taipei_clock_in = to_taipei(record["clock_in"])
-        if taipei_clock_in.strftime("%Y-%m") != month:
-            continue
-
-        if not record.get("clock_out"):
-            total_absent += 1
-            continue
-
-        taipei_clock_out = to_taipei(record["clock_out"])
-        duration = (taipei_clock_out - taipei_clock_in).total_seconds() / 60
-        total_work += int(duration)
+    try:
+        month_range_in_utc(month)
+    except ValueError as e:
+        raise ValueError(f"無效的 month 格式: {e}")
 
-        # 超過480分鐘（8小時）才算加班，並排除早退/遲到
-        if record.get("is_late") or record.get("is_early_leave"):
-            total_ot += 0
-        else:
-            total_ot += max(0, int(duration) - 480)
+    totals = (await compute_month_totals(month, [user_obj_id])).get(user_obj_id, {})
 
     report = {
         "user_id": user_obj_id,
-        "total_work_time": total_work,
-        "total_overtime": total_ot,
-        "total_absences": total_absent,
+        "total_work_time": totals.get("total_work_time", 0),
+        "total_overtime": totals.get("total_overtime", 0),
+        "total_absences": totals.get("total_absences", 0),
         "month": month,
         "created_at": datetime.now(timezone.utc),
     }
 
-    result = reports.insert_one(report)
+    result = await reports.insert_one(report)
     return str(result.inserted_id)
+
+async def compute_month_totals(month: str, user_ids: list, on_row=None) -> dict:
+    """
+    以單次聚合計算多位使用者的月報數字，回傳 {user_id: totals}。
+    缺勤數來自尚未下班打卡的紀錄，attendance_daily 沒有這些資料；且重算用來修正報表，
+    不能依賴可能尚未回填的 attendance_daily，因此以原始打卡為準。
+    """
+    start, end = month_range_in_utc(month)
+    totals = {}
+    async for row in await attendances.aggregate(monthly_totals_pipeline(start, end, user_ids)):
+        totals[row["_id"]] = row
+        if on_row:
+            await on_row(len(totals))
+    return totals
+
+async def _inc_report(user_id: ObjectId, month: str, inc: dict):
+    now = datetime.now(timezone.utc)
+    query = {"user_id": user_id, "month": month}
+    update = {"$inc": inc, "$set": {"updated_at": now}, "$setOnInsert": {"created_at": now}}
+    try:
+        await reports.update_one(query, update, upsert=True)
+    except DuplicateKeyError:
+        # 同時有另一筆 upsert 先建立了報表，改為直接累加
+        await reports.update_one(query, update)
+
+async def apply_clock_in(user_id: ObjectId, month: str):
+    # 尚未下班打卡的紀錄計為缺勤，下班打卡時再扣回
+    await _inc_report(user_id, month, {"total_absences": 1, "total_work_time": 0, "total_overtime": 0})
+
+async def apply_clock_out(user_id: ObjectId, month: str, minutes: int, overtime: int):
+    await _inc_report(user_id, month, {"total_absences": -1, "total_work_time": minutes, "total_overtime": overtime})
+
+async def apply_punch_batch(user_id: ObjectId, month: str, clock_ins: int, clock_outs: int, minutes: int, overtime: int):
+    """批次補登：同一人同月份的上下班打卡合併成一次累加"""
+    await _inc_report(user_id, month, {"total_absences": clock_ins - clock_outs, "total_work_time": minutes, "total_overtime": overtime})
+
+async def resolve_user_ids(user_ids: Optional[list] = None) -> list:
+    user_filter = {"_id": {"$in": user_ids}} if user_ids is not None else {}
+    return [u["_id"] async for u in user_repository.users.find(user_filter, {"_id": 1})]
+
+async def reconcile_month(month: str, user_ids: Optional[list] = None) -> int:
+    """由原始打卡資料重建整月報表（覆寫既有數字），回傳寫入筆數"""
+    user_ids = await resolve_user_ids(user_ids)
+    totals = await compute_month_totals(month, user_ids)
+
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "month": month},
+            {
+                "$set": {
+                    "total_work_time": totals.get(user_id, {}).get("total_work_time", 0),
+                    "total_overtime": totals.get(user_id, {}).get("total_overtime", 0),
+                    "total_absences": totals.get(user_id, {}).get("total_absences", 0),
+                    "updated_at": now,
+                },
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        for user_id in user_ids
+    ]
+    if not operations:
+        return 0
+    result = await reports.bulk_write(operations, ordered=False)
+    return result.upserted_count + result.modified_count
+
+async def generate_month_reports(month: str, user_ids: Optional[list] = None, on_progress=None) -> dict:
+    """
+    一次聚合算出整月所有使用者的報表，並以單次 bulk_write 寫入；
+    已存在的 (user_id, month) 報表不重算，因此失敗後重試是安全的。
+    on_progress(processed, total) 每處理 PROGRESS_EVERY 位使用者呼叫一次。
+    """
+    month_range_in_utc(month)
+    user_ids = await resolve_user_ids(user_ids)
+
+    # 與 generate_report 相同：已存在的 (user_id, month) 報表不重算
+    existing = {
+        r["user_id"] async for r in reports.find(
+            {"month": month, "user_id": {"$in": user_ids}}, {"user_id": 1}
+        )
+    }
+    pending_ids = [u for u in user_ids if u not in existing]
+    if on_progress:
+        await on_progress(0, len(pending_ids))
+
+    async def report_progress(processed: int):
+        if on_progress and processed % PROGRESS_EVERY == 0:
+            await on_progress(processed, len(pending_ids))
+
+    totals = await compute_month_totals(month, pending_ids, report_progress)
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    for user_id in pending_ids:
+        row = totals.get(user_id, {})
+        operations.append(UpdateOne(
+            {"user_id": user_id, "month": month},
+            {"$setOnInsert": {
+                "user_id": user_id,
+                "total_work_time": row.get("total_work_time", 0),
+                "total_overtime": row.get("total_overtime", 0),
+                "total_absences": row.get("total_absences", 0),
+                "month": month,
+                "created_at": now,
+                "updated_at": now,
+            }},
+            upsert=True,
+        ))
+
+    created = 0
+    if operations:
+        result = await reports.bulk_write(operations, ordered=False)
+        created = result.upserted_count
+
+    return {
+        "total": len(pending_ids),
+        "created": created,
+        "skipped": len(existing) + len(pending_ids) - created,
+    }
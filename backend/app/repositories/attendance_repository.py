@@ -1,71 +1,130 @@
-import pytz
-from app.db import db
+import asyncio
+import base64
+import json
+from app.config import STATS_CACHE_TTL_SECONDS
+from app.db import analytics_db, async_db
 from datetime import datetime, time, timezone, timedelta
-from app.utils.time_utils import to_taipei, now_taipei, today_range_in_utc
+from app.utils.time_utils import to_taipei, to_taipei_many, now_taipei, today_range_in_utc
+from app.repositories import attendance_daily_repository, attendance_report_repository, attendance_setting_repository
+from app.utils.cache import TTLCache
+from typing import Optional
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-attendances = db["attendances"]
-settings = db["attendance_settings"]
+attendances = async_db["attendances"]
+# 匯出與統計等大量讀取，可導向 secondary，不與打卡寫入搶 primary
+attendance_reads = analytics_db["attendances"]
 
-def parse_time_string(value: str) -> time:
-    try:
-        return datetime.strptime(value, "%H:%M:%S").time()
-    except ValueError:
-        return datetime.strptime(value, "%H:%M").time()
+INDEXES = {
+    # clock_in / clock_out / get_attendance_by_user / get_attendance_page
+    "attendances": [
+        # 每人每個台灣日期只能有一筆；舊資料沒有 local_date，不納入唯一限制
+        IndexModel(
+            [("user_id", ASCENDING), ("local_date", ASCENDING)],
+            name="user_id_local_date",
+            unique=True,
+            partialFilterExpression={"local_date": {"$exists": True}},
+        ),
+        IndexModel([("user_id", ASCENDING), ("clock_in", DESCENDING), ("_id", DESCENDING)], name="user_id_clock_in_id"),
+        IndexModel([("clock_in", DESCENDING), ("_id", DESCENDING)], name="clock_in_id"),
+    ],
+}
 
-def get_all_attendance():
-    records = attendances.find().sort("clock_in", -1)
-    result = []
+# 對應 AttendanceOut（_id 預設會回傳）
+ATTENDANCE_PROJECTION = {
+    "user_id": 1,
+    "clock_in": 1,
+    "clock_out": 1,
+    "is_late": 1,
+    "is_early_leave": 1,
+    "device_id": 1,
+    "location": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+ATTENDANCE_DATETIME_FIELDS = ("clock_in", "clock_out")
+
+def convert_attendance(record):
+    record["_id"] = str(record["_id"])
+    record["user_id"] = str(record["user_id"])
+
+    # 轉換為台灣時間
+    to_taipei_many((record,), ATTENDANCE_DATETIME_FIELDS, isoformat=True)
+    return record
+
+def convert_attendance_many(records: list) -> list:
+    """整批轉換，時區轉換集中在 to_taipei_many 一次處理"""
     for record in records:
         record["_id"] = str(record["_id"])
         record["user_id"] = str(record["user_id"])
-        
-        # 轉換為台灣時間
-        if record.get("clock_in"):
-            record["clock_in"] = to_taipei(record["clock_in"]).isoformat()
-        if record.get("clock_out"):
-            record["clock_out"] = to_taipei(record["clock_out"]).isoformat()
-            
-        result.append(record)
-    return result
+    return to_taipei_many(records, ATTENDANCE_DATETIME_FIELDS, isoformat=True)
 
-def get_today_attendance(user_id: str):
-    start, end = today_range_in_utc()
-    return attendances.find_one({
-        "user_id": ObjectId(user_id),
-        "clock_in": {
-            "$gte": start,
-            "$lte": end
-        }
-    })
-
-def get_setting():
-    setting = settings.find_one()
-    if not setting:
-        # 若找不到設定，使用預設值（for testing）
-        return {
-            "work_start_time": "09:00",
-            "work_end_time": "18:00",
-            "grace_period": 10
-        }
-    return setting
-
-def clock_in(user_id: str, device_id=None, location=None):
-    if get_today_attendance(user_id):
-        return None  # 已打過卡
+async def iter_attendance(query: dict, batch_size: int = 1000):
+    """逐筆串流出勤紀錄（已轉為台灣時間），不在記憶體中累積整份結果"""
+    records = attendance_reads.find(query, ATTENDANCE_PROJECTION).sort([("clock_in", -1), ("_id", -1)]).batch_size(batch_size)
+    async for record in records:
+        yield convert_attendance(record)
+
+def encode_cursor(record) -> str:
+    """以 (clock_in, _id) 組成不透明的分頁游標"""
+    raw = json.dumps({"t": record["clock_in"].isoformat(), "id": str(record["_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw["t"]), ObjectId(raw["id"])
+    except Exception:
+        raise ValueError("無效的分頁游標")
+
+def build_attendance_filter(user_id: Optional[ObjectId] = None, start: Optional[datetime] = None, end: Optional[datetime] = None, device_id: Optional[str] = None):
+    query = {}
+    if user_id is not None:
+        query["user_id"] = user_id
+    if start or end:
+        query["clock_in"] = {}
+        if start:
+            query["clock_in"]["$gte"] = start
+        if end:
+            query["clock_in"]["$lt"] = end
+    if device_id is not None:
+        query["device_id"] = device_id
+    return query
 
+async def get_attendance_page(limit: int, cursor: Optional[str] = None, user_id: Optional[ObjectId] = None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """依 (clock_in, _id) 由新到舊做 keyset 分頁，回傳 (records, next_cursor)"""
+    query = build_attendance_filter(user_id, start, end)
+    if cursor:
+        last_clock_in, last_id = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {"clock_in": {"$lt": last_clock_in}},
+            {"clock_in": last_clock_in, "_id": {"$lt": last_id}},
+        ]}]}
+
+    # 多取一筆判斷是否還有下一頁
+    records = await attendances.find(query, ATTENDANCE_PROJECTION).sort([("clock_in", -1), ("_id", -1)]).limit(limit + 1).to_list(None)
+    next_cursor = encode_cursor(records[limit - 1]) if len(records) > limit else None
+    return convert_attendance_many(records[:limit]), next_cursor
+
+def legacy_day_filter(user_id: ObjectId, start: datetime, end: datetime) -> dict:
+    """
+    尚未回填 local_date 的舊紀錄（python -m app.reports backfill-local-date）不受 (user_id, local_date)
+    唯一索引約束，改以 clock_in 落在台灣日期的 UTC 區間判斷
+    """
+    return {"user_id": user_id, "local_date": {"$exists": False}, "clock_in": {"$gte": start, "$lte": end}}
+
+async def clock_in(user_id: str, device_id=None, location=None):
     now_utc = datetime.now(timezone.utc)
     now_local = to_taipei(now_utc)
 
-    setting = get_setting()
-    work_start = parse_time_string(setting["work_start_time"])
-    grace = setting.get("grace_period", 0)
-
-    work_start_with_grace = (datetime.combine(now_local.date(), work_start) + timedelta(minutes=grace)).time()
-    is_late = now_local.time() > work_start_with_grace
+    setting = await attendance_setting_repository.get_punch_setting()
+    is_late = now_local.time() > setting["late_after"]
 
     data = {
         "user_id": ObjectId(user_id),
+        "local_date": now_local.date().isoformat(),
         "clock_in": now_utc,
         "clock_out": None,
         "is_late": is_late,
@@ -76,40 +135,204 @@ def clock_in(user_id: str, device_id=None, location=None):
         "updated_at": now_utc
     }
 
-    result = attendances.insert_one(data)
-    return str(result.inserted_id)
+    # 今天已有舊格式的紀錄（走 user_id + clock_in 索引）
+    if await attendances.find_one(legacy_day_filter(data["user_id"], *today_range_in_utc()), {"_id": 1}):
+        return None
 
-def clock_out(user_id: str):
-    record = get_today_attendance(user_id)
-    if not record or record.get("clock_out"):
-        return False  # 沒打卡或已打下班卡
+    # (user_id, local_date) 為唯一鍵，單次 upsert 同時完成重複檢查與寫入
+    try:
+        result = await attendances.update_one(
+            {"user_id": data["user_id"], "local_date": data["local_date"]},
+            {"$setOnInsert": data},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return None  # 同時送出的另一筆已寫入
+    if result.upserted_id is None:
+        return None  # 已打過卡
+
+    await attendance_report_repository.apply_clock_in(data["user_id"], data["local_date"][:7])
+    return str(result.upserted_id)
 
+async def clock_out(user_id: str):
     now_utc = datetime.now(timezone.utc)
     now_local = to_taipei(now_utc)
 
-    setting = get_setting()
-    work_end = parse_time_string(setting["work_end_time"])
-    is_early = now_local.time() < work_end
-
-    attendances.update_one(
-        {"_id": record["_id"]},
-        {"$set": {
-            "clock_out": now_utc,
-            "is_early_leave": is_early,
-            "updated_at": now_utc
-        }}
+    setting = await attendance_setting_repository.get_punch_setting()
+    is_early = now_local.time() < setting["work_end_time"]
+
+    # clock_out 為 null 才更新，避免重複下班打卡
+    today = now_local.date().isoformat()
+    update = {"$set": {
+        "clock_out": now_utc,
+        "is_early_leave": is_early,
+        "updated_at": now_utc
+    }}
+    projection = {"clock_in": 1, "is_late": 1, "local_date": 1, "device_id": 1}
+    record = await attendances.find_one_and_update(
+        {
+            "user_id": ObjectId(user_id),
+            "local_date": today,
+            "clock_out": None
+        },
+        update,
+        projection=projection
+    )
+    if record is None:
+        # 尚未回填 local_date 的舊紀錄，改以 clock_in 的當日區間查詢
+        record = await attendances.find_one_and_update(
+            {**legacy_day_filter(ObjectId(user_id), *today_range_in_utc()), "clock_out": None},
+            update,
+            projection=projection
+        )
+    if record is None:
+        return False  # 沒打卡或已打下班卡
+    record.setdefault("local_date", today)
+
+    # 同步累加當月報表並寫入當日彙總
+    user_obj_id = ObjectId(user_id)
+    minutes = attendance_report_repository.work_minutes(record["clock_in"].replace(tzinfo=timezone.utc), now_utc)
+    overtime = attendance_report_repository.overtime_minutes(minutes, record.get("is_late") or is_early)
+    record.update(
+        clock_out=now_utc,
+        is_early_leave=is_early,
+        worked_minutes=minutes,
+        overtime_minutes=overtime,
+    )
+    await asyncio.gather(
+        attendance_report_repository.apply_clock_out(user_obj_id, record["local_date"][:7], minutes, overtime),
+        attendance_daily_repository.upsert_daily(user_obj_id, record["local_date"], record),
     )
     return True
 
-def get_attendance_by_user(user_id: ObjectId):
+async def backfill_local_date(batch_size: int = 1000) -> tuple:
+    """
+    為沒有 local_date 的舊紀錄補上台灣日期，回傳 (更新筆數, 衝突筆數)。
+    同一人同一天已有其他紀錄時違反唯一索引，該筆保持原狀並計入衝突，需人工處理。
+    """
+    updated = conflicts = 0
+    operations = []
+
+    async def flush():
+        nonlocal updated, conflicts
+        try:
+            result = await attendances.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        except BulkWriteError as e:
+            updated += e.details["nModified"]
+            conflicts += len(e.details["writeErrors"])
+        operations.clear()
+
+    async for record in attendances.find({"local_date": {"$exists": False}}, {"clock_in": 1}):
+        local_date = to_taipei(record["clock_in"]).date().isoformat()
+        operations.append(UpdateOne(
+            {"_id": record["_id"], "local_date": {"$exists": False}},
+            {"$set": {"local_date": local_date}},
+        ))
+        if len(operations) >= batch_size:
+            await flush()
+    if operations:
+        await flush()
+    return updated, conflicts
+
+async def get_attendance_by_user(user_id: ObjectId):
     records = attendances.find(
         {"user_id": user_id},
+        ATTENDANCE_PROJECTION,
         sort=[("clock_in", -1)]
     )
 
     result = []
-    for record in records:
+    async for record in records:
         record["_id"] = str(record["_id"])
         record["user_id"] = str(record["user_id"])
         result.append(record)
     return result
+
+stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+# 快取過期瞬間的多個請求共用同一次聚合
+_stats_refresh = {"task": None}
+
+def today_stats_pipeline(start: datetime, end: datetime) -> list:
+    """
+    以單一聚合計算今日儀表板數字：
+    從今日打卡出發，$unionWith 帶入待審/今日請假、待審加班與員工，再以 $facet 分別計數。
+    出勤人數與遲到必須包含尚未下班打卡的紀錄，attendance_daily 只有已下班的資料，
+    因此直接讀今日打卡（clock_in 區間查詢，只掃描一天）。
+    """
+    return [
+        {"$match": {"clock_in": {"$gte": start, "$lte": end}}},
+        {"$project": {
+            "_id": 0,
+            "kind": {"$literal": "attendance"},
+            "is_late": 1,
+            "is_early_leave": 1,
+            "worked_minutes": {"$cond": [attendance_report_repository.HAS_CLOCK_OUT_EXPR, attendance_report_repository.WORK_MINUTES_EXPR, None]},
+        }},
+        {"$unionWith": {"coll": "leaves", "pipeline": [
+            {"$match": {"$or": [
+                {"status": "待批准"},
+                {"status": "已批准", "start_date": {"$lte": end}, "end_date": {"$gte": start}},
+            ]}},
+            {"$project": {"_id": 0, "kind": {"$cond": [{"$eq": ["$status", "待批准"]}, "pending_leave", "on_leave"]}}},
+        ]}},
+        {"$unionWith": {"coll": "overtimes", "pipeline": [
+            {"$match": {"status": "待批准"}},
+            {"$project": {"_id": 0, "kind": {"$literal": "pending_overtime"}}},
+        ]}},
+        {"$unionWith": {"coll": "users", "pipeline": [{"$project": {"_id": 0, "kind": {"$literal": "employee"}}}]}},
+        {"$facet": {
+            "attendance": [
+                {"$match": {"kind": "attendance"}},
+                {"$group": {
+                    "_id": None,
+                    "present": {"$sum": 1},
+                    "late": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+                    "early_leave": {"$sum": {"$cond": ["$is_early_leave", 1, 0]}},
+                    "average_worked_minutes": {"$avg": "$worked_minutes"},
+                }},
+            ],
+            "others": [
+                {"$match": {"kind": {"$ne": "attendance"}}},
+                {"$group": {"_id": "$kind", "count": {"$sum": 1}}},
+            ],
+        }},
+    ]
+
+async def _compute_today_stats() -> dict:
+    start, end = today_range_in_utc()
+    result = await (await attendance_reads.aggregate(today_stats_pipeline(start, end))).to_list(None)
+    attendance = (result[0]["attendance"] or [{}])[0] if result else {}
+    others = {row["_id"]: row["count"] for row in result[0]["others"]} if result else {}
+
+    employees = others.get("employee", 0)
+    present = attendance.get("present", 0)
+    average_minutes = attendance.get("average_worked_minutes") or 0
+    stats = {
+        "date": now_taipei().date().isoformat(),
+        "total_employees": employees,
+        "present_today": present,
+        "late_today": attendance.get("late", 0),
+        "early_leave_today": attendance.get("early_leave", 0),
+        "not_clocked_in_today": max(employees - present, 0),
+        "leave_today": others.get("on_leave", 0),
+        "pending_leaves": others.get("pending_leave", 0),
+        "pending_overtimes": others.get("pending_overtime", 0),
+        "attendance_rate": round(present / employees * 100, 1) if employees else 0,
+        "average_working_hours": round(average_minutes / 60, 2),
+        "generated_at": datetime.now(timezone.utc),
+    }
+    stats_cache.set("today", stats)
+    return stats
+
+async def get_today_stats() -> dict:
+    """今日出勤統計，快取 STATS_CACHE_TTL_SECONDS 秒"""
+    stats = stats_cache.get("today")
+    if stats is not None:
+        return stats
+    task = _stats_refresh["task"]
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_compute_today_stats())
+        _stats_refresh["task"] = task
+    # shield：單一請求取消時不影響其他等待中的請求
+    return await asyncio.shield(task)
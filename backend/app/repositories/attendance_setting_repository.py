@@ -1,21 +1,89 @@
-from app.db import db
-from datetime import datetime, timezone, time
+from app.db import async_db
+from app.config import ATTENDANCE_SETTING_REFRESH_SECONDS
+from datetime import date, datetime, timezone, time, timedelta
 from bson import ObjectId
+from time import monotonic
 
-collection = db["attendance_settings"]
+collection = async_db["attendance_settings"]
+
+# 若找不到設定，使用預設值（for testing）
+DEFAULT_SETTING = {
+    "work_start_time": "09:00",
+    "work_end_time": "18:00",
+    "grace_period": 10
+}
+
+# 對應 AttendanceSettingOut
+SETTING_PROJECTION = {
+    "work_start_time": 1,
+    "work_end_time": 1,
+    "grace_period": 1,
+    "lunch_break_time": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# build_punch_setting 需要的欄位
+PUNCH_SETTING_PROJECTION = {
+    "version": 1,
+    "work_start_time": 1,
+    "work_end_time": 1,
+    "grace_period": 1,
+}
+
+# 打卡用的已解析設定，只在版本變更時重新載入
+_punch_cache = {"setting": None, "checked_at": 0.0}
 
 def parse_time(t) -> time:
-    return t if isinstance(t, time) else datetime.strptime(t, "%H:%M:%S").time()
+    if isinstance(t, time):
+        return t
+    try:
+        return datetime.strptime(t, "%H:%M:%S").time()
+    except ValueError:
+        return datetime.strptime(t, "%H:%M").time()
 
-def get_setting():
-    setting = collection.find_one()
+async def get_setting():
+    setting = await collection.find_one({}, SETTING_PROJECTION)
     if setting:
         # 轉換字串為 time 物件
         setting["work_start_time"] = parse_time(setting["work_start_time"])
         setting["work_end_time"] = parse_time(setting["work_end_time"])
     return setting
 
-def upsert_setting(data: dict) -> ObjectId:
+def build_punch_setting(setting: dict) -> dict:
+    work_start = parse_time(setting["work_start_time"])
+    grace = setting.get("grace_period", 0)
+    return {
+        "version": setting.get("version", 0),
+        "work_start_time": work_start,
+        "work_end_time": parse_time(setting["work_end_time"]),
+        "grace_period": grace,
+        # 上班時間加上寬限期，超過即為遲到
+        "late_after": (datetime.combine(date.min, work_start) + timedelta(minutes=grace)).time(),
+    }
+
+async def get_punch_setting() -> dict:
+    """打卡用設定：記憶體內保存已解析的 time 物件，定期以 version 確認是否需要重新載入"""
+    cached = _punch_cache["setting"]
+    now = monotonic()
+    if cached is not None and now - _punch_cache["checked_at"] < ATTENDANCE_SETTING_REFRESH_SECONDS:
+        return cached
+
+    if cached is not None:
+        current = await collection.find_one({}, {"version": 1})
+        if current and current.get("version", 0) == cached["version"]:
+            _punch_cache["checked_at"] = now
+            return cached
+
+    setting = await collection.find_one({}, PUNCH_SETTING_PROJECTION)
+    cached = build_punch_setting(setting or DEFAULT_SETTING)
+    _punch_cache.update(setting=cached, checked_at=now)
+    return cached
+
+def invalidate_punch_setting():
+    _punch_cache.update(setting=None, checked_at=0.0)
+
+async def upsert_setting(data: dict) -> ObjectId:
     now = datetime.now(timezone.utc)
     data["updated_at"] = now
 
@@ -25,11 +93,16 @@ def upsert_setting(data: dict) -> ObjectId:
     if isinstance(data["work_end_time"], time):
         data["work_end_time"] = data["work_end_time"].strftime("%H:%M:%S")
 
-    existing = collection.find_one()
+    existing = await collection.find_one()
     if existing:
-        collection.update_one({"_id": existing["_id"]}, {"$set": data})
-        return existing["_id"]
+        # version 遞增讓其他 worker 的打卡設定快取重新載入
+        await collection.update_one({"_id": existing["_id"]}, {"$set": data, "$inc": {"version": 1}})
+        setting_id = existing["_id"]
     else:
         data["created_at"] = now
-        result = collection.insert_one(data)
-        return result.inserted_id
+        data["version"] = 1
+        result = await collection.insert_one(data)
+        setting_id = result.inserted_id
+
+    invalidate_punch_setting()
+    return setting_id
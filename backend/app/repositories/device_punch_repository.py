@@ -0,0 +1,299 @@
+import asyncio
+from app.config import DEVICE_PUNCH_CLOCK_SKEW_SECONDS, DEVICE_PUNCH_MAX_AGE_DAYS, DEVICE_PUNCH_RECEIPT_DAYS
+from app.db import async_db
+from app.repositories import attendance_daily_repository, attendance_report_repository, attendance_repository, attendance_setting_repository
+from app.utils.time_utils import day_range_in_utc, to_taipei
+from collections import defaultdict
+from datetime import date, datetime, timezone, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+
+receipts = async_db["punch_receipts"]
+attendances = async_db["attendances"]
+users = async_db["users"]
+
+INDEXES = {
+    "punch_receipts": [
+        # 同一裝置的冪等鍵只處理一次
+        IndexModel([("device_id", ASCENDING), ("idempotency_key", ASCENDING)], name="device_id_idempotency_key", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+ACCEPTED = "accepted"
+
+def _result(punch: dict, status: str, attendance_id=None, replayed: bool = False) -> dict:
+    return {
+        "idempotency_key": punch["idempotency_key"],
+        "status": status,
+        "attendance_id": str(attendance_id) if attendance_id else None,
+        "replayed": replayed,
+    }
+
+def _normalize(punch: dict, now: datetime):
+    """檢查時間與使用者 ID，回傳 (錯誤狀態, UTC 時間, user ObjectId)"""
+    ts = punch["timestamp"]
+    ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+    if ts > now + timedelta(seconds=DEVICE_PUNCH_CLOCK_SKEW_SECONDS):
+        return "future_timestamp", None, None
+    if ts < now - timedelta(days=DEVICE_PUNCH_MAX_AGE_DAYS):
+        return "too_old", None, None
+    try:
+        return None, ts, ObjectId(punch["user_id"])
+    except (InvalidId, TypeError):
+        return "unknown_user", None, None
+
+def _punch_pipeline(device: dict, group: dict, setting: dict, now: datetime) -> list:
+    """
+    以 pipeline update 合併同一人同一天的補登：只補上尚未存在的欄位，
+    不會覆蓋期間內由線上打卡寫入的 clock_in / clock_out。
+    """
+    fields = {"updated_at": now}
+    clock_in, clock_out = group.get("clock_in"), group.get("clock_out")
+    if clock_in:
+        ts = clock_in["ts"]
+        fields.update({
+            "clock_in": {"$ifNull": ["$clock_in", ts]},
+            "is_late": {"$ifNull": ["$is_late", to_taipei(ts).time() > setting["late_after"]]},
+            "is_early_leave": {"$ifNull": ["$is_early_leave", False]},
+            # 字串以 $literal 包住，避免被當成欄位路徑
+            "device_id": {"$ifNull": ["$device_id", {"$literal": group["device_name"]}]},
+            "location": {"$ifNull": ["$location", {"$literal": clock_in["punch"].get("location") or device.get("location")}]},
+            "created_at": {"$ifNull": ["$created_at", now]},
+            "clock_out": {"$ifNull": ["$clock_out", None]},
+        })
+    if clock_out:
+        ts = clock_out["ts"]
+        has_clock_out = {"$ne": [{"$ifNull": ["$clock_out", None]}, None]}
+        fields.update({
+            "clock_out": {"$ifNull": ["$clock_out", ts]},
+            "is_early_leave": {"$cond": [has_clock_out, "$is_early_leave", to_taipei(ts).time() < setting["work_end_time"]]},
+        })
+    return [{"$set": fields}]
+
+def _same_time(stored, ts: datetime) -> bool:
+    # MongoDB 的時間只保存到毫秒
+    return stored is not None and abs(stored.replace(tzinfo=timezone.utc) - ts) < timedelta(milliseconds=1)
+
+async def _applied_ops(op_groups: list, candidates: set) -> set:
+    """bulk_write 只回傳總數，有操作沒比對到時讀回紀錄，確認哪些補登實際寫入"""
+    keys = [op_groups[i][0] for i in candidates]
+    records = {}
+    async for record in attendances.find(
+        {"$or": [{"user_id": user_id, "local_date": local_date} for user_id, local_date in keys]},
+        {"user_id": 1, "local_date": 1, "clock_in": 1, "clock_out": 1},
+    ):
+        records[(record["user_id"], record["local_date"])] = record
+    applied = set()
+    for i in candidates:
+        group_key, group = op_groups[i]
+        record = records.get(group_key, {})
+        if all(_same_time(record.get(kind), group[kind]["ts"]) for kind in ("clock_in", "clock_out") if group.get(kind)):
+            applied.add(i)
+    return applied
+
+async def ingest_punches(device: dict, punches: list) -> list:
+    """
+    裝置離線補登：依冪等鍵略過已處理的打卡，以快取的打卡設定計算遲到/早退，
+    全部以一次 unordered bulk_write 寫入，回傳每一筆的處理結果（順序與輸入相同）。
+    """
+    now = datetime.now(timezone.utc)
+    device_obj_id = device["_id"]
+    device_name = device.get("device_id") or str(device_obj_id)
+    results = [None] * len(punches)
+
+    # 1. 冪等鍵：已處理過的直接回傳當時的結果
+    keys = [p["idempotency_key"] for p in punches]
+    previous = {
+        r["idempotency_key"]: r
+        async for r in receipts.find({"device_id": device_obj_id, "idempotency_key": {"$in": keys}}, {"_id": 0})
+    }
+    seen_keys = set()
+    pending = []
+    for i, punch in enumerate(punches):
+        key = punch["idempotency_key"]
+        if key in previous:
+            stored = previous[key]
+            results[i] = _result(punch, stored["status"], stored.get("attendance_id"), replayed=True)
+        elif key in seen_keys:
+            results[i] = _result(punch, "duplicate_in_batch")
+        else:
+            seen_keys.add(key)
+            pending.append(i)
+
+    # 2. 時間與使用者檢查
+    setting = await attendance_setting_repository.get_punch_setting()
+    normalized = {}
+    for i in pending:
+        error, ts, user_id = _normalize(punches[i], now)
+        if error:
+            results[i] = _result(punches[i], error)
+        else:
+            normalized[i] = (ts, user_id)
+    known_users = {
+        u["_id"] async for u in users.find({"_id": {"$in": list({uid for _, uid in normalized.values()})}}, {"_id": 1})
+    }
+
+    # 3. 依 (使用者, 台灣日期) 分組：同組取最早的上班、最晚的下班
+    groups = {}
+    for i, (ts, user_id) in normalized.items():
+        if user_id not in known_users:
+            results[i] = _result(punches[i], "unknown_user")
+            continue
+        local_date = to_taipei(ts).date().isoformat()
+        group = groups.setdefault((user_id, local_date), {"device_name": device_name})
+        kind = punches[i]["type"]
+        current = group.get(kind)
+        entry = {"index": i, "ts": ts, "punch": punches[i]}
+        better = current is None or (ts < current["ts"] if kind == "clock_in" else ts > current["ts"])
+        if better:
+            if current is not None:
+                results[current["index"]] = _result(punches[current["index"]], "superseded")
+            group[kind] = entry
+        else:
+            results[i] = _result(punches[i], "superseded")
+
+    # 4. 讀取既有紀錄判斷每一筆的結果，再組成單次 bulk_write
+    existing = {}
+    if groups:
+        async for record in attendances.find(
+            {"user_id": {"$in": list({uid for uid, _ in groups})}, "local_date": {"$in": list({d for _, d in groups})}},
+            {"user_id": 1, "local_date": 1, "clock_in": 1, "clock_out": 1, "is_late": 1},
+        ):
+            existing[(record["user_id"], record["local_date"])] = record
+        # 尚未回填 local_date 的舊紀錄以 clock_in 所在的台灣日期對應，更新原紀錄而不是另建一筆
+        legacy_keys = [key for key in groups if key not in existing]
+        if legacy_keys:
+            query = {"$or": [
+                attendance_repository.legacy_day_filter(user_id, *day_range_in_utc(date.fromisoformat(local_date)))
+                for user_id, local_date in legacy_keys
+            ]}
+            async for record in attendances.find(query, {"user_id": 1, "clock_in": 1, "clock_out": 1, "is_late": 1}):
+                key = (record["user_id"], to_taipei(record["clock_in"]).date().isoformat())
+                record["legacy"] = True
+                existing.setdefault(key, record)
+
+    operations, op_groups = [], []
+    for group_key, group in groups.items():
+        record = existing.get(group_key)
+        clock_in, clock_out = group.get("clock_in"), group.get("clock_out")
+        if clock_in and record and record.get("clock_in"):
+            results[clock_in["index"]] = _result(clock_in["punch"], "already_clocked_in", record["_id"])
+            group.pop("clock_in")
+            clock_in = None
+        if clock_out:
+            started = clock_in["ts"] if clock_in else (record or {}).get("clock_in")
+            if started is None:
+                status = "no_clock_in"
+            elif record and record.get("clock_out"):
+                status = "already_clocked_out"
+            elif clock_out["ts"] < started.replace(tzinfo=timezone.utc):
+                status = "clock_out_before_clock_in"
+            else:
+                status = None
+            if status:
+                results[clock_out["index"]] = _result(clock_out["punch"], status, record and record["_id"])
+                group.pop("clock_out")
+                clock_out = None
+        if not clock_in and not clock_out:
+            continue
+        user_id, local_date = group_key
+        group["record"] = record
+        update = _punch_pipeline(device, group, setting, now)
+        # 只比對尚未打卡的紀錄：讀取後被線上打卡寫入的紀錄不會再被更新，也不會重複累加報表
+        unset = {kind: None for kind in ("clock_in", "clock_out") if group.get(kind)}
+        if record and record.get("legacy"):
+            # 順便補上 local_date，之後即受唯一索引保護
+            update[0]["$set"]["local_date"] = local_date
+            operations.append(UpdateOne({"_id": record["_id"], "local_date": {"$exists": False}, **unset}, update))
+        else:
+            operations.append(UpdateOne(
+                {"user_id": user_id, "local_date": local_date, **unset},
+                update,
+                upsert=clock_in is not None,
+            ))
+        op_groups.append((group_key, group))
+
+    failed = set()
+    upserted = {}
+    matched = 0
+    if operations:
+        try:
+            result = await attendances.bulk_write(operations, ordered=False)
+            upserted, matched = result.upserted_ids, result.matched_count
+        except BulkWriteError as e:
+            # 與線上打卡同時建立同一天的紀錄時會撞唯一索引，其餘操作照常完成
+            failed = {error["index"] for error in e.details["writeErrors"]}
+            upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+            matched = e.details.get("nMatched", 0)
+    applied = set(range(len(operations))) - failed
+    if matched + len(upserted) < len(applied):
+        applied = set(upserted) | await _applied_ops(op_groups, applied - set(upserted))
+
+    # 5. 記錄結果，只為實際寫入的紀錄累加月報與當日彙總
+    report_incs = defaultdict(lambda: [0, 0, 0, 0])
+    daily_updates = []
+    for op_index, (group_key, group) in enumerate(op_groups):
+        user_id, local_date = group_key
+        clock_in, clock_out, record = group.get("clock_in"), group.get("clock_out"), group["record"]
+        attendance_id = upserted.get(op_index) or (record and record["_id"])
+        # 沒寫入的（撞唯一索引或紀錄已被改過）回報 conflict，裝置重送時依最新紀錄判斷
+        status = ACCEPTED if op_index in applied else "conflict"
+        for entry in (clock_in, clock_out):
+            if entry:
+                results[entry["index"]] = _result(entry["punch"], status, attendance_id)
+        if status != ACCEPTED:
+            continue
+
+        inc = report_incs[(user_id, local_date[:7])]
+        if clock_in:
+            inc[0] += 1
+        if clock_out:
+            started = clock_in["ts"] if clock_in else record["clock_in"].replace(tzinfo=timezone.utc)
+            is_late = (to_taipei(started).time() > setting["late_after"]) if clock_in else record.get("is_late")
+            is_early = to_taipei(clock_out["ts"]).time() < setting["work_end_time"]
+            minutes = attendance_report_repository.work_minutes(started, clock_out["ts"])
+            overtime = attendance_report_repository.overtime_minutes(minutes, is_late or is_early)
+            inc[1] += 1
+            inc[2] += minutes
+            inc[3] += overtime
+            daily_updates.append(attendance_daily_repository.upsert_daily(user_id, local_date, {
+                "_id": attendance_id,
+                "clock_in": started,
+                "clock_out": clock_out["ts"],
+                "worked_minutes": minutes,
+                "overtime_minutes": overtime,
+                "is_late": is_late,
+                "is_early_leave": is_early,
+                "device_id": device_name,
+            }))
+
+    await asyncio.gather(
+        *(
+            attendance_report_repository.apply_punch_batch(user_id, month, *inc)
+            for (user_id, month), inc in report_incs.items()
+        ),
+        *daily_updates,
+    )
+
+    # 保留處理結果，裝置重送同一個冪等鍵時直接回傳（衝突可重試，不保存）
+    expires_at = now + timedelta(days=DEVICE_PUNCH_RECEIPT_DAYS)
+    new_receipts = [
+        {
+            "device_id": device_obj_id,
+            "idempotency_key": r["idempotency_key"],
+            "status": r["status"],
+            "attendance_id": r["attendance_id"],
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        for r in results if not r["replayed"] and r["status"] not in ("conflict", "duplicate_in_batch")
+    ]
+    if new_receipts:
+        try:
+            await receipts.insert_many(new_receipts, ordered=False)
+        except BulkWriteError:
+            pass  # 同一批同時重送，先寫入的結果為準
+    return results
@@ -1,12 +1,34 @@
-from app.db import db
+import hmac
+import secrets
+from app.db import async_db
+from app.utils.security import hash_token
 from datetime import datetime, timezone
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, IndexModel
 
-devices = db["clock_in_devices"]
+devices = async_db["clock_in_devices"]
 
-def get_all_devices():
+INDEXES = {
+    "clock_in_devices": [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+# 對應 DeviceOut，另含 repository 輸出的 device_id / is_active
+DEVICE_PROJECTION = {
+    "device_id": 1,
+    "device_name": 1,
+    "device_type": 1,
+    "location": 1,
+    "is_active": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+async def get_all_devices():
     result = []
-    for device in devices.find().sort("created_at", -1):
+    async for device in devices.find({}, DEVICE_PROJECTION).sort("created_at", -1):
         created = device.get("created_at")
         updated = device.get("updated_at") or created  
         result.append({
@@ -21,15 +43,15 @@ def get_all_devices():
         })
     return result
 
-def create_device(data: dict):
+async def create_device(data: dict):
     now = datetime.now(timezone.utc)
     data["created_at"] = now
     data["updated_at"] = now
-    result = devices.insert_one(data)
+    result = await devices.insert_one(data)
     return str(result.inserted_id)
 
-def get_device_by_id(device_id: str):
-    device = devices.find_one({"_id": ObjectId(device_id)})
+async def get_device_by_id(device_id: str):
+    device = await devices.find_one({"_id": ObjectId(device_id)}, DEVICE_PROJECTION)
     if device:
         created = device.get("created_at")
         updated = device.get("updated_at") or created 
@@ -44,5 +66,28 @@ def get_device_by_id(device_id: str):
         }
     return None
 
-def delete_device(device_id: str):
-    return devices.delete_one({"_id": ObjectId(device_id)}).deleted_count
\ No newline at end of file
+async def delete_device(device_id: str):
+    result = await devices.delete_one({"_id": ObjectId(device_id)})
+    return result.deleted_count
+
+async def issue_device_key(device_id: str):
+    """產生新的裝置金鑰（只回傳這一次），資料庫只存 HMAC；舊金鑰立即失效"""
+    key = secrets.token_urlsafe(32)
+    result = await devices.update_one(
+        {"_id": ObjectId(device_id)},
+        {"$set": {"key_hash": hash_token(key), "updated_at": datetime.now(timezone.utc)}}
+    )
+    return key if result.matched_count else None
+
+async def authenticate_device(device_id: str, key: str):
+    """以裝置 _id 與金鑰驗證，停用或金鑰不符時回傳 None"""
+    try:
+        obj_id = ObjectId(device_id)
+    except (InvalidId, TypeError):
+        return None
+    device = await devices.find_one({"_id": obj_id}, {"device_id": 1, "location": 1, "is_active": 1, "key_hash": 1})
+    if not device or not device.get("key_hash") or not device.get("is_active", True):
+        return None
+    if not hmac.compare_digest(device["key_hash"], hash_token(key)):
+        return None
+    return device
@@ -0,0 +1,239 @@
+from app.config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_BACKOFF_SECONDS
+from app.db import async_db, get_async_db
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from bson import ObjectId
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+
+jobs = async_db["jobs"]
+
+FILE_BUCKET = "job_files"
+
+INDEXES = {
+    "jobs": [
+        # 取下一個可執行的工作
+        IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after"),
+        # 找租約過期（worker 已中止）的執行中工作
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)], name="status_lease_until"),
+        IndexModel([("type", ASCENDING), ("created_at", DESCENDING)], name="type_created_at"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        IndexModel([("finished_at", ASCENDING)], name="finished_at"),
+    ],
+}
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+# 對應 JobOut，不回傳租約等 runner 內部欄位
+JOB_PROJECTION = {
+    "type": 1,
+    "status": 1,
+    "params": 1,
+    "progress": 1,
+    "result": 1,
+    "error": 1,
+    "attempts": 1,
+    "max_attempts": 1,
+    "cancel_requested": 1,
+    "created_by": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "started_at": 1,
+    "finished_at": 1,
+}
+
+def convert_job(job):
+    job["_id"] = str(job["_id"])
+    if job.get("created_by"):
+        job["created_by"] = str(job["created_by"])
+    if job.get("result") and job["result"].get("file_id"):
+        job["result"]["file_id"] = str(job["result"]["file_id"])
+    return job
+
+def file_bucket() -> AsyncGridFSBucket:
+    return AsyncGridFSBucket(get_async_db(), bucket_name=FILE_BUCKET)
+
+async def create_job(job_type: str, params: dict, created_by: Optional[str] = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> dict:
+    now = datetime.now(timezone.utc)
+    job = {
+        "type": job_type,
+        "params": params,
+        "status": PENDING,
+        "progress": {"processed": 0, "total": None},
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": now,
+        "locked_by": None,
+        "lease_until": None,
+        "cancel_requested": False,
+        "created_by": ObjectId(created_by) if created_by else None,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+    }
+    result = await jobs.insert_one(job)
+    job["_id"] = result.inserted_id
+    return job
+
+async def get_job(job_id: str):
+    return await jobs.find_one({"_id": ObjectId(job_id)}, JOB_PROJECTION)
+
+async def list_jobs(job_type: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> list:
+    query = {}
+    if job_type:
+        query["type"] = job_type
+    if status:
+        query["status"] = status
+    return await jobs.find(query, JOB_PROJECTION).sort("created_at", DESCENDING).limit(limit).to_list(None)
+
+async def claim_job(worker_id: str, job_types: list):
+    """
+    原子性地取下一個工作並取得租約：待執行且已到重試時間的，
+    或租約已過期（執行它的程序中止）的執行中工作。多個程序同時取也只會有一個拿到。
+    """
+    now = datetime.now(timezone.utc)
+    return await jobs.find_one_and_update(
+        {
+            "type": {"$in": job_types},
+            "$or": [
+                {"status": PENDING, "run_after": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "locked_by": worker_id,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "started_at": now,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_after", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+def _owned(job_id: ObjectId, worker_id: str) -> dict:
+    # 只有持有租約的 worker 能更新，租約被接手後舊 worker 的寫入不生效
+    return {"_id": job_id, "status": RUNNING, "locked_by": worker_id}
+
+async def renew_lease(job_id: ObjectId, worker_id: str):
+    """續約並回傳 cancel_requested；租約已失去時回傳 None"""
+    now = datetime.now(timezone.utc)
+    job = await jobs.find_one_and_update(
+        _owned(job_id, worker_id),
+        {"$set": {"lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now}},
+        {"cancel_requested": 1},
+    )
+    return job["cancel_requested"] if job else None
+
+async def update_progress(job_id: ObjectId, worker_id: str, processed: int, total: Optional[int] = None):
+    fields = {"progress.processed": processed, "updated_at": datetime.now(timezone.utc)}
+    if total is not None:
+        fields["progress.total"] = total
+    job = await jobs.find_one_and_update(_owned(job_id, worker_id), {"$set": fields}, {"cancel_requested": 1})
+    return job["cancel_requested"] if job else None
+
+async def _finish(job_id: ObjectId, worker_id: str, status: str, **fields) -> bool:
+    now = datetime.now(timezone.utc)
+    fields.update({"status": status, "locked_by": None, "lease_until": None, "updated_at": now})
+    if status in FINISHED:
+        fields["finished_at"] = now
+    result = await jobs.update_one(_owned(job_id, worker_id), {"$set": fields})
+    return result.modified_count == 1
+
+async def complete_job(job_id: ObjectId, worker_id: str, result: Optional[dict]) -> bool:
+    return await _finish(job_id, worker_id, COMPLETED, result=result, error=None)
+
+async def fail_job(job: dict, worker_id: str, error: str) -> bool:
+    """失敗時依次數決定重試（指數退避）或標記為 failed"""
+    attempts = job["attempts"]
+    if attempts < job["max_attempts"]:
+        delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+        run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        return await _finish(job["_id"], worker_id, PENDING, error=error, run_after=run_after)
+    return await _finish(job["_id"], worker_id, FAILED, error=error)
+
+async def cancel_running_job(job_id: ObjectId, worker_id: str) -> bool:
+    return await _finish(job_id, worker_id, CANCELLED, error="已取消")
+
+async def release_job(job_id: ObjectId, worker_id: str) -> bool:
+    """程序關閉時歸還執行到一半的工作，不計入重試次數"""
+    now = datetime.now(timezone.utc)
+    result = await jobs.update_one(
+        _owned(job_id, worker_id),
+        {
+            "$set": {"status": PENDING, "locked_by": None, "lease_until": None, "run_after": now, "updated_at": now},
+            "$inc": {"attempts": -1},
+        },
+    )
+    return result.modified_count == 1
+
+async def request_cancel(job_id: str):
+    """待執行的工作直接取消；執行中的工作標記 cancel_requested，由執行它的 worker 中止"""
+    obj_id = ObjectId(job_id)
+    now = datetime.now(timezone.utc)
+    job = await jobs.find_one_and_update(
+        {"_id": obj_id, "status": PENDING},
+        {"$set": {"status": CANCELLED, "error": "已取消", "updated_at": now, "finished_at": now}},
+        JOB_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if job:
+        return job
+    return await jobs.find_one_and_update(
+        {"_id": obj_id, "status": RUNNING},
+        {"$set": {"cancel_requested": True, "updated_at": now}},
+        JOB_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+async def retry_job(job_id: str):
+    """重新排入失敗或已取消的工作，重試次數歸零"""
+    now = datetime.now(timezone.utc)
+    return await jobs.find_one_and_update(
+        {"_id": ObjectId(job_id), "status": {"$in": [FAILED, CANCELLED]}},
+        {"$set": {
+            "status": PENDING,
+            "attempts": 0,
+            "run_after": now,
+            "error": None,
+            "result": None,
+            "cancel_requested": False,
+            "progress": {"processed": 0, "total": None},
+            "updated_at": now,
+            "finished_at": None,
+        }},
+        JOB_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+async def delete_file(file_id: ObjectId):
+    try:
+        await file_bucket().delete(file_id)
+    except NoFile:
+        pass
+
+async def purge_finished_jobs(before: datetime) -> int:
+    """刪除 before 之前結束的工作與其匯出檔"""
+    finished = await jobs.find(
+        {"status": {"$in": list(FINISHED)}, "finished_at": {"$lt": before}},
+        {"result.file_id": 1},
+    ).to_list(None)
+    for job in finished:
+        file_id = (job.get("result") or {}).get("file_id")
+        if file_id:
+            await delete_file(file_id)
+    if finished:
+        await jobs.delete_many({"_id": {"$in": [job["_id"] for job in finished]}})
+    return len(finished)
@@ -1,11 +1,35 @@
-from app.db import db
+from app.db import async_db
+from app.config import LEAVE_CALENDAR_REFRESH_SECONDS
 from datetime import datetime, timezone
-from app.utils.time_utils import to_taipei
+from app.utils.interval_tree import IntervalTree
+from app.utils.time_utils import now_taipei, quarter_range_in_utc, to_taipei_many
 from bson import ObjectId
+from time import monotonic
+from pymongo import ASCENDING, IndexModel
 
-leaves = db["leaves"]
+leaves = async_db["leaves"]
 
-def create_leave(user_id: str, leave_data: dict):
+INDEXES = {
+    # get_leaves_by_user / get_leaves_between
+    "leaves": [
+        IndexModel([("user_id", ASCENDING), ("start_date", ASCENDING), ("end_date", ASCENDING)], name="user_id_start_date_end_date"),
+        # get_leave_calendar：全公司重疊查詢
+        IndexModel([("start_date", ASCENDING), ("end_date", ASCENDING)], name="start_date_end_date"),
+    ],
+}
+
+# 對應 LeaveOut
+LEAVE_PROJECTION = {
+    "user_id": 1,
+    "leave_type": 1,
+    "start_date": 1,
+    "end_date": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+async def create_leave(user_id: str, leave_data: dict):
     now = datetime.now(timezone.utc)
 
     leave_data["user_id"] = ObjectId(user_id)
@@ -13,50 +37,94 @@ def create_leave(user_id: str, leave_data: dict):
     leave_data["created_at"] = now
     leave_data["updated_at"] = now
 
-    result = leaves.insert_one(leave_data)
+    result = await leaves.insert_one(leave_data)
+    invalidate_calendar()
     return str(result.inserted_id)
 
-def get_leaves_by_user(user_id: str):
-    return [convert_leave(l) for l in leaves.find({"user_id": ObjectId(user_id)})]
+async def get_leaves_by_user(user_id: str):
+    return [convert_leave(l) async for l in leaves.find({"user_id": ObjectId(user_id)}, LEAVE_PROJECTION)]
 
-def get_all_leaves():
-    return [convert_leave(l) for l in leaves.find()]
+async def get_all_leaves():
+    return [convert_leave(l) async for l in leaves.find({}, LEAVE_PROJECTION)]
+
+LEAVE_DATETIME_FIELDS = ("start_date", "end_date", "created_at", "updated_at")
 
 def convert_leave(leave):
     leave["_id"] = str(leave["_id"])
     leave["user_id"] = str(leave["user_id"])
-
-    if "start_date" in leave:
-        leave["start_date"] = to_taipei(leave["start_date"])
-    if "end_date" in leave:
-        leave["end_date"] = to_taipei(leave["end_date"])
-    if "created_at" in leave:
-        leave["created_at"] = to_taipei(leave["created_at"])
-    if "updated_at" in leave:
-        leave["updated_at"] = to_taipei(leave["updated_at"])
-
+    to_taipei_many((leave,), LEAVE_DATETIME_FIELDS)
     return leave
 
-def update_leave_status(leave_id: str, new_status: str):
-    result = leaves.update_one(
+async def update_leave_status(leave_id: str, new_status: str):
+    result = await leaves.update_one(
         {"_id": ObjectId(leave_id)},
         {"$set": {
             "status": new_status,
             "updated_at": datetime.now(timezone.utc)
         }}
     )
+    invalidate_calendar()
     return result.modified_count
 
-def get_leave_by_id(leave_id: str):
-    return leaves.find_one({"_id": ObjectId(leave_id)})
+async def get_leave_by_id(leave_id: str):
+    return await leaves.find_one({"_id": ObjectId(leave_id)}, LEAVE_PROJECTION)
 
-def delete_leave(leave_id: str):
-    result = leaves.delete_one({"_id": ObjectId(leave_id)})
+async def delete_leave(leave_id: str):
+    result = await leaves.delete_one({"_id": ObjectId(leave_id)})
+    invalidate_calendar()
     return result.deleted_count
 
-def get_leaves_between(user_id: str, start: datetime, end: datetime):
-    return [convert_leave(l) for l in leaves.find({
+async def get_leaves_between(user_id: str, start: datetime, end: datetime):
+    return [convert_leave(l) async for l in leaves.find({
         "user_id": ObjectId(user_id),
         "start_date": {"$lte": end},
         "end_date": {"$gte": start}
-    })]
+    }, LEAVE_PROJECTION)]
+
+# 行事曆不顯示已拒絕的假單
+CALENDAR_EXCLUDED_STATUS = "已拒絕"
+
+# 本季（台灣時間）請假的區間樹；寫入時清除，其他 worker 的異動靠定期重新載入
+_calendar_cache = {"quarter": None, "tree": None, "loaded_at": 0.0}
+
+def invalidate_calendar():
+    _calendar_cache["tree"] = None
+
+def overlap_filter(start: datetime, end: datetime) -> dict:
+    """與 [start, end] 重疊：start_date <= end 且 end_date >= start，走 (start_date, end_date) 索引"""
+    return {
+        "start_date": {"$lte": end},
+        "end_date": {"$gte": start},
+        "status": {"$ne": CALENDAR_EXCLUDED_STATUS},
+    }
+
+async def _current_quarter_tree(quarter: tuple) -> IntervalTree:
+    now = monotonic()
+    tree = _calendar_cache["tree"]
+    if (
+        tree is not None
+        and _calendar_cache["quarter"] == quarter
+        and now - _calendar_cache["loaded_at"] < LEAVE_CALENDAR_REFRESH_SECONDS
+    ):
+        return tree
+
+    records = leaves.find(overlap_filter(*quarter), LEAVE_PROJECTION)
+    # PyMongo 回傳 naive UTC，區間樹也以 naive UTC 比較
+    tree = IntervalTree([(l["start_date"], l["end_date"], l) async for l in records])
+    _calendar_cache.update(quarter=quarter, tree=tree, loaded_at=now)
+    return tree
+
+async def get_leave_calendar(start: datetime, end: datetime) -> list:
+    """
+    全公司與 [start, end]（UTC）重疊的請假，依開始時間排序。
+    查詢區間落在本季時由記憶體區間樹回答，否則直接以索引查詢資料庫。
+    """
+    quarter = quarter_range_in_utc(now_taipei().date())
+    if quarter[0] <= start and end < quarter[1]:
+        tree = await _current_quarter_tree(quarter)
+        naive_start, naive_end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+        # 區間樹共用同一份文件，轉換前先複製
+        return [convert_leave(dict(l)) for l in tree.overlap(naive_start, naive_end)]
+
+    records = leaves.find(overlap_filter(start, end), LEAVE_PROJECTION).sort("start_date", ASCENDING)
+    return [convert_leave(l) async for l in records]
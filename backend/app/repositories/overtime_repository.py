@@ -1,10 +1,29 @@
-from app.db import db
+from app.db import async_db
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
-overtimes = db["overtimes"]
+overtimes = async_db["overtimes"]
 
-def create_overtime(user_id: str, overtime_data: dict):
+INDEXES = {
+    "overtimes": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+}
+
+# 對應 OvertimeOut
+OVERTIME_PROJECTION = {
+    "user_id": 1,
+    "overtime_start": 1,
+    "overtime_end": 1,
+    "total_hours": 1,
+    "reason": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+async def create_overtime(user_id: str, overtime_data: dict):
     start = overtime_data["overtime_start"]
     end = overtime_data["overtime_end"]
     duration = int((end - start).total_seconds() // 60)
@@ -18,29 +37,29 @@ def create_overtime(user_id: str, overtime_data: dict):
         "updated_at": now,
     })
 
-    result = overtimes.insert_one(overtime_data)
+    result = await overtimes.insert_one(overtime_data)
     return str(result.inserted_id)
 
-def get_overtimes_by_user(user_id: str):
-    records = overtimes.find({"user_id": ObjectId(user_id)})
+async def get_overtimes_by_user(user_id: str):
+    records = overtimes.find({"user_id": ObjectId(user_id)}, OVERTIME_PROJECTION)
     result = []
-    for ot in records:
+    async for ot in records:
         ot["_id"] = str(ot["_id"])
         ot["user_id"] = str(ot["user_id"])
         result.append(ot)
     return result
 
-def get_all_overtimes():
-    records = overtimes.find()
+async def get_all_overtimes():
+    records = overtimes.find({}, OVERTIME_PROJECTION)
     result = []
-    for ot in records:
+    async for ot in records:
         ot["_id"] = str(ot["_id"])
         ot["user_id"] = str(ot["user_id"])
         result.append(ot)
     return result
 
-def update_overtime_status(overtime_id: str, status: str):
-    result = overtimes.update_one(
+async def update_overtime_status(overtime_id: str, status: str):
+    result = await overtimes.update_one(
         {"_id": ObjectId(overtime_id)},
         {"$set": {
             "status": status,
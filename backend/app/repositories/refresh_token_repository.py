@@ -0,0 +1,65 @@
+import secrets
+from app.db import async_db
+from app.utils.jwt_handler import REFRESH_TOKEN_EXPIRE_DAYS
+from app.utils.security import hash_token
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+refresh_tokens = async_db["refresh_tokens"]
+
+INDEXES = {
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], name="token_hash", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # 過期的 refresh token 由 MongoDB 自動清除
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+async def create_refresh_token(user: dict, family_id: ObjectId = None) -> str:
+    """建立 refresh token，並記下簽發 access token 需要的 claims，換發時不必再查 users"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await refresh_tokens.insert_one({
+        "token_hash": hash_token(token),
+        "family_id": family_id or ObjectId(),
+        "user_id": ObjectId(user["sub"]),
+        "username": user["username"],
+        "role": user["role"],
+        "rotated_at": None,
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    })
+    return token
+
+async def rotate_refresh_token(token: str):
+    """以舊 token 換新 token，回傳 (claims, new_token)；無效時回傳 None"""
+    now = datetime.now(timezone.utc)
+    token_hash = hash_token(token)
+    record = await refresh_tokens.find_one_and_update(
+        {"token_hash": token_hash, "rotated_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"rotated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not record:
+        # 已換發過的 token 再被使用，視為外洩，整組作廢
+        reused = await refresh_tokens.find_one({"token_hash": token_hash}, {"family_id": 1})
+        if reused:
+            await refresh_tokens.delete_many({"family_id": reused["family_id"]})
+        return None
+
+    claims = {"sub": str(record["user_id"]), "username": record["username"], "role": record["role"]}
+    new_token = await create_refresh_token(claims, record["family_id"])
+    return claims, new_token
+
+async def revoke_refresh_token(token: str) -> int:
+    record = await refresh_tokens.find_one({"token_hash": hash_token(token)}, {"family_id": 1})
+    if not record:
+        return 0
+    result = await refresh_tokens.delete_many({"family_id": record["family_id"]})
+    return result.deleted_count
+
+async def revoke_user_tokens(user_id: str) -> int:
+    result = await refresh_tokens.delete_many({"user_id": ObjectId(user_id)})
+    return result.deleted_count
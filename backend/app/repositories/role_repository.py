@@ -1,35 +1,44 @@
-from app.db import db
+from app.db import async_db
 from datetime import datetime, timezone
 from bson import ObjectId
 
-roles = db["roles"]
+roles = async_db["roles"]
 
-def create_role(data: dict):
+# 對應 RoleOut（_id 會轉成 id）
+ROLE_PROJECTION = {
+    "role_name": 1,
+    "permissions": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+async def create_role(data: dict):
     now = datetime.now(timezone.utc)
     data["created_at"] = now
     data["updated_at"] = now
-    result = roles.insert_one(data)
+    result = await roles.insert_one(data)
     return str(result.inserted_id)
 
-def get_all_roles():
+async def get_all_roles():
     result = []
-    for r in roles.find():
+    async for r in roles.find({}, ROLE_PROJECTION):
         r["id"] = str(r["_id"])
         del r["_id"]
         result.append(r)
     return result
 
-def get_role_by_id(role_id: str):
-    role = roles.find_one({"_id": ObjectId(role_id)})
+async def get_role_by_id(role_id: str):
+    role = await roles.find_one({"_id": ObjectId(role_id)}, ROLE_PROJECTION)
     if role:
         role["id"] = str(role["_id"])
         del role["_id"]
     return role
 
-def update_role(role_id: str, update: dict):
+async def update_role(role_id: str, update: dict):
     update["updated_at"] = datetime.now(timezone.utc)
-    roles.update_one({"_id": ObjectId(role_id)}, {"$set": update})
-    return get_role_by_id(role_id)
+    await roles.update_one({"_id": ObjectId(role_id)}, {"$set": update})
+    return await get_role_by_id(role_id)
 
-def delete_role(role_id: str):
-    return roles.delete_one({"_id": ObjectId(role_id)}).deleted_count
+async def delete_role(role_id: str):
+    result = await roles.delete_one({"_id": ObjectId(role_id)})
+    return result.deleted_count
@@ -1,8 +1,23 @@
-from app.db import db
+from app.db import async_db
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
-collection = db["settings"]
+collection = async_db["settings"]
+
+INDEXES = {
+    "settings": [
+        IndexModel([("setting_name", ASCENDING)], name="setting_name", unique=True),
+    ],
+}
+
+# 對應 SettingOut（_id 會轉成 id）
+SETTING_PROJECTION = {
+    "setting_name": 1,
+    "setting_value": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
 
 def _convert_id(doc):
     if not doc:
@@ -11,27 +26,28 @@ def _convert_id(doc):
     del doc["_id"]
     return doc
 
-def create_setting(setting: dict) -> str:
+async def create_setting(setting: dict) -> str:
     now = datetime.now(timezone.utc)
     setting["created_at"] = now
     setting["updated_at"] = now
-    result = collection.insert_one(setting)
+    result = await collection.insert_one(setting)
     return str(result.inserted_id)
 
-def get_all_settings():
-    return [_convert_id(doc) for doc in collection.find()]
+async def get_all_settings():
+    return [_convert_id(doc) async for doc in collection.find({}, SETTING_PROJECTION)]
 
-def get_setting_by_name(name: str):
-    return _convert_id(collection.find_one({"setting_name": name}))
+async def get_setting_by_name(name: str):
+    return _convert_id(await collection.find_one({"setting_name": name}, SETTING_PROJECTION))
 
-def update_setting(name: str, value: str):
-    result = collection.find_one_and_update(
+async def update_setting(name: str, value: str):
+    result = await collection.find_one_and_update(
         {"setting_name": name},
         {"$set": {"setting_value": value, "updated_at": datetime.now(timezone.utc)}},
+        projection=SETTING_PROJECTION,
         return_document=True
     )
     return _convert_id(result)
 
-def delete_setting(name: str):
-    result = collection.delete_one({"setting_name": name})
+async def delete_setting(name: str):
+    result = await collection.delete_one({"setting_name": name})
     return result.deleted_count == 1
\ No newline at end of file
@@ -1,33 +1,95 @@
-from app.db import db
+from app.db import async_db
+from app.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from app.utils.cache import TTLCache
+from app.repositories import refresh_token_repository
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
-users = db["users"]
+users = async_db["users"]
 
-def get_user_by_username(username: str):
-    return users.find_one({"username": username})
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username", unique=True),
+    ],
+}
 
-def create_user(user_data: dict):
+# 對應 UserOut，不含密碼雜湊
+USER_PROJECTION = {
+    "username": 1,
+    "name": 1,
+    "email": 1,
+    "role": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# 登入驗證只需要這些欄位
+AUTH_PROJECTION = {
+    "username": 1,
+    "password": 1,
+    "role": 1,
+}
+
+# 以 token sub（user id）為 key 的驗證用使用者快取；
+# 僅在本程序內失效，其他 worker 最多延遲 TTL 秒才會看到變更
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+async def get_user_by_username(username: str):
+    return await users.find_one({"username": username}, AUTH_PROJECTION)
+
+async def create_user(user_data: dict):
     now = datetime.now(timezone.utc)
     user_data["created_at"] = now
     user_data["updated_at"] = now
-    result = users.insert_one(user_data)
+    result = await users.insert_one(user_data)
     return str(result.inserted_id)
 
-def get_all_users():
-    return list(users.find())
+async def get_all_users():
+    return await users.find({}, USER_PROJECTION).to_list(None)
 
-def get_user_by_id(user_id: str):
-    return users.find_one({"_id": ObjectId(user_id)})
+async def get_user_by_id(user_id: str):
+    return await users.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
 
-def update_user(user_id: str, update_data: dict):
+async def get_cached_user(user_id: str):
+    """取得驗證用的使用者資料（不含密碼），優先讀快取"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return dict(user)
+
+    db_user = await get_user_by_id(user_id)
+    if not db_user:
+        return None
+
+    user = {
+        "id": str(db_user["_id"]),
+        "username": db_user["username"],
+        "role": db_user.get("role", "user"),
+        "name": db_user.get("name"),
+        "email": db_user.get("email"),
+        "created_at": db_user.get("created_at"),
+        "updated_at": db_user.get("updated_at")
+    }
+    user_cache.set(user_id, user)
+    return dict(user)
+
+async def update_user(user_id: str, update_data: dict):
     update_data["updated_at"] = datetime.now(timezone.utc)
-    result = users.update_one(
+    result = await users.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": update_data}
     )
+    user_cache.invalidate(user_id)
+    # 密碼或角色可能已變更，既有的 refresh token 一律作廢
+    await refresh_token_repository.revoke_user_tokens(user_id)
     return result.modified_count
 
-def delete_user(user_id: str):
-    result = users.delete_one({"_id": ObjectId(user_id)})
+async def update_password_hash(user_id: str, hashed_password: str):
+    # 僅更換雜湊格式，不視為使用者資料變更，因此不更新 updated_at
+    await users.update_one({"_id": ObjectId(user_id)}, {"$set": {"password": hashed_password}})
+
+async def delete_user(user_id: str):
+    result = await users.delete_one({"_id": ObjectId(user_id)})
+    user_cache.invalidate(user_id)
+    await refresh_token_repository.revoke_user_tokens(user_id)
     return result.deleted_count
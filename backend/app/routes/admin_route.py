@@ -1,8 +1,17 @@
 from fastapi import APIRouter, Depends
 from app.utils.auth_dependency import require_admin
+from app.repositories import attendance_repository, user_repository
+from app.schemas.attendance_schema import AttendanceStatsOut
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-@router.get("/dashboard", dependencies=[Depends(require_admin)])
-def get_admin_dashboard():
-    return {"message": "Welcome, admin!"}
+@router.get("/dashboard", response_model=AttendanceStatsOut, dependencies=[Depends(require_admin)])
+async def get_admin_dashboard():
+    return await attendance_repository.get_today_stats()
+
+@router.get("/cache-stats", dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    return {
+        "user_cache": user_repository.user_cache.stats(),
+        "stats_cache": attendance_repository.stats_cache.stats(),
+    }
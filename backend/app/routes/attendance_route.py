@@ -1,32 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.repositories import attendance_repository
-from app.schemas.attendance_schema import ClockInOut, AttendanceOut
-from app.utils.auth_dependency import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app import jobs
+from app.repositories import attendance_daily_repository, attendance_repository, device_punch_repository, job_repository
+from app.schemas.attendance_schema import ClockInOut, AttendanceOut, AttendanceStatsOut, DailySummaryOut, DevicePunchBatchIn, DevicePunchBatchOut
+from app.schemas.job_schema import JobOut
+from app.utils.auth_dependency import get_current_device, get_current_user
 from app.utils.auth_dependency import require_admin
+from app.utils.exports import EXPORT_MEDIA_TYPES, export_rows
+from app.utils.responses import trusted_list
+from app.utils.time_utils import to_utc
 from bson import ObjectId
+from datetime import date, datetime
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
 @router.get("/my", response_model=list[AttendanceOut])
-def get_my_attendance(current_user = Depends(get_current_user)):
-    return attendance_repository.get_attendance_by_user(current_user["id"])
+async def get_my_attendance(current_user = Depends(get_current_user)):
+    return trusted_list(await attendance_repository.get_attendance_by_user(current_user["id"]), AttendanceOut)
 
-@router.get("/all", response_model=list[AttendanceOut])
-def get_all_attendance(current_user = Depends(require_admin)):
-    return attendance_repository.get_all_attendance()
-
-@router.get("/user/{user_id}", response_model=list[AttendanceOut])
-def get_user_attendance(user_id: str, current_user = Depends(require_admin)):
+def parse_user_id(user_id: str) -> ObjectId:
     try:
-        obj_id = ObjectId(user_id)
+        return ObjectId(user_id)
     except:
         raise HTTPException(status_code=400, detail="無效的使用者 ID")
-    
-    return attendance_repository.get_attendance_by_user(obj_id)
+
+async def paginate(limit: int, cursor: Optional[str], user_id: Optional[ObjectId], date_from: Optional[datetime], date_to: Optional[datetime]):
+    try:
+        records, next_cursor = await attendance_repository.get_attendance_page(
+            limit,
+            cursor,
+            user_id,
+            to_utc(date_from) if date_from else None,
+            to_utc(date_to) if date_to else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # 下一頁游標放在 header，回傳本體維持原本的 list 格式
+    response = trusted_list(records, AttendanceOut)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+@router.get("/all", response_model=list[AttendanceOut])
+async def get_all_attendance(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user = Depends(require_admin),
+):
+    obj_id = parse_user_id(user_id) if user_id else None
+    return await paginate(limit, cursor, obj_id, date_from, date_to)
+
+@router.get("/user/{user_id}", response_model=list[AttendanceOut])
+async def get_user_attendance(
+    user_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user = Depends(require_admin),
+):
+    return await paginate(limit, cursor, parse_user_id(user_id), date_from, date_to)
+
+@router.get("/stats", response_model=AttendanceStatsOut)
+async def get_attendance_stats(current_user = Depends(require_admin)):
+    # 今日出勤／請假／加班數字，單一聚合並短暫快取
+    return await attendance_repository.get_today_stats()
+
+@router.get("/summary", response_model=list[DailySummaryOut])
+async def get_daily_summary(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    user_id: Optional[str] = None,
+    current_user = Depends(require_admin),
+):
+    # 讀取 attendance_daily 彙總，不必掃描原始打卡紀錄
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="起始日期不可晚於結束日期")
+    obj_id = parse_user_id(user_id) if user_id else None
+    return await attendance_daily_repository.get_daily_summary(date_from.isoformat(), date_to.isoformat(), obj_id)
+
+@router.get("/export")
+async def export_attendance(
+    format: Literal["csv", "ndjson"] = "csv",
+    user_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user = Depends(require_admin),
+):
+    query = attendance_repository.build_attendance_filter(
+        parse_user_id(user_id) if user_id else None,
+        to_utc(date_from) if date_from else None,
+        to_utc(date_to) if date_to else None,
+        device_id,
+    )
+    return StreamingResponse(
+        export_rows(attendance_repository.iter_attendance(query), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=attendance.{format}"},
+    )
+
+@router.post("/export-jobs", response_model=JobOut, status_code=202)
+async def submit_export_job(
+    format: Literal["csv", "ndjson"] = "csv",
+    user_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user = Depends(require_admin),
+):
+    """大範圍匯出改由背景工作產生檔案，完成後以 GET /jobs/{id}/download 下載"""
+    if user_id:
+        parse_user_id(user_id)
+    params = {
+        "format": format,
+        "user_id": user_id,
+        "device_id": device_id,
+        "from": date_from.isoformat() if date_from else None,
+        "to": date_to.isoformat() if date_to else None,
+    }
+    job = await jobs.submit("attendance_export", params, current_user["id"])
+    return job_repository.convert_job(job)
 
 @router.post("/clock-in")
-def clock_in(data: ClockInOut, current_user = Depends(get_current_user)):
-    result = attendance_repository.clock_in(
+async def clock_in(data: ClockInOut, current_user = Depends(get_current_user)):
+    result = await attendance_repository.clock_in(
         current_user["id"],
         data.device_id,
         data.location
@@ -36,8 +138,17 @@ def clock_in(data: ClockInOut, current_user = Depends(get_current_user)):
     return {"message": "上班打卡成功", "id": result}
 
 @router.post("/clock-out")
-def clock_out(current_user = Depends(get_current_user)):
-    success = attendance_repository.clock_out(current_user["id"])
+async def clock_out(current_user = Depends(get_current_user)):
+    success = await attendance_repository.clock_out(current_user["id"])
     if not success:
         raise HTTPException(status_code=400, detail="尚未上班打卡或已打過下班卡")
     return {"message": "下班打卡成功"}
+
+@router.post("/device-punches", response_model=DevicePunchBatchOut)
+async def ingest_device_punches(batch: DevicePunchBatchIn, device = Depends(get_current_device)):
+    # 裝置離線期間累積的打卡，以實際打卡時間一次補登
+    results = await device_punch_repository.ingest_punches(device, [p.model_dump() for p in batch.punches])
+    return {
+        "accepted": sum(1 for r in results if r["status"] == device_punch_repository.ACCEPTED and not r["replayed"]),
+        "results": results,
+    }
@@ -6,8 +6,8 @@ from app.repositories import attendance_setting_repository
 router = APIRouter(prefix="/settings/attendance", tags=["Attendance Setting"])
 
 @router.get("/", response_model=AttendanceSettingOut)
-def get_attendance_setting(user=Depends(require_admin)):
-    setting = attendance_setting_repository.get_setting()
+async def get_attendance_setting(user=Depends(require_admin)):
+    setting = await attendance_setting_repository.get_setting()
     if not setting:
         raise HTTPException(status_code=404, detail="尚未設定打卡時間")
     return {
@@ -21,8 +21,8 @@ def get_attendance_setting(user=Depends(require_admin)):
     }
 
 @router.put("/", response_model=str)
-def update_attendance_setting(setting: AttendanceSettingCreate, user=Depends(require_admin)):
+async def update_attendance_setting(setting: AttendanceSettingCreate, user=Depends(require_admin)):
     setting_dict = setting.model_dump()
-    setting_id = attendance_setting_repository.upsert_setting(setting_dict)
+    setting_id = await attendance_setting_repository.upsert_setting(setting_dict)
     return str(setting_id)
 
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from app.repositories import user_repository
+from app.repositories import refresh_token_repository, user_repository
 from app.utils.jwt_handler import create_access_token
-from passlib.hash import bcrypt
+from app.utils.security import verify_and_update_async
 from pydantic import BaseModel
 import traceback
 
@@ -11,20 +11,37 @@ router = APIRouter(
     tags=["Auth"]
 )
 
+async def authenticate(username: str, password: str):
+    db_user = await user_repository.get_user_by_username(username)
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    valid, new_hash = await verify_and_update_async(password, db_user["password"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+    if new_hash:
+        # cost factor 調整後，登入時順便換成新的雜湊
+        await user_repository.update_password_hash(str(db_user["_id"]), new_hash)
+    return db_user
+
+async def issue_tokens(db_user):
+    claims = {
+        "sub": str(db_user["_id"]),
+        "username": db_user["username"],
+        "role": db_user.get("role", "user")
+    }
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": await refresh_token_repository.create_refresh_token(claims),
+        "token_type": "bearer"
+    }
+
 # ✅ 原本的 login，保留給 Swagger / Postman 用（form 格式）
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     try:
-        db_user = user_repository.get_user_by_username(form_data.username)
-        if not db_user or not bcrypt.verify(form_data.password, db_user["password"]):
-            raise HTTPException(status_code=401, detail="Invalid username or password")
-        
-        token = create_access_token({
-            "sub": str(db_user["_id"]),
-            "username": db_user["username"],
-            "role": db_user.get("role", "user")
-        })
-        return {"access_token": token, "token_type": "bearer"}
+        db_user = await authenticate(form_data.username, form_data.password)
+        return await issue_tokens(db_user)
     except HTTPException:
         raise
     except Exception:
@@ -37,20 +54,33 @@ class LoginInput(BaseModel):
     password: str
 
 @router.post("/json-login")
-def json_login(data: LoginInput):
+async def json_login(data: LoginInput):
     try:
-        db_user = user_repository.get_user_by_username(data.username)
-        if not db_user or not bcrypt.verify(data.password, db_user["password"]):
-            raise HTTPException(status_code=401, detail="Invalid username or password")
-        
-        token = create_access_token({
-            "sub": str(db_user["_id"]),
-            "username": db_user["username"],
-            "role": db_user.get("role", "user")
-        })
-        return {"access_token": token, "token_type": "bearer"}
+        db_user = await authenticate(data.username, data.password)
+        return await issue_tokens(db_user)
     except HTTPException:
         raise
     except Exception:
         print("Unexpected json_login error:", traceback.format_exc())
         raise HTTPException(status_code=500, detail="Something went wrong")
+
+# ✅ 以 refresh token 換發 access token（不需驗證密碼，也不查 users）
+class RefreshInput(BaseModel):
+    refresh_token: str
+
+@router.post("/refresh")
+async def refresh(data: RefreshInput):
+    rotated = await refresh_token_repository.rotate_refresh_token(data.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    claims, new_refresh_token = rotated
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer"
+    }
+
+@router.post("/logout")
+async def logout(data: RefreshInput):
+    await refresh_token_repository.revoke_refresh_token(data.refresh_token)
+    return {"message": "Logged out"}
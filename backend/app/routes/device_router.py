@@ -7,16 +7,24 @@ from typing import List
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
 @router.get("/", response_model=List[DeviceOut])
-def list_devices(current_user=Depends(require_admin)):
-    return device_repository.get_all_devices()
+async def list_devices(current_user=Depends(require_admin)):
+    return await device_repository.get_all_devices()
 
 @router.post("/", response_model=str)
-def create_device(device: DeviceCreate, current_user=Depends(require_admin)):
-    return device_repository.create_device(device.model_dump())
+async def create_device(device: DeviceCreate, current_user=Depends(require_admin)):
+    return await device_repository.create_device(device.model_dump())
+
+@router.post("/{device_id}/key")
+async def issue_device_key(device_id: str, current_user=Depends(require_admin)):
+    key = await device_repository.issue_device_key(device_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Device not found")
+    # 金鑰只在此時回傳一次
+    return {"device_id": device_id, "device_key": key}
 
 @router.delete("/{device_id}")
-def delete_device(device_id: str, current_user=Depends(require_admin)):
-    deleted = device_repository.delete_device(device_id)
+async def delete_device(device_id: str, current_user=Depends(require_admin)):
+    deleted = await device_repository.delete_device(device_id)
     if deleted == 0:
         raise HTTPException(status_code=404, detail="Device not found")
     return {"message": "Device deleted"}
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.jobs import runner
+from app.repositories import job_repository
+from app.schemas.job_schema import JobOut
+from app.utils.auth_dependency import require_admin
+from bson import ObjectId
+from gridfs.errors import NoFile
+from typing import List, Optional
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def parse_job_id(job_id: str) -> str:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="無效的 job ID")
+    return job_id
+
+async def get_job_or_404(job_id: str) -> dict:
+    job = await job_repository.get_job(parse_job_id(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("", response_model=List[JobOut], dependencies=[Depends(require_admin)])
+async def list_jobs(
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    return [job_repository.convert_job(job) for job in await job_repository.list_jobs(type, status, limit)]
+
+@router.get("/{job_id}", response_model=JobOut, dependencies=[Depends(require_admin)])
+async def get_job(job_id: str):
+    return job_repository.convert_job(await get_job_or_404(job_id))
+
+@router.post("/{job_id}/cancel", response_model=JobOut, dependencies=[Depends(require_admin)])
+async def cancel_job(job_id: str):
+    job = await job_repository.request_cancel(parse_job_id(job_id))
+    if not job:
+        await get_job_or_404(job_id)
+        raise HTTPException(status_code=409, detail="工作已結束，無法取消")
+    if job["status"] == job_repository.RUNNING:
+        runner.cancel_local(job["_id"])
+    return job_repository.convert_job(job)
+
+@router.post("/{job_id}/retry", response_model=JobOut, dependencies=[Depends(require_admin)])
+async def retry_job(job_id: str):
+    job = await job_repository.retry_job(parse_job_id(job_id))
+    if not job:
+        await get_job_or_404(job_id)
+        raise HTTPException(status_code=409, detail="只有失敗或已取消的工作可以重試")
+    runner.notify()
+    return job_repository.convert_job(job)
+
+@router.get("/{job_id}/download", dependencies=[Depends(require_admin)])
+async def download_job_file(job_id: str):
+    job = await get_job_or_404(job_id)
+    result = job.get("result") or {}
+    if job["status"] != job_repository.COMPLETED or not result.get("file_id"):
+        raise HTTPException(status_code=409, detail="工作尚未完成或沒有輸出檔案")
+    try:
+        stream = await job_repository.file_bucket().open_download_stream(result["file_id"])
+    except NoFile:
+        raise HTTPException(status_code=410, detail="匯出檔案已過期")
+
+    async def chunks():
+        while chunk := await stream.readchunk():
+            yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=result["content_type"],
+        headers={"Content-Disposition": f"attachment; filename={result['filename']}"},
+    )
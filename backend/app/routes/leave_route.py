@@ -1,37 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.repositories import leave_repository
 from app.schemas.leave_schema import LeaveCreate, LeaveOut, LeaveUpdate
 from app.utils.auth_dependency import get_current_user
+from app.utils.responses import trusted_list
+from app.utils.time_utils import day_range_in_utc
+from datetime import date
 from typing import List
 
 router = APIRouter(prefix="/leave", tags=["Leave"])
 
 @router.post("/", response_model=str)
-def apply_leave(leave: LeaveCreate, current_user = Depends(get_current_user)):
-    return leave_repository.create_leave(current_user["id"], leave.model_dump())
+async def apply_leave(leave: LeaveCreate, current_user = Depends(get_current_user)):
+    return await leave_repository.create_leave(current_user["id"], leave.model_dump())
 
 @router.get("/my", response_model=List[LeaveOut])
-def get_my_leaves(current_user = Depends(get_current_user)):
-    return leave_repository.get_leaves_by_user(current_user["id"])
+async def get_my_leaves(current_user = Depends(get_current_user)):
+    return trusted_list(await leave_repository.get_leaves_by_user(current_user["id"]), LeaveOut)
 
 @router.get("/all", response_model=List[LeaveOut])
-def get_all_leaves(current_user = Depends(get_current_user)):
+async def get_all_leaves(current_user = Depends(get_current_user)):
     if current_user["role"] != "Admin":
         raise HTTPException(status_code=403, detail="No permission")
-    return leave_repository.get_all_leaves()
+    return trusted_list(await leave_repository.get_all_leaves(), LeaveOut)
+
+# 行事曆一次最多查詢的天數
+CALENDAR_MAX_DAYS = 366
+
+@router.get("/calendar", response_model=List[LeaveOut])
+async def get_leave_calendar(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    current_user = Depends(get_current_user),
+):
+    if current_user["role"] != "Admin":
+        raise HTTPException(status_code=403, detail="No permission")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="起始日期不可晚於結束日期")
+    if (date_to - date_from).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"查詢區間不可超過 {CALENDAR_MAX_DAYS} 天")
+    start, _ = day_range_in_utc(date_from)
+    _, end = day_range_in_utc(date_to)
+    return trusted_list(await leave_repository.get_leave_calendar(start, end), LeaveOut)
 
 @router.put("/{leave_id}/status")
-def update_status(leave_id: str, update: LeaveUpdate, current_user = Depends(get_current_user)):
+async def update_status(leave_id: str, update: LeaveUpdate, current_user = Depends(get_current_user)):
     if current_user["role"] != "Admin":
         raise HTTPException(status_code=403, detail="No permission")
-    modified = leave_repository.update_leave_status(leave_id, update.status)
+    modified = await leave_repository.update_leave_status(leave_id, update.status)
     if modified == 0:
         raise HTTPException(status_code=404, detail="Leave not found")
     return {"message": "Status updated"}
 
 @router.get("/{leave_id}", response_model=LeaveOut)
-def get_leave(leave_id: str, current_user = Depends(get_current_user)):
-    leave = leave_repository.get_leave_by_id(leave_id)
+async def get_leave(leave_id: str, current_user = Depends(get_current_user)):
+    leave = await leave_repository.get_leave_by_id(leave_id)
     if not leave:
         raise HTTPException(status_code=404, detail="Leave not found")
     if current_user["role"] != "Admin" and str(leave["user_id"]) != current_user["id"]:
@@ -39,10 +61,10 @@ def get_leave(leave_id: str, current_user = Depends(get_current_user)):
     return leave
 
 @router.delete("/{leave_id}")
-def delete_leave(leave_id: str, current_user = Depends(get_current_user)):
+async def delete_leave(leave_id: str, current_user = Depends(get_current_user)):
     if current_user["role"] != "Admin":
         raise HTTPException(status_code=403, detail="No permission")
-    deleted = leave_repository.delete_leave(leave_id)
+    deleted = await leave_repository.delete_leave(leave_id)
     if deleted == 0:
         raise HTTPException(status_code=404, detail="Leave not found")
     return {"message": "Leave deleted"}
\ No newline at end of file
@@ -1,17 +1,91 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.attendance_report_schema import ReportGenerateIn, AttendanceReportOut
+from app import jobs
+from app.schemas.attendance_report_schema import ReportGenerateIn, AttendanceReportOut, ReportBatchIn, ReportBatchJobOut, DailyBackfillIn
+from app.schemas.job_schema import JobOut
 from app.utils.auth_dependency import get_current_user
-from app.repositories import attendance_report_repository
-from typing import List
+from app.repositories import attendance_report_repository, job_repository
+from app.utils.time_utils import month_range_in_utc
+from bson import ObjectId
+from typing import List, Optional
 
 router = APIRouter(prefix="/report", tags=["Attendance Report"])
 
-@router.get("/my", response_model=List[AttendanceReportOut])
-def get_my_reports(current_user=Depends(get_current_user)):
-    return attendance_report_repository.get_report_by_user(current_user["id"])
-
-@router.post("/generate", response_model=str)
-def generate_report(data: ReportGenerateIn, current_user=Depends(get_current_user)):
+def require_admin_role(current_user: dict):
     if current_user.get("role", "").lower() != "admin":
         raise HTTPException(status_code=403, detail="No permission")
-    return attendance_report_repository.generate_report(data.user_id, data.month)
+
+def validate_month(month: str):
+    try:
+        month_range_in_utc(month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"無效的 month 格式: {e}")
+
+def validate_user_ids(user_ids: Optional[List[str]]):
+    if user_ids is not None and not all(ObjectId.is_valid(u) for u in user_ids):
+        raise HTTPException(status_code=400, detail="無效的 user_id 格式")
+
+@router.get("/my", response_model=List[AttendanceReportOut])
+async def get_my_reports(current_user=Depends(get_current_user)):
+    return await attendance_report_repository.get_report_by_user(current_user["id"])
+
+# 以下皆送出背景工作並立即回傳，以 GET /jobs/{id} 查詢進度與結果
+
+@router.post("/generate", response_model=JobOut, status_code=202)
+async def generate_report(data: ReportGenerateIn, current_user=Depends(get_current_user)):
+    require_admin_role(current_user)
+    validate_user_ids([data.user_id])
+    validate_month(data.month)
+    job = await jobs.submit("report_generate", {"user_id": data.user_id, "month": data.month}, current_user["id"])
+    return job_repository.convert_job(job)
+
+@router.post("/generate-batch", response_model=JobOut, status_code=202)
+async def generate_report_batch(data: ReportBatchIn, current_user=Depends(get_current_user)):
+    require_admin_role(current_user)
+    validate_month(data.month)
+    validate_user_ids(data.user_ids)
+    job = await jobs.submit("report_batch", {"month": data.month, "user_ids": data.user_ids}, current_user["id"])
+    return job_repository.convert_job(job)
+
+@router.post("/reconcile", response_model=JobOut, status_code=202)
+async def reconcile_reports(data: ReportBatchIn, current_user=Depends(get_current_user)):
+    """由原始打卡資料重建整月報表（覆寫既有數字）"""
+    require_admin_role(current_user)
+    validate_month(data.month)
+    validate_user_ids(data.user_ids)
+    job = await jobs.submit("report_reconcile", {"month": data.month, "user_ids": data.user_ids}, current_user["id"])
+    return job_repository.convert_job(job)
+
+@router.post("/backfill-daily", response_model=JobOut, status_code=202)
+async def backfill_daily(data: DailyBackfillIn, current_user=Depends(get_current_user)):
+    require_admin_role(current_user)
+    if data.date_from and data.date_to and data.date_from > data.date_to:
+        raise HTTPException(status_code=400, detail="起始日期不可晚於結束日期")
+    params = {
+        "from": data.date_from.isoformat() if data.date_from else None,
+        "to": data.date_to.isoformat() if data.date_to else None,
+    }
+    job = await jobs.submit("daily_backfill", params, current_user["id"])
+    return job_repository.convert_job(job)
+
+@router.get("/batch/{job_id}", response_model=ReportBatchJobOut)
+async def get_report_batch(job_id: str, current_user=Depends(get_current_user)):
+    """相容舊版的批次報表進度；新的呼叫端請改用 GET /jobs/{id}"""
+    require_admin_role(current_user)
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="無效的 job ID")
+    job = await job_repository.get_job(job_id)
+    if not job or job["type"] != "report_batch":
+        raise HTTPException(status_code=404, detail="Job not found")
+    result = job.get("result") or {}
+    return {
+        "_id": str(job["_id"]),
+        "month": job["params"]["month"],
+        "status": job["status"],
+        "total": result.get("total", job["progress"]["total"] or 0),
+        "processed": result.get("total", job["progress"]["processed"]),
+        "created": result.get("created", 0),
+        "skipped": result.get("skipped", 0),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
@@ -7,27 +7,27 @@ from typing import List
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 @router.post("/", response_model=str)
-def create(setting: SettingCreate, _=Depends(require_admin)):
-    return settings_repository.create_setting(setting.model_dump())
+async def create(setting: SettingCreate, _=Depends(require_admin)):
+    return await settings_repository.create_setting(setting.model_dump())
 
 @router.get("/", response_model=List[SettingOut])
-def get_all(_=Depends(require_admin)):
-    return settings_repository.get_all_settings()
+async def get_all(_=Depends(require_admin)):
+    return await settings_repository.get_all_settings()
 
 @router.get("/{name}", response_model=SettingOut)
-def get_by_name(name: str, _=Depends(require_admin)):
-    setting = settings_repository.get_setting_by_name(name)
+async def get_by_name(name: str, _=Depends(require_admin)):
+    setting = await settings_repository.get_setting_by_name(name)
     if not setting:
         raise HTTPException(status_code=404, detail="Setting not found")
     return setting
 
 @router.put("/{name}", response_model=SettingOut)
-def update(name: str, value: str, _=Depends(require_admin)):
-    setting = settings_repository.update_setting(name, value)
+async def update(name: str, value: str, _=Depends(require_admin)):
+    setting = await settings_repository.update_setting(name, value)
     if not setting:
         raise HTTPException(status_code=404, detail="Setting not found")
     return setting
 
 @router.delete("/{name}", response_model=bool)
-def delete(name: str, _=Depends(require_admin)):
-    return settings_repository.delete_setting(name)
\ No newline at end of file
+async def delete(name: str, _=Depends(require_admin)):
+    return await settings_repository.delete_setting(name)
\ No newline at end of file
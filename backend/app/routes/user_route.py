@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.schemas.user_schema import UserCreate, UserOut
 from app.utils.auth_dependency import get_current_user
-from app.utils.security import hash_password
-from app.utils.time_utils import to_taipei
+from app.utils.security import hash_password_async
+from app.utils.time_utils import to_taipei, to_taipei_many
 from app.repositories import user_repository
 from datetime import datetime, timezone
 from typing import List
@@ -11,7 +11,7 @@ from bson import ObjectId
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: dict = Depends(get_current_user)):
+async def get_me(current_user: dict = Depends(get_current_user)):
     return UserOut(
         id=current_user["id"],
         username=current_user["username"],
@@ -23,32 +23,32 @@ def get_me(current_user: dict = Depends(get_current_user)):
     )
 
 @router.post("/", response_model=str)
-def create(user: UserCreate):
-    if user_repository.get_user_by_username(user.username):
+async def create(user: UserCreate):
+    if await user_repository.get_user_by_username(user.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     user_dict = user.model_dump()
-    user_dict["password"] = hash_password(user.password)
+    user_dict["password"] = await hash_password_async(user.password)
     now = datetime.now(timezone.utc)
     user_dict["created_at"] = now
     user_dict["updated_at"] = now
-    return user_repository.create_user(user_dict)
+    return await user_repository.create_user(user_dict)
 
 @router.get("/", response_model=List[UserOut])
-def get_all():
-    users = user_repository.get_all_users()
+async def get_all():
+    users = to_taipei_many(await user_repository.get_all_users(), ("created_at", "updated_at"))
     return [UserOut(
         id=str(u["_id"]),
         username=u["username"],
         name=u["name"],
         email=u.get("email"),
         role=u["role"],
-        created_at=to_taipei(u["created_at"]),
-        updated_at=to_taipei(u["updated_at"])
+        created_at=u["created_at"],
+        updated_at=u["updated_at"]
     ) for u in users]
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: str):
-    user = user_repository.get_user_by_id(user_id)
+async def get_user(user_id: str):
+    user = await user_repository.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserOut(
@@ -62,18 +62,18 @@ def get_user(user_id: str):
     )
 
 @router.put("/{user_id}")
-def update_user(user_id: str, user: UserCreate):
+async def update_user(user_id: str, user: UserCreate):
     update_data = user.model_dump()
-    update_data["password"] = hash_password(user.password)
+    update_data["password"] = await hash_password_async(user.password)
     update_data["updated_at"] = datetime.now(timezone.utc)
-    updated = user_repository.update_user(user_id, update_data)
+    updated = await user_repository.update_user(user_id, update_data)
     if updated == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User updated"}
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str):
-    deleted = user_repository.delete_user(user_id)
+async def delete_user(user_id: str):
+    deleted = await user_repository.delete_user(user_id)
     if deleted == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted"}
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
+from typing import List, Optional
 
 class ReportGenerateIn(BaseModel):
     user_id: str
@@ -13,3 +14,23 @@ class AttendanceReportOut(BaseModel):
     total_absences: int
     month: str
     created_at: datetime
+
+class ReportBatchIn(BaseModel):
+    month: str  # 格式：YYYY-MM
+    user_ids: Optional[List[str]] = None  # 未指定則為全部使用者
+
+class DailyBackfillIn(BaseModel):
+    date_from: Optional[date] = Field(None, alias="from")  # 未指定則從最早的紀錄開始
+    date_to: Optional[date] = Field(None, alias="to")
+
+class ReportBatchJobOut(BaseModel):
+    id: str = Field(..., alias="_id")
+    month: str
+    status: str  # pending / running / completed / failed / cancelled
+    total: int
+    processed: int
+    created: int
+    skipped: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
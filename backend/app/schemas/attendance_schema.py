@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
+from app.config import DEVICE_PUNCH_BATCH_LIMIT
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 class ClockInOut(BaseModel):
     device_id: Optional[str] = None
@@ -17,3 +18,45 @@ class AttendanceOut(BaseModel):
     location: Optional[str]
     created_at: datetime
     updated_at: datetime
+
+class DailySummaryOut(BaseModel):
+    user_id: str
+    days: int
+    worked_minutes: int
+    overtime_minutes: int
+    late_days: int
+    early_leave_days: int
+
+class AttendanceStatsOut(BaseModel):
+    date: str
+    total_employees: int
+    present_today: int
+    late_today: int
+    early_leave_today: int
+    not_clocked_in_today: int
+    leave_today: int
+    pending_leaves: int
+    pending_overtimes: int
+    attendance_rate: float
+    average_working_hours: float
+    generated_at: datetime
+
+class DevicePunchIn(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+    user_id: str
+    type: Literal["clock_in", "clock_out"]
+    timestamp: datetime  # 實際打卡時間，未帶時區視為 UTC
+    location: Optional[str] = None
+
+class DevicePunchBatchIn(BaseModel):
+    punches: list[DevicePunchIn] = Field(..., min_length=1, max_length=DEVICE_PUNCH_BATCH_LIMIT)
+
+class DevicePunchResult(BaseModel):
+    idempotency_key: str
+    status: str
+    attendance_id: Optional[str] = None
+    replayed: bool = False
+
+class DevicePunchBatchOut(BaseModel):
+    accepted: int
+    results: list[DevicePunchResult]
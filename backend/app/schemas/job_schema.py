@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+class JobProgress(BaseModel):
+    processed: int = 0
+    total: Optional[int] = None
+
+class JobOut(BaseModel):
+    id: str = Field(..., alias="_id")
+    type: str  # report_generate / report_batch / report_reconcile / daily_backfill / attendance_export
+    status: str  # pending / running / completed / failed / cancelled
+    params: dict
+    progress: JobProgress
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    created_by: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
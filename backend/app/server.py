@@ -0,0 +1,53 @@
+"""
+正式環境多 worker 啟動入口。每個 worker 是獨立程序，在自己的 lifespan 中建立
+Mongo client、預熱快取後才開始接受請求；收到 SIGTERM 時停止接受新連線，
+等待進行中的請求（最多 GRACEFUL_TIMEOUT_SECONDS 秒）後關閉連線池。
+
+    cd backend
+    python -m app.server --workers 4
+    # Linux 也可以用 gunicorn 管理 worker（自動重啟、平滑重載），設定見 gunicorn.conf.py
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from app.config import GRACEFUL_TIMEOUT_SECONDS, SERVER_HOST, SERVER_PORT, WEB_WORKERS
+
+def prepare_multiprocess_metrics(workers: int):
+    """
+    多 worker 時讓 prometheus_client 把指標寫到共用目錄，/metrics 才會彙整所有 worker。
+    必須在任何 worker import prometheus_client 之前設定；每次啟動清空舊檔。
+    """
+    if workers <= 1:
+        return None
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "attendance-metrics")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT_SECONDS)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    prepare_multiprocess_metrics(args.workers)
+    # 以 import 字串啟動：每個 worker 自行 import app，不繼承父程序的 client 或執行緒
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=False,
+    )
+
+if __name__ == "__main__":
+    main()
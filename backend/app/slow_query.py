@@ -0,0 +1,206 @@
+"""
+慢查詢紀錄：超過 SLOW_QUERY_MS 的 Mongo 指令寫成一行 JSON，包含來源 repository 函式、
+篩選條件形狀（值以型別取代）與耗時；依 SLOW_QUERY_EXPLAIN_RATE 抽樣，於背景執行
+explain("executionStats")，另寫一行 slow_query_explain 記錄是否 COLLSCAN。
+
+    grep '"event": "slow_query"' slow_query.log | jq .
+"""
+import json
+import logging
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pymongo import monitoring
+from app.config import SLOW_QUERY_EXPLAIN_RATE, SLOW_QUERY_LOG_PATH, SLOW_QUERY_MS
+from app.metrics import current_route
+
+logger = logging.getLogger("app.slow_query")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+if not logger.handlers:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG_PATH, encoding="utf-8") if SLOW_QUERY_LOG_PATH else logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+
+# 會帶篩選條件、值得記錄的指令，以及篩選條件所在的欄位
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+    "update": "updates",
+    "delete": "deletes",
+    "insert": None,
+}
+# explain 不會真的寫入，但 $out / $merge 的 aggregate 仍排除
+EXPLAINABLE = {"find", "count", "distinct", "findAndModify", "aggregate", "update", "delete"}
+# 送給 explain 前要移除的 session / 連線層欄位
+EXPLAIN_STRIP_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern"}
+# 找來源時略過的模組
+SKIPPED_MODULES = ("app.db", "app.slow_query", "app.metrics")
+
+def value_shape(value):
+    """把查詢條件中的值換成型別名稱，只保留結構"""
+    if isinstance(value, dict):
+        return {key: value_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        shapes = [value_shape(item) for item in value[:3]]
+        first = shapes[0]
+        if all(shape == first for shape in shapes):
+            return [first] if len(value) == 1 else [first, f"...x{len(value)}"]
+        return shapes
+    return type(value).__name__
+
+def command_shape(command_name: str, command: dict):
+    field = FILTER_FIELDS.get(command_name)
+    if not field or field not in command:
+        return None
+    value = command[field]
+    if command_name == "aggregate":
+        # 保留每個 stage 名稱，只展開 $match 的形狀
+        return [
+            {name: value_shape(body)} if name == "$match" else name
+            for stage in value for name, body in stage.items()
+        ]
+    if command_name in ("update", "delete"):
+        return [value_shape(statement.get("q", {})) for statement in value[:1]]
+    shape = {"filter": value_shape(value)}
+    if command_name == "find" and command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+def find_origin() -> str:
+    """由呼叫堆疊找出送出指令的 app 函式，優先取 repository"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith(SKIPPED_MODULES):
+            origin = f"{module}:{frame.f_code.co_name}"
+            if module.startswith("app.repositories."):
+                return origin
+            fallback = fallback or origin
+        frame = frame.f_back
+    return fallback or "-"
+
+def _find_stats(plan):
+    """在 explain 結果中找出第一個 executionStats（aggregate 會包在 stages 裡）"""
+    if isinstance(plan, dict):
+        if "executionStats" in plan:
+            return plan["executionStats"]
+        children = plan.values()
+    elif isinstance(plan, list):
+        children = plan
+    else:
+        return None
+    for child in children:
+        stats = _find_stats(child)
+        if stats is not None:
+            return stats
+    return None
+
+def _has_collscan(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for key, value in plan.items() if key != "rejectedPlans")
+    if isinstance(plan, list):
+        return any(_has_collscan(item) for item in plan)
+    return False
+
+def explain_command(database: str, command_name: str, command: dict) -> dict:
+    from app.db import get_client
+
+    target = {key: value for key, value in command.items() if not key.startswith("$") and key not in EXPLAIN_STRIP_FIELDS}
+    result = get_client()[database].command({"explain": target, "verbosity": "executionStats"})
+    stats = _find_stats(result) or {}
+    return {
+        "collscan": _has_collscan(result),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "n_returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+def log_event(entry: dict):
+    logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+class SlowQueryListener(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain_rate: float = SLOW_QUERY_EXPLAIN_RATE):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self._inflight = {}
+        # explain 在背景單一 thread 執行，同時只排一個，避免慢查詢時再加重資料庫負擔
+        self._explain_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._explain_busy = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in FILTER_FIELDS:
+            self._inflight[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+    def _finish(self, event, status: str):
+        started = self._inflight.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        database, command = started
+        name = event.command_name
+        entry = {
+            "event": "slow_query",
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "op_id": event.operation_id,
+            "command": name,
+            "database": database,
+            "collection": command.get(name),
+            "duration_ms": round(duration_ms, 2),
+            "status": status,
+            "origin": find_origin(),
+            "route": current_route(),
+            "shape": command_shape(name, command),
+        }
+        log_event(entry)
+        if status == "success" and self._should_explain(name, command):
+            self._explain_pool.submit(self._explain, entry, database, name, command)
+
+    def _should_explain(self, name: str, command: dict) -> bool:
+        if name not in EXPLAINABLE or random.random() >= self.explain_rate:
+            return False
+        if name == "aggregate" and any("$out" in stage or "$merge" in stage for stage in command.get("pipeline", [])):
+            return False
+        return not self._explain_busy.locked()
+
+    def _explain(self, entry: dict, database: str, name: str, command: dict):
+        if not self._explain_busy.acquire(blocking=False):
+            return
+        try:
+            explain = explain_command(database, name, command)
+        except Exception as e:
+            explain = {"error": str(e)}
+        finally:
+            self._explain_busy.release()
+        log_event({
+            "event": "slow_query_explain",
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "op_id": entry["op_id"],
+            "command": name,
+            "collection": entry["collection"],
+            "origin": entry["origin"],
+            "shape": entry["shape"],
+            **explain,
+        })
+
+slow_query_listener = SlowQueryListener()
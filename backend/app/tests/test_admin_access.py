@@ -20,7 +20,9 @@ def test_admin_access_allowed():
         headers={"Authorization": f"Bearer {token}"}
     )
     assert response.status_code == 200
-    assert response.json()["message"] == "Welcome, admin!"
+    stats = response.json()
+    assert stats["not_clocked_in_today"] == max(stats["total_employees"] - stats["present_today"], 0)
+    assert stats["late_today"] <= stats["present_today"]
 
 def test_user_access_forbidden():
     token = get_token("stella", "!QAZ 0okm 8uhb")  # 一般 user
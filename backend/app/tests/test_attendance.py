@@ -1,5 +1,9 @@
 from fastapi.testclient import TestClient
-from datetime import datetime, datetime
+from datetime import datetime, timedelta, timezone
+import asyncio
+import httpx
+import json
+from bson import ObjectId
 from app.main import app
 from app.db import db
 from .test_setup import setup_test_user, clean_today_attendance, ensure_test_device_exists
@@ -35,6 +39,22 @@ def test_clock_in():
     assert response2.status_code == 400
     assert response2.json()["detail"] == "今天已打過上班卡"
 
+def test_concurrent_clock_in_creates_one_record():
+    setup_test_user()
+    clean_today_attendance("stella")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+
+    async def punch_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*[
+                ac.post("/attendance/clock-in", json={"device_id": "test-device-1"}, headers=headers)
+                for _ in range(2)
+            ])
+
+    responses = asyncio.run(punch_twice())
+    assert sorted(r.status_code for r in responses) == [200, 400]
+
 def test_clock_out():
     token = get_token()
     headers = {"Authorization": f"Bearer {token}"}
@@ -48,6 +68,213 @@ def test_clock_out():
         assert response.status_code == 200
         assert response.json()["message"] == "下班打卡成功"
         
+def test_clock_in_and_out_legacy_record_without_local_date():
+    setup_test_user()
+    clean_today_attendance("stella")
+    user = db["users"].find_one({"username": "stella"})
+    now = datetime.now(timezone.utc)
+    # 部署前寫入的紀錄沒有 local_date
+    db["attendances"].insert_one({
+        "user_id": user["_id"],
+        "clock_in": now - timedelta(minutes=1),
+        "clock_out": None,
+        "is_late": False,
+        "is_early_leave": False,
+        "created_at": now,
+        "updated_at": now,
+    })
+
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    # 舊紀錄也算今天已打過上班卡
+    response = client.post("/attendance/clock-in", json={"device_id": "test-device-1"}, headers=headers)
+    assert response.status_code == 400
+    assert db["attendances"].count_documents({"user_id": user["_id"], "clock_in": {"$gte": now - timedelta(hours=1)}}) == 1
+
+    response = client.post("/attendance/clock-out", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["message"] == "下班打卡成功"
+
+def test_all_attendance_pagination():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    first = client.get("/attendance/all?limit=1", headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) <= 1
+
+    cursor = first.headers.get("X-Next-Cursor")
+    if cursor:
+        second = client.get(f"/attendance/all?limit=1&cursor={cursor}", headers=headers)
+        assert second.status_code == 200
+        assert second.json()[0]["_id"] != first.json()[0]["_id"]
+
+    invalid = client.get("/attendance/all?cursor=not-a-cursor", headers=headers)
+    assert invalid.status_code == 400
+
+def test_user_attendance_pages_past_default_limit():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # 不存在的使用者 ID，只放本測試建立的 150 筆紀錄
+    user_id = ObjectId()
+    base = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+    db["attendances"].insert_many([
+        {
+            "user_id": user_id,
+            "local_date": (base + timedelta(days=i)).date().isoformat(),
+            "clock_in": base + timedelta(days=i),
+            "clock_out": None,
+            "is_late": False,
+            "is_early_leave": False,
+            "created_at": base + timedelta(days=i),
+            "updated_at": base + timedelta(days=i),
+        }
+        for i in range(150)
+    ])
+    try:
+        ids, pages, cursor = [], 0, None
+        while True:
+            url = f"/attendance/user/{user_id}" + (f"?cursor={cursor}" if cursor else "")
+            page = client.get(url, headers=headers)
+            assert page.status_code == 200
+            ids.extend(r["_id"] for r in page.json())
+            pages += 1
+            cursor = page.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert pages == 2  # 預設每頁 100 筆
+        assert len(ids) == 150
+        assert len(set(ids)) == 150
+    finally:
+        db["attendances"].delete_many({"user_id": user_id})
+
+def test_export_attendance():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    csv_resp = client.get("/attendance/export?format=csv", headers=headers)
+    assert csv_resp.status_code == 200
+    assert csv_resp.headers["content-type"].startswith("text/csv")
+    assert csv_resp.text.lstrip("\ufeff").startswith("_id,user_id,clock_in")
+
+    ndjson_resp = client.get("/attendance/export?format=ndjson&device_id=test-device-1", headers=headers)
+    assert ndjson_resp.status_code == 200
+    for line in ndjson_resp.text.splitlines():
+        assert json.loads(line)["device_id"] == "test-device-1"
+
+def test_daily_summary():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    summary = client.get("/attendance/summary?from=2025-07-01&to=2025-07-31", headers=headers)
+    assert summary.status_code == 200
+    for row in summary.json():
+        assert row["days"] >= row["late_days"]
+        assert row["worked_minutes"] >= row["overtime_minutes"]
+
+    reversed_range = client.get("/attendance/summary?from=2025-07-31&to=2025-07-01", headers=headers)
+    assert reversed_range.status_code == 400
+
+def test_attendance_stats_cached():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    first = client.get("/attendance/stats", headers=headers)
+    second = client.get("/attendance/stats", headers=headers)
+    assert first.status_code == 200
+    assert first.json()["present_today"] + first.json()["not_clocked_in_today"] >= first.json()["total_employees"]
+    # 快取期間內回傳同一份結果
+    assert second.json()["generated_at"] == first.json()["generated_at"]
+
+    forbidden = client.get("/attendance/stats", headers={"Authorization": f"Bearer {get_token()}"})
+    assert forbidden.status_code == 403
+
+def test_device_punch_batch():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    device_id = client.post("/devices/", json={"device_name": "補登測試", "device_type": "kiosk"}, headers=admin_headers).json()
+    key = client.post(f"/devices/{device_id}/key", headers=admin_headers).json()["device_key"]
+    device_headers = {"X-Device-Id": device_id, "X-Device-Key": key}
+
+    day = datetime.now(timezone.utc) - timedelta(days=2)
+    batch = {"punches": [
+        {"idempotency_key": f"{device_id}-in", "user_id": "686a6ce62be32901a8ad46f9", "type": "clock_in", "timestamp": day.replace(hour=1).isoformat()},
+        {"idempotency_key": f"{device_id}-out", "user_id": "686a6ce62be32901a8ad46f9", "type": "clock_out", "timestamp": day.replace(hour=10).isoformat()},
+        {"idempotency_key": f"{device_id}-bad", "user_id": "not-an-id", "type": "clock_in", "timestamp": day.isoformat()},
+    ]}
+    first = client.post("/attendance/device-punches", json=batch, headers=device_headers)
+    assert first.status_code == 200
+    results = first.json()["results"]
+    assert [r["idempotency_key"] for r in results] == [p["idempotency_key"] for p in batch["punches"]]
+    assert results[2]["status"] == "unknown_user"
+
+    # 重送同一批：依冪等鍵回傳原本的結果，不再寫入
+    replay = client.post("/attendance/device-punches", json=batch, headers=device_headers)
+    assert all(r["replayed"] for r in replay.json()["results"])
+    assert [r["status"] for r in replay.json()["results"]] == [r["status"] for r in results]
+
+    bad_key = client.post("/attendance/device-punches", json=batch, headers={"X-Device-Id": device_id, "X-Device-Key": "wrong"})
+    assert bad_key.status_code == 401
+
+    client.delete(f"/devices/{device_id}", headers=admin_headers)
+
+def test_device_punch_updates_legacy_record():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    device_id = client.post("/devices/", json={"device_name": "補登舊紀錄測試", "device_type": "kiosk"}, headers=admin_headers).json()
+    key = client.post(f"/devices/{device_id}/key", headers=admin_headers).json()["device_key"]
+    device_headers = {"X-Device-Id": device_id, "X-Device-Key": key}
+
+    user = db["users"].find_one({"username": "stella"})
+    clock_in = (datetime.now(timezone.utc) - timedelta(days=3)).replace(hour=1, minute=0, second=0, microsecond=0)
+    day_filter = {"user_id": user["_id"], "clock_in": {"$gte": clock_in - timedelta(hours=8), "$lt": clock_in + timedelta(hours=16)}}
+    db["attendances"].delete_many(day_filter)
+    # 部署前寫入的紀錄沒有 local_date
+    legacy_id = db["attendances"].insert_one({
+        "user_id": user["_id"],
+        "clock_in": clock_in,
+        "clock_out": None,
+        "is_late": False,
+        "is_early_leave": False,
+        "created_at": clock_in,
+        "updated_at": clock_in,
+    }).inserted_id
+
+    batch = {"punches": [
+        {"idempotency_key": f"{device_id}-out", "user_id": str(user["_id"]), "type": "clock_out", "timestamp": clock_in.replace(hour=10).isoformat()},
+    ]}
+    result = client.post("/attendance/device-punches", json=batch, headers=device_headers).json()["results"][0]
+    assert result["status"] == "accepted"
+    assert result["attendance_id"] == str(legacy_id)
+    # 更新原紀錄並補上 local_date，不另建一筆
+    assert db["attendances"].count_documents(day_filter) == 1
+    assert db["attendances"].find_one({"_id": legacy_id})["local_date"]
+
+    db["attendances"].delete_many(day_filter)
+    client.delete(f"/devices/{device_id}", headers=admin_headers)
+
 def ensure_test_device_exists():
     devices = db["clock_in_devices"]
     if not devices.find_one({"device_id": "test-device-1"}):
@@ -1,6 +1,9 @@
+import time
 from fastapi.testclient import TestClient
 from app.main import app
 from app.utils.jwt_handler import decode_access_token
+from app.utils.time_utils import month_range_in_utc
+from datetime import datetime, timezone
 
 client = TestClient(app)
 
@@ -9,6 +12,14 @@ def get_token(username="phchuang", password="!QAZ 0okm 8uhb"):
     assert res.status_code == 200
     return res.json()["access_token"]
 
+def wait_for_job(client, headers, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("completed", "failed", "cancelled") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.1)
+
 def test_generate_attendance_report():
     token = get_token()  # 預設使用 admin 身份
     headers = {"Authorization": f"Bearer {token}"}
@@ -22,10 +33,15 @@ def test_generate_attendance_report():
         "month": "2025-07"
     }
 
-    res = client.post("/report/generate", json=payload, headers=headers)
-    assert res.status_code == 200
-    assert isinstance(res.json(), str)
-    assert len(res.json()) == 24   # 成功會有 inserted_id
+    # 以 with 啟動 lifespan，背景工作才會執行
+    with TestClient(app) as lifespan_client:
+        res = lifespan_client.post("/report/generate", json=payload, headers=headers)
+        assert res.status_code == 202
+        assert res.json()["status"] == "pending"
+
+        job = wait_for_job(lifespan_client, headers, res.json()["_id"])
+    assert job["status"] == "completed"
+    assert len(job["result"]["report_id"]) == 24   # 成功會有報表 ID
 
 def test_get_my_reports():
     token = get_token("stella", "!QAZ 0okm 8uhb")  # Stella 是一般使用者
@@ -33,4 +49,48 @@ def test_get_my_reports():
 
     res = client.get("/report/my", headers=headers)
     assert res.status_code == 200
-    assert isinstance(res.json(), list)
\ No newline at end of file
+    assert isinstance(res.json(), list)
+
+def test_month_range_in_utc():
+    # 台灣時間 7/1 00:00 = UTC 6/30 16:00
+    start, end = month_range_in_utc("2025-07")
+    assert start == datetime(2025, 6, 30, 16, 0, tzinfo=timezone.utc)
+    assert end == datetime(2025, 7, 31, 16, 0, tzinfo=timezone.utc)
+
+    start, end = month_range_in_utc("2025-12")
+    assert end == datetime(2025, 12, 31, 16, 0, tzinfo=timezone.utc)
+
+def test_generate_report_batch():
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    payload = {"month": "2025-07", "user_ids": ["686a6ce62be32901a8ad46f9"]}
+    with TestClient(app) as lifespan_client:
+        res = lifespan_client.post("/report/generate-batch", json=payload, headers=headers)
+        assert res.status_code == 202
+        job_id = res.json()["_id"]
+        wait_for_job(lifespan_client, headers, job_id)
+
+    res = client.get(f"/report/batch/{job_id}", headers=headers)
+    assert res.status_code == 200
+    job = res.json()
+    assert job["status"] == "completed"
+    assert job["created"] + job["skipped"] == 1
+
+def test_generate_report_batch_invalid_month():
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.post("/report/generate-batch", json={"month": "2025/07"}, headers=headers)
+    assert res.status_code == 400
+
+def test_incremental_minutes_match_report_rules():
+    from app.repositories.attendance_report_repository import work_minutes, overtime_minutes
+
+    clock_in = datetime(2025, 7, 1, 1, 0, tzinfo=timezone.utc)
+    clock_out = datetime(2025, 7, 1, 10, 30, 59, tzinfo=timezone.utc)
+    minutes = work_minutes(clock_in, clock_out)
+    assert minutes == 570  # 不滿一分鐘捨去
+    assert overtime_minutes(minutes, late_or_early=False) == 90
+    assert overtime_minutes(minutes, late_or_early=True) == 0
+    assert overtime_minutes(300, late_or_early=False) == 0
@@ -1,6 +1,8 @@
 import pytest
+from datetime import time
 from fastapi.testclient import TestClient
 from app.main import app
+from app.repositories.attendance_setting_repository import build_punch_setting, parse_time
 
 client = TestClient(app)
 
@@ -79,4 +81,14 @@ def test_update_attendance_setting_as_user_should_fail(user_headers):
         "lunch_break_time": 45
     }
     response = client.put("/settings/attendance/", headers=user_headers, json=setting_data)
-    assert response.status_code == 403
\ No newline at end of file
+    assert response.status_code == 403
+
+# 打卡用設定會預先解析時間與寬限期
+def test_build_punch_setting():
+    assert parse_time("09:00") == time(9, 0)
+    assert parse_time("09:00:30") == time(9, 0, 30)
+
+    setting = build_punch_setting({"work_start_time": "08:30:00", "work_end_time": "17:30", "grace_period": 15})
+    assert setting["late_after"] == time(8, 45)
+    assert setting["work_end_time"] == time(17, 30)
+    assert setting["version"] == 0
@@ -1,5 +1,9 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from app.main import app
+from app.utils import security
 
 client = TestClient(app)
 
@@ -48,3 +52,45 @@ def test_get_me_with_invalid_token():
 def test_get_me_without_token():
     response = client.get("/users/me")
     assert response.status_code == 401
+
+def test_password_pool_rejects_when_saturated(monkeypatch):
+    # 排隊數已達上限時應立即回 503，而不是繼續排隊
+    monkeypatch.setitem(security._password_pool, "pending", security.PASSWORD_QUEUE_LIMIT)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.verify_and_update_async(PASSWORD, "not-used"))
+    assert exc.value.status_code == 503
+
+def test_refresh_token_rotation():
+    login = client.post("/auth/login", data={
+        "username": USERNAME,
+        "password": PASSWORD
+    })
+    refresh_token = login.json()["refresh_token"]
+
+    # 換發新的 access / refresh token
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["refresh_token"] != refresh_token
+
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+    assert me.status_code == 200
+
+    # 舊的 refresh token 不能再用，且會讓同一組 token 全部失效
+    reused = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert reused.status_code == 401
+    revoked = client.post("/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert revoked.status_code == 401
+
+def test_logout_revokes_refresh_token():
+    login = client.post("/auth/login", data={
+        "username": USERNAME,
+        "password": PASSWORD
+    })
+    refresh_token = login.json()["refresh_token"]
+
+    response = client.post("/auth/logout", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
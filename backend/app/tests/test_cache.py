@@ -0,0 +1,35 @@
+from app.utils.cache import TTLCache
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_expiry():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=30, timer=timer)
+    cache.set("u1", {"id": "u1"})
+    assert cache.get("u1") == {"id": "u1"}
+
+    timer.now = 31
+    assert cache.get("u1") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a 變成最近使用
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_invalidate():
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("u1", {"id": "u1"})
+    cache.invalidate("u1")
+    assert cache.get("u1") is None
@@ -0,0 +1,36 @@
+import os
+import pytest
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from app import db as db_module
+from app.db import analytics_db, async_db, client_options, read_preference
+
+def test_read_preference_names():
+    assert isinstance(read_preference("primary"), Primary)
+    assert isinstance(read_preference("secondaryPreferred"), SecondaryPreferred)
+    with pytest.raises(ValueError):
+        read_preference("secondaryOnly")
+
+def test_client_options_from_config():
+    options = client_options()
+    assert options["maxPoolSize"] > 0
+    assert options["waitQueueTimeoutMS"] > 0
+    assert options["serverSelectionTimeoutMS"] > 0
+    assert options["event_listeners"]
+
+def test_analytics_collections_carry_read_preference():
+    assert async_db["attendances"].read_preference is None
+    assert analytics_db["attendances"].read_preference is not None
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 fork")
+def test_forked_worker_drops_inherited_client():
+    db_module._sync_client["client"] = object()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if db_module._sync_client["client"] is None else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        # 父程序不受影響
+        assert db_module._sync_client["client"] is not None
+    finally:
+        db_module._sync_client["client"] = None
@@ -0,0 +1,79 @@
+from pymongo.errors import OperationFailure
+from app.db import db
+from app.indexes import REGISTRY, diff_indexes, ensure_indexes, explain_hot_queries
+
+class FakeCollection:
+    def __init__(self, info, failing=()):
+        self.info = info
+        self.failing = failing
+        self.created = []
+
+    def index_information(self):
+        return self.info
+
+    def create_indexes(self, models):
+        names = [m.document["name"] for m in models]
+        if any(name in self.failing for name in names):
+            raise OperationFailure("E11000 duplicate key error")
+        self.created += names
+        return names
+
+class FakeDatabase:
+    def __init__(self, indexes, failing=()):
+        self.collections = {}
+        self.indexes = indexes
+        self.failing = failing
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection({"_id_": {"key": [("_id", 1)]}, **self.indexes.get(name, {})}, self.failing)
+        return self.collections[name]
+
+def test_registry_covers_hot_collections():
+    for collection in ["attendances", "attendance_reports", "leaves", "users", "settings"]:
+        assert REGISTRY.get(collection), f"{collection} 沒有宣告索引"
+
+def test_ensure_indexes_creates_missing():
+    ensure_indexes(db)
+    for collection, diff in diff_indexes(db).items():
+        assert diff["missing"] == [], f"{collection} 仍缺少索引"
+
+def test_hot_queries_do_not_collscan():
+    ensure_indexes(db)
+    for row in explain_hot_queries(db):
+        assert not row["collscan"], row
+
+def test_diff_reports_conflicting_options():
+    database = FakeDatabase({
+        # 與宣告相同的 key，但缺少 unique
+        "users": {"username_1": {"key": [("username", 1.0)]}},
+        "attendances": {
+            "user_id_local_date": {
+                "key": [("user_id", 1), ("local_date", 1)],
+                "unique": True,
+                "partialFilterExpression": {"local_date": {"$exists": True}},
+            },
+        },
+    })
+    report = diff_indexes(database)
+
+    users = report["users"]
+    assert [c["name"] for c in users["conflicting"]] == ["username_1"]
+    assert users["conflicting"][0]["declared"] == {"unique": True}
+    assert users["conflicting"][0]["existing"] == {}
+    assert "username" not in [m.document["name"] for m in users["missing"]]
+
+    # 選項完全一致的不算缺少或不一致
+    attendances = report["attendances"]
+    assert "user_id_local_date" not in [m.document["name"] for m in attendances["missing"]]
+    assert attendances["conflicting"] == []
+
+def test_ensure_indexes_continues_after_failed_index():
+    # users 的 username 因既有重複資料無法建立，其餘索引照常建立
+    database = FakeDatabase({}, failing={"username"})
+    result = ensure_indexes(database)
+
+    assert result["failed"][0][:2] == ("users", "username")
+    assert ("users", "username") in result["missing_unique"]
+    assert "username" not in result["created"].get("users", [])
+    assert database["attendances"].created == [m.document["name"] for m in REGISTRY["attendances"]]
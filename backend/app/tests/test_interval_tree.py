@@ -0,0 +1,23 @@
+import random
+from app.utils.interval_tree import IntervalTree
+
+def test_overlap_matches_linear_scan():
+    rng = random.Random(7)
+    intervals = []
+    for i in range(500):
+        start = rng.randrange(0, 365)
+        intervals.append((start, start + rng.randrange(0, 14), i))
+    tree = IntervalTree(intervals)
+
+    for _ in range(200):
+        lo = rng.randrange(-5, 370)
+        hi = lo + rng.randrange(0, 30)
+        expected = sorted(i for start, end, i in intervals if start <= hi and end >= lo)
+        assert sorted(tree.overlap(lo, hi)) == expected
+
+def test_closed_interval_edges():
+    tree = IntervalTree([(1, 3, "a"), (5, 5, "b")])
+    assert tree.overlap(3, 4) == ["a"]
+    assert tree.overlap(5, 5) == ["b"]
+    assert tree.overlap(4, 4) == []
+    assert IntervalTree().overlap(0, 10) == []
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from .test_attendance_report import get_token, wait_for_job
+
+client = TestClient(app)
+
+def test_jobs_require_admin():
+    headers = {"Authorization": f"Bearer {get_token('stella', '!QAZ 0okm 8uhb')}"}
+    assert client.get("/jobs", headers=headers).status_code == 403
+
+def test_cancel_and_retry_pending_job():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+
+    # 未啟動 lifespan，工作會停在 pending
+    res = client.post("/report/reconcile", json={"month": "2025-07", "user_ids": []}, headers=headers)
+    assert res.status_code == 202
+    job_id = res.json()["_id"]
+
+    res = client.post(f"/jobs/{job_id}/cancel", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "cancelled"
+    assert client.post(f"/jobs/{job_id}/cancel", headers=headers).status_code == 409
+
+    res = client.post(f"/jobs/{job_id}/retry", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "pending"
+    assert res.json()["attempts"] == 0
+
+    with TestClient(app) as lifespan_client:
+        job = wait_for_job(lifespan_client, headers, job_id)
+    assert job["status"] == "completed"
+    assert job["result"] == {"written": 0}
+
+def test_export_job_download():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+
+    with TestClient(app) as lifespan_client:
+        res = lifespan_client.post("/attendance/export-jobs?format=ndjson&from=2025-07-01T00:00:00", headers=headers)
+        assert res.status_code == 202
+        job = wait_for_job(lifespan_client, headers, res.json()["_id"])
+        assert job["status"] == "completed"
+        assert job["result"]["rows"] >= 0
+
+        res = lifespan_client.get(f"/jobs/{job['_id']}/download", headers=headers)
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/x-ndjson"
+        assert len(res.text.splitlines()) == job["result"]["rows"]
+
+def test_invalid_job_id():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    assert client.get("/jobs/not-an-id", headers=headers).status_code == 400
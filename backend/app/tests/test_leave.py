@@ -34,3 +34,30 @@ def test_get_my_leaves():
     response = client.get("/leave/my", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_leave_calendar():
+    response = client.post("/auth/login", data={
+        "username": "phchuang",
+        "password": "!QAZ 0okm 8uhb"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # 先申請一筆今天起的假，本季的行事曆應查得到
+    leave_id = client.post("/leave/", json={
+        "leave_type": "特休",
+        "start_date": datetime.now().isoformat(),
+        "end_date": (datetime.now() + timedelta(days=1)).isoformat()
+    }, headers=headers).json()
+
+    today = datetime.now().date()
+    calendar = client.get(f"/leave/calendar?from={today}&to={today + timedelta(days=1)}", headers=headers)
+    assert calendar.status_code == 200
+    assert leave_id in [leave["_id"] for leave in calendar.json()]
+
+    too_long = client.get("/leave/calendar?from=2024-01-01&to=2025-12-31", headers=headers)
+    assert too_long.status_code == 400
+
+    forbidden = client.get(f"/leave/calendar?from={today}&to={today}", headers={"Authorization": f"Bearer {get_token()}"})
+    assert forbidden.status_code == 403
+
+    client.delete(f"/leave/{leave_id}", headers=headers)
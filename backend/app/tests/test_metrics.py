@@ -0,0 +1,43 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.metrics import MetricsMiddleware, command_metrics, MONGO_COMMANDS, REQUEST_MONGO_COMMANDS
+
+class FakeCommandEvent:
+    def __init__(self, name):
+        self.command_name = name
+        self.duration_micros = 1000
+
+def build_probe_app():
+    probe = FastAPI()
+    probe.add_middleware(MetricsMiddleware)
+
+    @probe.get("/probe/{item_id}")
+    async def probe_route(item_id: str):
+        # 模擬 get_current_user 之後再查一次 repository
+        command_metrics.succeeded(FakeCommandEvent("find"))
+        command_metrics.succeeded(FakeCommandEvent("find"))
+        return {"item_id": item_id}
+
+    return probe
+
+def test_commands_attributed_to_route_template():
+    client = TestClient(build_probe_app())
+    before = MONGO_COMMANDS.labels("/probe/{item_id}", "find", "success")._value.get()
+    client.get("/probe/1")
+    client.get("/probe/2")
+    assert MONGO_COMMANDS.labels("/probe/{item_id}", "find", "success")._value.get() == before + 4
+
+    samples = {
+        s.name: s.value
+        for metric in REQUEST_MONGO_COMMANDS.collect()
+        for s in metric.samples
+        if s.labels.get("route") == "/probe/{item_id}"
+    }
+    assert samples["http_request_mongo_commands_count"] >= 2
+
+def test_metrics_endpoint_text_format():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds" in response.text
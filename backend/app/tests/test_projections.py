@@ -0,0 +1,53 @@
+import pytest
+from app.repositories import (
+    attendance_report_repository,
+    attendance_repository,
+    attendance_setting_repository,
+    device_repository,
+    job_repository,
+    leave_repository,
+    overtime_repository,
+    role_repository,
+    settings_repository,
+    user_repository,
+)
+from app.schemas.attendance_report_schema import AttendanceReportOut
+from app.schemas.attendance_schema import AttendanceOut
+from app.schemas.attendance_setting_schema import AttendanceSettingOut
+from app.schemas.device_schema import DeviceOut
+from app.schemas.job_schema import JobOut
+from app.schemas.leave_schema import LeaveOut
+from app.schemas.overtime_schema import OvertimeOut
+from app.schemas.role_schema import RoleOut
+from app.schemas.settings_schema import SettingOut
+from app.schemas.user_schema import UserOut
+
+def schema_fields(model) -> set:
+    """輸出 schema 對應的資料庫欄位（id 一律對應 _id）"""
+    fields = set()
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        fields.add("_id" if key in ("id", "_id") else key)
+    return fields
+
+# (projection, 輸出 schema, repository 額外需要的欄位)
+CASES = [
+    (attendance_repository.ATTENDANCE_PROJECTION, AttendanceOut, set()),
+    (attendance_report_repository.REPORT_PROJECTION, AttendanceReportOut, set()),
+    (attendance_setting_repository.SETTING_PROJECTION, AttendanceSettingOut, set()),
+    (device_repository.DEVICE_PROJECTION, DeviceOut, {"device_id", "is_active"}),
+    (job_repository.JOB_PROJECTION, JobOut, set()),
+    (leave_repository.LEAVE_PROJECTION, LeaveOut, set()),
+    (overtime_repository.OVERTIME_PROJECTION, OvertimeOut, set()),
+    (role_repository.ROLE_PROJECTION, RoleOut, set()),
+    (settings_repository.SETTING_PROJECTION, SettingOut, set()),
+    (user_repository.USER_PROJECTION, UserOut, set()),
+]
+
+@pytest.mark.parametrize("projection, schema, extra", CASES, ids=[c[1].__name__ for c in CASES])
+def test_projection_matches_schema(projection, schema, extra):
+    # _id 預設會回傳，不需寫在 projection 中
+    assert set(projection) | {"_id"} == schema_fields(schema) | extra
+
+def test_user_projection_excludes_password():
+    assert "password" not in user_repository.USER_PROJECTION
@@ -0,0 +1,31 @@
+from bson import ObjectId
+from datetime import datetime, timezone
+import json
+from app.main import app
+from app.schemas.attendance_schema import AttendanceOut
+from app.utils.responses import dumps, trusted_list
+
+def test_dumps_native_types():
+    oid = ObjectId()
+    body = json.loads(dumps({"id": oid, "at": datetime(2025, 7, 1, tzinfo=timezone.utc)}))
+    assert body == {"id": str(oid), "at": "2025-07-01T00:00:00Z"}
+
+def test_trusted_list_fills_optional_fields():
+    record = {
+        "_id": str(ObjectId()),
+        "user_id": str(ObjectId()),
+        "clock_in": "2025-07-01T09:00:00+08:00",
+        "is_late": False,
+        "is_early_leave": False,
+        "device_id": None,
+        "location": None,
+        "created_at": datetime(2025, 7, 1, 1, 0),
+        "updated_at": datetime(2025, 7, 1, 1, 0),
+    }
+    response = trusted_list([record], AttendanceOut)
+    assert json.loads(response.body)[0]["clock_out"] is None
+
+def test_openapi_keeps_response_models():
+    schema = app.openapi()
+    content = schema["paths"]["/attendance/all"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert content["schema"]["items"]["$ref"].endswith("/AttendanceOut")
@@ -0,0 +1,56 @@
+import asyncio
+from bson import ObjectId
+from datetime import datetime
+from app import slow_query
+from app.slow_query import SlowQueryListener, command_shape, value_shape
+
+class FakeStarted:
+    command_name = "find"
+    connection_id = ("localhost", 27017)
+    request_id = 1
+    operation_id = 1
+    database_name = "test"
+    command = {
+        "find": "attendances",
+        "filter": {"user_id": ObjectId(), "clock_in": {"$gte": datetime(2025, 7, 1)}},
+        "sort": {"clock_in": -1},
+    }
+
+class FakeSucceeded(FakeStarted):
+    def __init__(self, duration_ms):
+        self.duration_micros = duration_ms * 1000
+
+def test_value_shape_hides_values():
+    shape = value_shape({"user_id": {"$in": [ObjectId(), ObjectId()]}, "status": "待批准"})
+    assert shape == {"user_id": {"$in": ["ObjectId", "...x2"]}, "status": "str"}
+
+def test_aggregate_shape_keeps_stage_names():
+    pipeline = [{"$match": {"month": "2025-07"}}, {"$group": {"_id": "$user_id"}}]
+    assert command_shape("aggregate", {"aggregate": "attendances", "pipeline": pipeline}) == [{"$match": {"month": "str"}}, "$group"]
+
+def test_logs_only_commands_over_threshold(monkeypatch):
+    logged = []
+    monkeypatch.setattr(slow_query, "log_event", logged.append)
+    listener = SlowQueryListener(threshold_ms=50, explain_rate=0)
+
+    async def repository_call(duration_ms):
+        listener.started(FakeStarted())
+        await asyncio.sleep(0)
+        listener.succeeded(FakeSucceeded(duration_ms))
+
+    asyncio.run(repository_call(10))
+    asyncio.run(repository_call(120))
+    assert len(logged) == 1
+    entry = logged[0]
+    assert entry["collection"] == "attendances"
+    assert entry["duration_ms"] == 120
+    assert entry["origin"].endswith(":repository_call")
+    assert entry["shape"]["filter"] == {"user_id": "ObjectId", "clock_in": {"$gte": "datetime"}}
+
+def test_collscan_detection_ignores_rejected_plans():
+    plan = {"queryPlanner": {
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}],
+    }}
+    assert not slow_query._has_collscan(plan)
+    assert slow_query._has_collscan({"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}})
@@ -0,0 +1,28 @@
+from datetime import date, datetime, timezone
+from app.utils.time_utils import day_range_in_utc, to_taipei, to_taipei_many, to_utc
+
+def test_to_taipei_naive_utc():
+    converted = to_taipei(datetime(2025, 7, 1, 16, 30))
+    assert converted.isoformat() == "2025-07-02T00:30:00+08:00"
+
+def test_to_taipei_before_fixed_offset():
+    # 1975 年台灣仍有日光節約（UTC+9）
+    converted = to_taipei(datetime(1975, 7, 1, 0, 0))
+    assert converted.utcoffset().total_seconds() == 9 * 3600
+
+def test_to_taipei_many_matches_single():
+    rows = [
+        {"clock_in": datetime(2025, 7, 1, 0, 0, 0, 123), "clock_out": None},
+        {"clock_in": datetime(2025, 7, 1, 1, 0, tzinfo=timezone.utc), "clock_out": datetime(2025, 7, 1, 10, 0)},
+    ]
+    expected = [
+        {field: to_taipei(value).isoformat() if value else None for field, value in row.items()}
+        for row in rows
+    ]
+    assert to_taipei_many(rows, ("clock_in", "clock_out"), isoformat=True) == expected
+
+def test_day_range_in_utc():
+    start, end = day_range_in_utc(date(2025, 7, 1))
+    assert start == datetime(2025, 6, 30, 16, 0, tzinfo=timezone.utc)
+    assert end.date() == date(2025, 7, 1)
+    assert to_utc(datetime(2025, 7, 1)) == start
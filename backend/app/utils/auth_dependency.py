@@ -1,7 +1,7 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from app.utils.jwt_handler import decode_access_token
-from app.repositories import user_repository
+from app.repositories import device_repository, user_repository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -11,22 +11,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=401, detail="Invalid token")
 
     user_id = payload.get("sub")
-    user = user_repository.get_user_by_id(user_id)
+    user = await user_repository.get_cached_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return {
-        "id": str(user["_id"]),
-        "username": user["username"],
-        "role": user.get("role", "user"),
-        "name": user.get("name"),
-        "email": user.get("email"),
-        "created_at": user.get("created_at"),
-        "updated_at": user.get("updated_at")
-    }
+    return user
 
-def require_admin(user: dict = Depends(get_current_user)):
+async def require_admin(user: dict = Depends(get_current_user)):
     print("🔐 require_admin() 接收到的 user =", user)
     if user.get("role", "").lower() != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
-    return user
\ No newline at end of file
+    return user
+
+async def get_current_device(x_device_id: str = Header(...), x_device_key: str = Header(...)):
+    # 打卡裝置以 X-Device-Id（裝置 _id）與 X-Device-Key 驗證
+    device = await device_repository.authenticate_device(x_device_id, x_device_key)
+    if not device:
+        raise HTTPException(status_code=401, detail="Invalid device credentials")
+    return device
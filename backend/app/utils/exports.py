@@ -0,0 +1,45 @@
+"""匯出打卡紀錄：同步串流下載（/attendance/export）與背景匯出工作共用"""
+import csv
+import io
+import json
+from datetime import datetime
+
+EXPORT_FIELDS = ["_id", "user_id", "clock_in", "clock_out", "is_late", "is_early_leave", "device_id", "location", "created_at", "updated_at"]
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+async def export_rows(records, fmt: str):
+    """將紀錄逐批編碼成 CSV / NDJSON，累積約 64KB 才送出一次"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        # 加上 BOM 讓 Excel 以 UTF-8 開啟
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_FIELDS)
+
+    async for record in records:
+        if fmt == "ndjson":
+            buffer.write(json.dumps({f: record.get(f) for f in EXPORT_FIELDS}, ensure_ascii=False, default=_json_default))
+            buffer.write("\n")
+        else:
+            writer.writerow([
+                _json_default(v) if isinstance(v, datetime) else v
+                for v in (record.get(f) for f in EXPORT_FIELDS)
+            ])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
@@ -0,0 +1,52 @@
+from typing import Any, Iterable, List, Tuple
+
+class IntervalTree:
+    """
+    靜態區間樹：依起點排序後以隱式平衡二元樹保存，每個節點記錄子樹中最大的終點。
+    建立 O(n log n)，查詢重疊 O(log n + k)；資料變動時整棵重建。
+    區間為閉區間 [start, end]。
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, Any]] = ()):
+        items = sorted(intervals, key=lambda item: item[0])
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._values = [item[2] for item in items]
+        self._max_end = list(self._ends)
+        if items:
+            self._build(0, len(items) - 1)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _build(self, lo: int, hi: int):
+        mid = (lo + hi) // 2
+        best = self._ends[mid]
+        if lo < mid:
+            best = max(best, self._build(lo, mid - 1))
+        if mid < hi:
+            best = max(best, self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def overlap(self, start, end) -> List[Any]:
+        """回傳與 [start, end] 重疊的所有值，依起點排序"""
+        result = []
+        if self._values:
+            self._query(0, len(self._values) - 1, start, end, result)
+        return result
+
+    def _query(self, lo: int, hi: int, start, end, result: list):
+        mid = (lo + hi) // 2
+        # 整個子樹的終點都早於查詢起點
+        if self._max_end[mid] < start:
+            return
+        if lo < mid:
+            self._query(lo, mid - 1, start, end, result)
+        # 起點已晚於查詢終點，右子樹只會更晚
+        if self._starts[mid] > end:
+            return
+        if self._ends[mid] >= start:
+            result.append(self._values[mid])
+        if mid < hi:
+            self._query(mid + 1, hi, start, end, result)
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+REFRESH_TOKEN_EXPIRE_DAYS = 14
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Type
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+import orjson
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"無法序列化的型別: {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    """以 orjson 編碼，datetime 原生處理（UTC 輸出為 Z，與 pydantic 一致），ObjectId 轉字串"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+class TrustedJSONResponse(Response):
+    """直接以 orjson 編碼，不再經過 response_model 驗證"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+@lru_cache(maxsize=None)
+def _optional_fields(model: Type[BaseModel]) -> tuple:
+    return tuple(
+        (field.alias or name, field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items() if not field.is_required()
+    )
+
+def trusted_list(records: list, model: Type[BaseModel]) -> TrustedJSONResponse:
+    """
+    repository 已依 model 的 projection 轉換好輸出，略過 FastAPI 對 response_model 的再次驗證。
+    路由仍保留 response_model，OpenAPI schema 不變；缺少的選填欄位補上預設值，輸出形狀與原本相同。
+    """
+    optional = _optional_fields(model)
+    if optional:
+        for record in records:
+            for key, default in optional:
+                if key not in record:
+                    record[key] = default
+    return TrustedJSONResponse(records)
@@ -1,9 +1,83 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
 from passlib.context import CryptContext
+from app.config import BCRYPT_ROUNDS, PASSWORD_POOL_SIZE, PASSWORD_QUEUE_LIMIT
+from app.utils.jwt_handler import SECRET_KEY
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt 很吃 CPU 且會持有 GIL，交給專用的 process pool 執行；
+# 排隊數超過上限時直接回 503，避免登入尖峰拖慢其他請求
+_password_pool = {"executor": None, "pending": 0}
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+def hash_token(token: str) -> str:
+    # refresh token、裝置金鑰等高熵隨機值只存 HMAC，資料庫外洩也無法直接拿來使用
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """驗證密碼；若雜湊參數已過時（例如 cost factor 調整），一併回傳新的雜湊"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _get_executor() -> ProcessPoolExecutor:
+    if _password_pool["executor"] is None:
+        # spawn：子程序不繼承 MongoClient 等執行緒狀態
+        _password_pool["executor"] = ProcessPoolExecutor(
+            max_workers=PASSWORD_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _password_pool["executor"]
+
+async def _run_in_pool(func, *args):
+    if _password_pool["pending"] >= PASSWORD_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _password_pool["pending"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _password_pool["pending"] -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    return await _run_in_pool(verify_and_update, plain_password, hashed_password)
+
+def shutdown_password_pool():
+    executor = _password_pool["executor"]
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+        _password_pool["executor"] = None
+
+def _reset_after_fork():
+    # fork 出來的 worker 不能共用父程序的 process pool
+    _password_pool["executor"] = None
+    _password_pool["pending"] = 0
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _warm_worker(seconds: float):
+    time.sleep(seconds)
+
+async def warm_password_pool():
+    """啟動時先把 spawn 子程序與 passlib 載入完成，第一批登入不必等待"""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, _warm_worker, 0.05) for _ in range(PASSWORD_POOL_SIZE)))
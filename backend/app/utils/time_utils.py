@@ -1,21 +1,85 @@
-from datetime import datetime, time, timezone
-import pytz
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-tz_taipei = pytz.timezone("Asia/Taipei")
+try:
+    tz_taipei = ZoneInfo("Asia/Taipei")
+except ZoneInfoNotFoundError:
+    # Windows 未安裝 tzdata 時退回固定 UTC+8
+    tz_taipei = timezone(timedelta(hours=8), "Asia/Taipei")
+
+# 台灣自 1980 年起不再實施日光節約，之後固定 UTC+8。
+# 以固定偏移直接加減，省去每次查 zoneinfo 轉換表；更早的時間仍走 tz_taipei。
+TAIPEI_OFFSET = tz_taipei.utcoffset(datetime(2000, 1, 1))
+TAIPEI_OFFSET_SUFFIX = "+08:00"
+tz_taipei_fixed = timezone(TAIPEI_OFFSET)
+FIXED_OFFSET_SINCE = datetime(1980, 1, 1)
 
 def to_taipei(dt: datetime) -> datetime:
     """確保來源是 UTC，然後轉為台灣時間"""
     if dt.tzinfo is None:
+        # PyMongo 預設回傳 naive UTC
+        if dt >= FIXED_OFFSET_SINCE:
+            return (dt + TAIPEI_OFFSET).replace(tzinfo=tz_taipei_fixed)
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(tz_taipei)
 
+def to_taipei_many(records: Iterable[dict], fields: Iterable[str], isoformat: bool = False) -> list:
+    """批次將多筆紀錄的指定欄位轉為台灣時間（原地修改），isoformat=True 時轉成字串"""
+    fields = tuple(fields)
+    offset, fixed, suffix, since = TAIPEI_OFFSET, tz_taipei_fixed, TAIPEI_OFFSET_SUFFIX, FIXED_OFFSET_SINCE
+    records = records if isinstance(records, list) else list(records)
+    for record in records:
+        for field in fields:
+            dt = record.get(field)
+            if dt.__class__ is not datetime:
+                continue
+            if dt.tzinfo is None and dt >= since:
+                # 常見情況：naive UTC 直接平移，isoformat 只需補上固定的 +08:00
+                local = dt + offset
+                record[field] = local.isoformat() + suffix if isoformat else local.replace(tzinfo=fixed)
+            else:
+                local = to_taipei(dt)
+                record[field] = local.isoformat() if isoformat else local
+    return records
+
 def now_taipei() -> datetime:
     """取得台灣當前時間（datetime with tzinfo）"""
-    return datetime.now(tz_taipei)
+    return datetime.now(tz_taipei_fixed)
+
+@lru_cache(maxsize=1024)
+def day_range_in_utc(local_date: date):
+    """指定台灣日期在 UTC 中的時間區間（結果會快取）"""
+    start = datetime.combine(local_date, time.min, tzinfo=tz_taipei).astimezone(timezone.utc)
+    end = datetime.combine(local_date, time.max, tzinfo=tz_taipei).astimezone(timezone.utc)
+    return start, end
 
 def today_range_in_utc():
     """取得今天（台灣時間）在 UTC 中的時間區間"""
-    today = now_taipei().date()
-    start = tz_taipei.localize(datetime.combine(today, time.min)).astimezone(timezone.utc)
-    end = tz_taipei.localize(datetime.combine(today, time.max)).astimezone(timezone.utc)
-    return start, end
\ No newline at end of file
+    return day_range_in_utc(now_taipei().date())
+
+def month_range_in_utc(month: str):
+    """將台灣時間的月份（YYYY-MM）轉為 UTC 區間 [start, end)"""
+    first = datetime.strptime(month, "%Y-%m")
+    if first.month == 12:
+        next_first = first.replace(year=first.year + 1, month=1)
+    else:
+        next_first = first.replace(month=first.month + 1)
+    start = first.replace(tzinfo=tz_taipei).astimezone(timezone.utc)
+    end = next_first.replace(tzinfo=tz_taipei).astimezone(timezone.utc)
+    return start, end
+
+def quarter_range_in_utc(local_date: date):
+    """指定台灣日期所在季度的 UTC 區間 [start, end)"""
+    first_month = (local_date.month - 1) // 3 * 3 + 1
+    start, _ = month_range_in_utc(f"{local_date.year}-{first_month:02d}")
+    last_month = f"{local_date.year}-{first_month + 2:02d}"
+    _, end = month_range_in_utc(last_month)
+    return start, end
+
+def to_utc(dt: datetime) -> datetime:
+    """查詢參數若未帶時區，視為台灣時間後轉為 UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=tz_taipei)
+    return dt.astimezone(timezone.utc)
@@ -0,0 +1,80 @@
+"""
+併發上班打卡壓測：比較同步（threadpool）與非同步資料層的 /attendance/clock-in 吞吐量。
+
+使用方式（後端需先以 uvicorn 啟動，並連到可寫入的測試資料庫）：
+
+    cd backend
+    python -m benchmarks.clock_in_benchmark --users 500 --concurrency 100 --label async
+
+切換到改版前的 commit 重跑一次（--label sync），比較兩份輸出的 JSON 即可。
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import BENCH_PASSWORD, percentile, seed_users
+
+async def login_all(client: httpx.AsyncClient, usernames: list[str], concurrency: int) -> list[str]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(username: str) -> str:
+        async with semaphore:
+            res = await client.post("/auth/json-login", json={"username": username, "password": BENCH_PASSWORD})
+            res.raise_for_status()
+            return res.json()["access_token"]
+
+    return await asyncio.gather(*(login(name) for name in usernames))
+
+async def clock_in_all(client: httpx.AsyncClient, tokens: list[str], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def clock_in(token: str):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            res = await client.post(
+                "/attendance/clock-in",
+                json={"device_id": "bench-device", "location": "benchmark"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            latencies.append(time.perf_counter() - started)
+            if res.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(clock_in(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(tokens),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(tokens) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--label", default="current", help="結果標籤，例如 sync / async")
+    args = parser.parse_args()
+
+    usernames = seed_users(args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        tokens = await login_all(client, usernames, args.concurrency)
+        result = await clock_in_all(client, tokens, args.concurrency)
+
+    result.update({"label": args.label, "concurrency": args.concurrency})
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
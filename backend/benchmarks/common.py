@@ -0,0 +1,42 @@
+"""壓測共用：建立測試帳號、計算延遲百分位數"""
+import math
+from datetime import datetime, timezone
+
+from app.db import db
+from app.utils.security import hash_password
+
+BENCH_PASSWORD = "bench-password"
+
+def seed_users(count: int) -> list[str]:
+    """建立壓測帳號，並清除這些帳號的打卡紀錄、月報表與當日彙總"""
+    users = db["users"]
+    hashed = hash_password(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc)
+    usernames = [f"bench_user_{i:05d}" for i in range(count)]
+    existing = {u["username"] for u in users.find({"username": {"$in": usernames}}, {"username": 1})}
+    missing = [
+        {
+            "username": name,
+            "password": hashed,
+            "name": name,
+            "role": "user",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for name in usernames if name not in existing
+    ]
+    if missing:
+        users.insert_many(missing)
+
+    user_ids = [u["_id"] for u in users.find({"username": {"$in": usernames}}, {"_id": 1})]
+    # 打卡會累加月報表並寫入當日彙總，只刪打卡紀錄的話重跑時報表數字會一直累積
+    for collection in ("attendances", "attendance_reports", "attendance_daily"):
+        db[collection].delete_many({"user_id": {"$in": user_ids}})
+    return usernames
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """nearest-rank 百分位數"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
@@ -0,0 +1,166 @@
+"""
+上班尖峰（08:55–09:10）負載測試：建立 N 個帳號，依序以併發方式執行
+/auth/json-login、/attendance/clock-in、/attendance/clock-out，
+輸出各階段吞吐量、p50/p95/p99 延遲與錯誤率的 JSON 結果。
+
+    cd backend
+    # 對已啟動的 uvicorn / gunicorn 壓測
+    python -m benchmarks.load_harness --users 1000 --concurrency 200 --output results/head.json
+    # 不啟動伺服器，直接在程序內以 ASGI 呼叫 app
+    python -m benchmarks.load_harness --in-process --users 200
+    # 與先前的結果比較，p95 退步超過 20% 時回傳非 0
+    python -m benchmarks.load_harness --users 1000 --compare results/base.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from benchmarks.common import BENCH_PASSWORD, percentile, seed_users
+
+PHASES = ["login", "clock_in", "clock_out"]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_phase(name: str, requests: list, concurrency: int) -> tuple[dict, list]:
+    """以固定併發數執行一個階段，requests 為回傳 httpx.Response 的 coroutine factory"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+    responses = [None] * len(requests)
+
+    async def run(i, make_request):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                res = await make_request()
+                statuses[str(res.status_code)] += 1
+                responses[i] = res
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(i, r) for i, r in enumerate(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    summary = {
+        "requests": len(requests),
+        "errors": errors,
+        "error_rate": round(errors / len(requests), 4) if requests else 0.0,
+        "statuses": dict(statuses),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+    print(f"{name:<10} {summary['throughput_rps']:>8} req/s  p50={summary['p50_ms']}ms  "
+          f"p95={summary['p95_ms']}ms  p99={summary['p99_ms']}ms  errors={errors}")
+    return summary, responses
+
+async def run_harness(client: httpx.AsyncClient, usernames: list[str], concurrency: int) -> dict:
+    phases = {}
+
+    def login(username):
+        return lambda: client.post("/auth/json-login", json={"username": username, "password": BENCH_PASSWORD})
+
+    phases["login"], responses = await run_phase("login", [login(u) for u in usernames], concurrency)
+    tokens = [r.json()["access_token"] for r in responses if r is not None and r.status_code == 200]
+
+    def clock_in(token):
+        return lambda: client.post(
+            "/attendance/clock-in",
+            json={"device_id": "bench-device", "location": "benchmark"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    def clock_out(token):
+        return lambda: client.post("/attendance/clock-out", headers={"Authorization": f"Bearer {token}"})
+
+    phases["clock_in"], _ = await run_phase("clock_in", [clock_in(t) for t in tokens], concurrency)
+    phases["clock_out"], _ = await run_phase("clock_out", [clock_out(t) for t in tokens], concurrency)
+    return phases
+
+def compare(result: dict, baseline: dict, max_regression: float) -> list[str]:
+    """回傳 p95 延遲或吞吐量退步超過門檻的階段說明"""
+    regressions = []
+    for phase in PHASES:
+        cur, base = result["phases"].get(phase), baseline["phases"].get(phase)
+        if not cur or not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{phase}: p95 {base['p95_ms']}ms -> {cur['p95_ms']}ms")
+        if base["throughput_rps"] and cur["throughput_rps"] < base["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{phase}: throughput {base['throughput_rps']} -> {cur['throughput_rps']} req/s")
+    return regressions
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="以 ASGITransport 直接呼叫 app.main:app")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--label", default=None, help="結果標籤，預設為目前的 git commit")
+    parser.add_argument("--output", default=None, help="結果 JSON 輸出路徑")
+    parser.add_argument("--compare", default=None, help="作為比較基準的結果 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    usernames = seed_users(args.users)
+
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+    async with client:
+        phases = await run_harness(client, usernames, args.concurrency)
+
+    commit = git_commit()
+    result = {
+        "label": args.label or commit,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": "in-process" if args.in_process else args.base_url,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "phases": phases,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"結果已寫入 {args.output}")
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"⚠️ {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
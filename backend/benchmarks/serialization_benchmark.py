@@ -0,0 +1,96 @@
+"""
+回應序列化基準：比較 response_model 驗證 + 標準 json 與 trusted_list（orjson）輸出相同資料的成本。
+
+    cd backend
+    python -m benchmarks.serialization_benchmark --rows 10000 --repeat 5
+
+以 ASGITransport 在同一個行程內呼叫兩個最小路由，不需要資料庫；
+結果為每 10k 筆的耗時（取最佳值），並確認兩條路徑輸出的 JSON 內容一致。
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.repositories.attendance_repository import convert_attendance_many
+from app.schemas.attendance_schema import AttendanceOut
+from app.utils.responses import trusted_list
+
+def make_rows(count: int) -> list[dict]:
+    """產生與 get_attendance_page 相同形狀的資料"""
+    base = datetime(2025, 7, 1)
+    user_ids = [ObjectId() for _ in range(50)]
+    rows = []
+    for i in range(count):
+        clock_in = base + timedelta(minutes=i)
+        rows.append({
+            "_id": ObjectId(),
+            "user_id": user_ids[i % len(user_ids)],
+            "clock_in": clock_in,
+            "clock_out": clock_in + timedelta(hours=9) if i % 10 else None,
+            "is_late": i % 7 == 0,
+            "is_early_leave": False,
+            "device_id": "device-1",
+            "location": "總公司",
+            "created_at": clock_in,
+            "updated_at": clock_in,
+        })
+    return convert_attendance_many(rows)
+
+def build_app(rows: list[dict]) -> FastAPI:
+    app = FastAPI()
+
+    # 兩個路由都先淺複製，避免 trusted_list 補欄位時影響下一輪
+    @app.get("/validated", response_model=list[AttendanceOut])
+    async def validated():
+        return [dict(row) for row in rows]
+
+    @app.get("/trusted", response_model=list[AttendanceOut])
+    async def trusted():
+        return trusted_list([dict(row) for row in rows], AttendanceOut)
+
+    return app
+
+async def measure(client: httpx.AsyncClient, path: str, repeat: int) -> tuple[float, bytes]:
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        res = await client.get(path)
+        best = min(best, time.perf_counter() - started)
+        res.raise_for_status()
+        body = res.content
+    return best, body
+
+async def run(rows: int, repeat: int) -> dict:
+    app = build_app(make_rows(rows))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        validated, validated_body = await measure(client, "/validated", repeat)
+        trusted, trusted_body = await measure(client, "/trusted", repeat)
+
+    per_10k = 10_000 / rows
+    return {
+        "rows": rows,
+        "repeat": repeat,
+        "same_output": json.loads(validated_body) == json.loads(trusted_body),
+        "ms_per_10k_rows": {
+            "response_model": round(validated * per_10k * 1000, 2),
+            "trusted_orjson": round(trusted * per_10k * 1000, 2),
+        },
+        "speedup": round(validated / trusted, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows, args.repeat)), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+時間轉換微基準：比較改版前的 pytz 逐筆轉換與 time_utils 的固定偏移／批次轉換。
+
+    cd backend
+    python -m benchmarks.time_utils_benchmark --rows 100000 --repeat 5
+
+不需要資料庫；未安裝 pytz 時只量測新版實作。
+"""
+import argparse
+import json
+import random
+import timeit
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.utils import time_utils
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+def make_rows(count: int) -> list[dict]:
+    # 與 PyMongo 預設相同：naive UTC
+    base = datetime(2025, 1, 1)
+    rng = random.Random(42)
+    rows = []
+    for _ in range(count):
+        clock_in = base + timedelta(seconds=rng.randrange(365 * 86400))
+        rows.append({"clock_in": clock_in, "clock_out": clock_in + timedelta(hours=9)})
+    return rows
+
+def pytz_convert(rows: list[dict]):
+    """改版前 convert_attendance 的作法：每個欄位各呼叫一次 pytz astimezone"""
+    tz = pytz.timezone("Asia/Taipei")
+    for row in rows:
+        for field in ("clock_in", "clock_out"):
+            dt = row[field]
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            row[field] = dt.astimezone(tz).isoformat()
+
+def single_convert(rows: list[dict]):
+    for row in rows:
+        row["clock_in"] = time_utils.to_taipei(row["clock_in"]).isoformat()
+        row["clock_out"] = time_utils.to_taipei(row["clock_out"]).isoformat()
+
+def batch_convert(rows: list[dict]):
+    time_utils.to_taipei_many(rows, ("clock_in", "clock_out"), isoformat=True)
+
+def pytz_day_range():
+    tz = pytz.timezone("Asia/Taipei")
+    today = datetime.now(tz).date()
+    start = tz.localize(datetime.combine(today, time.min)).astimezone(timezone.utc)
+    end = tz.localize(datetime.combine(today, time.max)).astimezone(timezone.utc)
+    return start, end
+
+def measure(func, rows: list[dict], repeat: int) -> float:
+    """每次量測都用新的複本，避免轉換後的字串影響下一輪"""
+    best = float("inf")
+    for _ in range(repeat):
+        data = [dict(row) for row in rows]
+        started = timeit.default_timer()
+        func(data)
+        best = min(best, timeit.default_timer() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    result = {"rows": args.rows, "repeat": args.repeat, "seconds": {}}
+    candidates = {"to_taipei": single_convert, "to_taipei_many": batch_convert}
+    if pytz is not None:
+        candidates = {"pytz": pytz_convert, **candidates}
+    for name, func in candidates.items():
+        result["seconds"][name] = round(measure(func, rows, args.repeat), 4)
+
+    # 每次打卡都會呼叫 today_range_in_utc
+    calls = 100_000
+    day_range = {"today_range_in_utc": timeit.timeit(time_utils.today_range_in_utc, number=calls)}
+    if pytz is not None:
+        day_range["pytz"] = timeit.timeit(pytz_day_range, number=calls)
+    result["day_range_us_per_call"] = {name: round(total / calls * 1e6, 3) for name, total in day_range.items()}
+
+    if "pytz" in result["seconds"]:
+        baseline = result["seconds"]["pytz"]
+        result["speedup_vs_pytz"] = {
+            name: round(baseline / seconds, 2) for name, seconds in result["seconds"].items() if name != "pytz"
+        }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
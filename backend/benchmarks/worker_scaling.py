@@ -0,0 +1,94 @@
+"""
+多 worker 擴展測試：依序以 1..N 個 worker 啟動 python -m app.server，
+每次都跑一輪 load_harness，最後輸出各階段吞吐量的 markdown 表格（可直接貼到 README）。
+
+    cd backend
+    python -m benchmarks.worker_scaling --workers 1 2 4 8 --users 1000 --concurrency 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load_harness import PHASES
+
+def wait_ready(base_url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def run_once(workers: int, args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(workers)],
+    )
+    try:
+        if not wait_ready(base_url, args.startup_timeout):
+            raise RuntimeError(f"{workers} 個 worker 的伺服器未在 {args.startup_timeout} 秒內啟動")
+        output = os.path.join(args.output_dir, f"workers-{workers}.json")
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.load_harness",
+                "--base-url", base_url,
+                "--users", str(args.users),
+                "--concurrency", str(args.concurrency),
+                "--label", f"workers-{workers}",
+                "--output", output,
+            ],
+            check=True,
+        )
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        # SIGTERM：走一般的平滑關閉流程
+        server.terminate()
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def markdown_table(results: dict) -> str:
+    base = results[min(results)]["phases"]
+    lines = [
+        "| workers | " + " | ".join(f"{p} req/s (x)" for p in PHASES) + " | clock_in p95 ms |",
+        "|---|" + "---|" * len(PHASES) + "---|",
+    ]
+    for workers in sorted(results):
+        phases = results[workers]["phases"]
+        cells = []
+        for phase in PHASES:
+            rps = phases[phase]["throughput_rps"]
+            speedup = rps / base[phase]["throughput_rps"] if base[phase]["throughput_rps"] else 0
+            cells.append(f"{rps} ({speedup:.2f}x)")
+        lines.append(f"| {workers} | " + " | ".join(cells) + f" | {phases['clock_in']['p95_ms']} |")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--output-dir", default=os.path.join(tempfile.gettempdir(), "worker-scaling"))
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = {workers: run_once(workers, args) for workers in sorted(set(args.workers))}
+    print()
+    print(f"users={args.users} concurrency={args.concurrency} cpu_count={os.cpu_count()}")
+    print(markdown_table(results))
+
+if __name__ == "__main__":
+    main()
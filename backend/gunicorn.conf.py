@@ -0,0 +1,31 @@
+"""
+gunicorn 設定（Linux）：
+
+    cd backend
+    gunicorn -c gunicorn.conf.py app.main:app
+
+preload_app 會在 master 先 import app 再 fork；app 在 import 時不建立 Mongo client
+或 process pool，fork 後 app.db / app.utils.security 會以 os.register_at_fork 丟棄
+繼承的參照，每個 worker 在 lifespan 中重新連線並預熱快取後才接受請求。
+"""
+import os
+from app.config import GRACEFUL_TIMEOUT_SECONDS, SERVER_HOST, SERVER_PORT, WEB_WORKERS
+from app.server import prepare_multiprocess_metrics
+
+bind = os.getenv("GUNICORN_BIND", f"{SERVER_HOST}:{SERVER_PORT}")
+workers = WEB_WORKERS
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = GRACEFUL_TIMEOUT_SECONDS
+# 預熱（含建立索引）可能比一般請求久
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+accesslog = None
+
+# 在 preload 的 app import prometheus_client 之前設定共用指標目錄
+prepare_multiprocess_metrics(workers)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)